@@ -0,0 +1,102 @@
+"""
+bench_shards.py
+
+measures the run time of logins.py with --shards on generated forwarded events
+of many computers, and checks that every number of shards prints the same
+sessions as a run without shards.
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+EVENT_IDS = [4624, 4624, 4634, 4634, 4647, 4648, 4625, 4688]
+
+
+# writes events of `computers` computers, as they are exported by evtx_dump from ForwardedEvents.evtx
+def generate_events(path: Path, events: int, computers: int, seed: int = 1):
+    rng = random.Random(seed)
+    begin = datetime(2021, 1, 1)
+    with open(path, 'wb') as f:
+        for record_id in range(1, events + 1):
+            timestamp = begin + timedelta(seconds=rng.randint(0, 30 * 86400), microseconds=rng.randint(0, 999999))
+            logon_id = hex(rng.randint(0x10000, 0x10000 + 5000))
+            event_id = rng.choice(EVENT_IDS)
+            event_data = {
+                'SubjectUserSid': 'S-1-5-18',
+                'SubjectLogonId': logon_id,
+                'TargetUserSid': 'S-1-5-21-1004336348-1177238915-682003330-%d' % rng.randint(1000, 1020),
+                'TargetUserName': 'user%d' % rng.randint(0, 20),
+                'TargetDomainName': 'CONTOSO',
+                'TargetLogonId': logon_id,
+                'LogonType': rng.choice(['2', '3', '10']),
+                'IpAddress': '10.0.0.%d' % rng.randint(1, 50),
+            }
+            if event_id == 4688:
+                event_data.update({'NewProcessId': hex(rng.randint(1, 999)), 'ProcessId': hex(rng.randint(1, 999)),
+                                   'NewProcessName': 'C:\\Windows\\System32\\cmd.exe', 'CommandLine': 'cmd.exe'})
+            system = {
+                'Provider': {'#attributes': {'Name': 'Microsoft-Windows-Security-Auditing'}},
+                'EventID': event_id,
+                'TimeCreated': {'#attributes': {'SystemTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}},
+                'EventRecordID': record_id,
+                'Channel': 'Security',
+                'Computer': 'ws%04d.contoso.local' % rng.randint(0, computers - 1),
+            }
+            f.write(orjson.dumps({'Event': {'System': system, 'EventData': event_data}}) + b'\n')
+
+
+def run_logins(logsdir: Path, options: list) -> tuple:
+    # failed logons are not aggregated, because shards collapse them per computer
+    command = [sys.executable, 'logins.py', str(logsdir), '--process-tree', '--stitch-rdp'] + options
+    begin = time.perf_counter()
+    output = subprocess.run(command, cwd=REPO_DIR, capture_output=True, check=True).stdout
+    return time.perf_counter() - begin, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument('--events', type=int, default=200000, help='number of events (default: 200000)')
+    parser.add_argument('--computers', type=int, default=500, help='number of computers (default: 500)')
+    parser.add_argument('--runs', type=int, default=3, help='number of runs per configuration (default: 3)')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4],
+                        help='numbers of shards to measure (default: 1 2 4)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as logsdir:
+        logsdir = Path(logsdir)
+        generate_events(logsdir / 'ForwardedEvents.jsonl', args.events, args.computers)
+
+        print("%d events of %d computers, %d CPUs" % (args.events, args.computers, os.cpu_count()))
+        print("%-14s %10s %10s %8s" % ("shards", "min [s]", "median [s]", "speedup"))
+        configurations = [("none", [])] + [(str(n), ['--shards', str(n)]) for n in args.shards]
+        expected, baseline = None, None
+        for name, options in configurations:
+            timings = list()
+            for _ in range(args.runs):
+                duration, output = run_logins(logsdir, options)
+                timings.append(duration)
+                if expected is None:
+                    expected = output
+                elif output != expected:
+                    print("--shards %s prints other sessions than a run without shards" % name)
+                    return 1
+            if baseline is None:
+                baseline = min(timings)
+            print("%-14s %10.2f %10.2f %7.2fx" % (name, min(timings), statistics.median(timings),
+                                                 baseline / min(timings)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+bench_startup.py
+
+measures the cold start time of the evtxtools commands, and checks that
+importing the package does not load any of the parser or database backends.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+COMMANDS = [
+    ("import evtxtools", [sys.executable, "-c", "import evtxtools"]),
+    ("evtxtools --help", [sys.executable, "-m", "evtxtools", "--help"]),
+    ("evtxtools logins --help", [sys.executable, "-m", "evtxtools", "logins", "--help"]),
+    ("evtxtools es --help", [sys.executable, "-m", "evtxtools", "es", "--help"]),
+    ("logins.py --help", [sys.executable, "logins.py", "--help"]),
+]
+
+# modules which must not be loaded by 'import evtxtools'
+HEAVY_MODULES = [
+    "evtx", "progressbar", "orjson", "sqlalchemy", "elasticsearch", "elasticsearch_dsl", "coloredlogs",
+    "evtxtools.LogSource", "evtxtools.WellKnownSids", "evtxtools.EvtxParser",
+]
+
+
+def run_command(command: list) -> float:
+    begin = time.perf_counter()
+    subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - begin
+
+
+def loaded_heavy_modules() -> list:
+    script = "import sys, evtxtools; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    modules = set(output.stdout.split())
+    return [m for m in HEAVY_MODULES if m in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument('--runs', type=int, default=20, help='number of runs per command (default: 20)')
+    args = parser.parse_args()
+
+    print("%-28s %10s %10s" % ("command", "min [ms]", "median [ms]"))
+    for name, command in COMMANDS:
+        # the first run compiles the byte code and fills the page cache
+        run_command(command)
+        timings = [run_command(command) for _ in range(args.runs)]
+        print("%-28s %10.1f %10.1f" % (name, min(timings) * 1000, statistics.median(timings) * 1000))
+
+    heavy = loaded_heavy_modules()
+    if heavy:
+        print("'import evtxtools' loads: " + ", ".join(heavy))
+        return 1
+    print("'import evtxtools' loads none of: " + ", ".join(HEAVY_MODULES))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
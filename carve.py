@@ -0,0 +1,39 @@
+"""
+carve.py
+
+Carves evtx chunks from disk images or memory dumps and stores them as new evtx files.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import evtxtools
+from evtxtools.EvtxCarver import EvtxCarver
+
+
+def main():
+    return run(evtxtools.parse_carve_arguments())
+
+
+def run(args):
+    args.outputdir.mkdir(parents=True, exist_ok=True)
+
+    carver = EvtxCarver(args.image, jobs=args.jobs)
+    if args.exclude_dir is not None:
+        for f in args.exclude_dir.iterdir():
+            if f.is_file() and f.name.endswith(".evtx"):
+                carver.exclude_chunks_of(f)
+
+    for f in carver.carve(args.outputdir):
+        print(str(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+detect.py
+
+Runs a set of detection rules against evtx files in a single pass.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+
+import progressbar
+
+import evtxtools
+from evtxtools.EventSource import export_files
+from evtxtools.LogSource import LogSource
+from evtxtools.RawEventList import RawEventList
+from evtxtools.RuleEngine import RuleEngine
+from evtxtools.WindowsEvent import SYSTEM_FIELDS
+
+
+def main():
+    return run(evtxtools.parse_detect_arguments())
+
+
+def run(args):
+    engine = RuleEngine()
+
+    # only files which belong to a log source of at least one rule need to be parsed
+    files_to_scan = list()
+    for f in args.logsdir.iterdir():
+        if not f.is_file() or not f.name.endswith(".evtx"):
+            continue
+        try:
+            if LogSource.from_file(f) in engine.log_sources:
+                files_to_scan.append(f)
+        except ValueError:
+            continue
+    # exported events may contain events of any log
+    files_to_scan.extend(export_files(args.logsdir))
+
+    event_list = RawEventList(files_to_scan, engine.event_ids, args.from_date, args.to_date)
+    for event in progressbar.progressbar(event_list):
+        for rule in engine.match(event):
+            print("%s [%s]: %s" % (event.timestamp, rule.name, str(event)))
+
+    if args.statistics:
+        print("%-32s %10s %12s" % ("rule", "hits", "time (s)"), file=sys.stderr)
+        for rule, hits, match_time in engine.statistics():
+            print("%-32s %10d %12.6f" % (rule.name, hits, match_time), file=sys.stderr)
+        print("%d of %d records decoded with a cached field accessor plan (%.2f%%)" % (
+            SYSTEM_FIELDS.hits, SYSTEM_FIELDS.hits + SYSTEM_FIELDS.misses, SYSTEM_FIELDS.hit_rate * 100),
+            file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
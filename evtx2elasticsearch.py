@@ -15,123 +15,35 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import sys
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import progressbar
-from evtx import PyEvtxParser
 
 import el
 import evtxtools
-import orjson
+from evtxtools.DirectoryWatcher import DirectoryWatcher, retry_delay
+from evtxtools.EventDeduplicator import EventDeduplicator
+from evtxtools.EventSource import event_files, event_source
+from evtxtools.ProcessedRecords import ProcessedRecords, new_records
+from evtxtools.SidResolver import SidResolver
+from evtxtools.SimpleWindowsEvent import SimpleWindowsEvent, SYSTEM_FIELDS
+from evtxtools.StringTable import TABLES
 import coloredlogs, logging
 from elasticsearch_dsl import connections, Index, IndexTemplate, Mapping
 from elasticsearch.helpers import bulk
 
-class SimpleWindowsEvent:
-    SEPARATOR = "/"
-    event_id: int
-    record_id: int
-    level: int
-    provider_name: str
-    provider_guid: str
-    process_id: int
-    thread_id: int
-    activity_id: str
-    related_activity_id: str
-    channel: str
-    computer: str
-    timestamp: datetime
-    timecreated: datetime
-    user: str
-    event_data: dict
-
-    def __init__(self, record: dict):
-        self.__values = dict()
-        if record['timestamp'][19] == '.':
-            self.timestamp = datetime.strptime(record['timestamp'], "%Y-%m-%d %H:%M:%S.%f %Z")
-        else:
-            self.timestamp = datetime.strptime(record['timestamp'], "%Y-%m-%d %H:%M:%S %Z")
-
-        self.__record = orjson.loads(record['data'])
-        self.cache_values(prefix="", dictionary=self.__record['Event'])
-
-        self.event_id = self.safe_int(self["/System/EventID"])
-        self.record_id = self.safe_int(self["/System/EventRecordID"])
-        self.level = self.safe_int(self["/System/Level"])
-        self.provider_name = str(self["/System/Provider/@Name"])
-        self.provider_guid = str(self["/System/Provider/@Guid"])
-        self.process_id = self.safe_int(self["/System/Execution/@ProcessID"])
-        self.thread_id = self.safe_int(self["/System/Execution/@ThreadID"])
-        self.activity_id = str(self["/System/Correlation/@ActivityID"])
-        self.related_activity_id = str(self["/System/Correlation/@RelatedActivityID"])
-        self.channel = str(self["/System/Channel"])
-        self.computer = str(self["/System/Computer"])
-        self.timecreated = self.get_time_created(self["/System/TimeCreated/@SystemTime"])
-        self.user = str(self["/System/Security/@UserID"])
-        self.event_data = self.__record['Event'].get('EventData')
-
-        if self.event_data:
-            if '#attributes' in self.event_data:
-                for key, value in self.event_data['#attributes'].items():
-                    self.event_data['@' + key] = value
-                del self.event_data['#attributes']
-
-            for key, value in self.event_data.items():
-                if isinstance(value, dict):
-                    if '#text' in value:
-                        self.event_data[key] = str(value['#text'])
-                    else:
-                        raise RuntimeError("invalid datatype")
-                else:
-                    self.event_data[key] = str(value)
-
-
-    @staticmethod
-    def safe_int(item):
-        return int(item) if item else None
-
-    @staticmethod
-    def get_time_created(timecreated):
-        if timecreated[19] == '.':
-            return datetime.strptime(timecreated, "%Y-%m-%dT%H:%M:%S.%fZ")
-        else:
-            return datetime.strptime(timecreated, "%Y-%m-%dT%H:%M:%SZ")
-
-    def cache_values(self, prefix: str, dictionary: dict):
-        for _key, _value in dictionary.items():
-            if _key == '#attributes':
-                assert isinstance(_value, dict)
-                for _a_key, _a_value in _value.items():
-                    assert not isinstance(_a_value, dict)
-                    self.__values[prefix + self.SEPARATOR + "@" + _a_key] = _a_value
-                continue
-
-            _id = prefix + self.SEPARATOR + _key
-
-            if _key == '#text':
-                self.__values[prefix] = _value
-                continue
-
-            if isinstance(_value, dict):
-                self.cache_values(_id, _value)
-            else:
-                assert _key not in self.__values
-                self.__values[_id] = _value
-
-    def __getitem__(self, item) -> str:
-        return self.get_property(item, allow_none=True)
-
-    def get_property(self, path: str, allow_none=False) -> str:
-        if allow_none:
-            return self.__values.get(path)
-        else:
-            return self.__values[path]
-
-    def to_json(self):
-        return orjson.dumps(self.__record).decode("UTF-8")
+# the accounts of SIDs are learned from logon events, and added to events which carry only the SID of their user
+def event_to_dict(filename: str, swe: SimpleWindowsEvent, index: str, resolver: SidResolver = None):
+    user = {'id': swe.user}
+    event_data = swe.event_data
+    if resolver is not None:
+        resolver.add_event(swe.event_id, event_data)
+        account = resolver.resolve(swe.user)
+        if account is not None:
+            user['domain'], user['name'] = account
+        event_data = dict(event_data, **resolver.accounts(event_data))
 
-
-def event_to_dict(filename: str, swe: SimpleWindowsEvent, index: str):
     event = el.WindowsEvent(
         event={
             'code': swe.event_id,
@@ -144,11 +56,9 @@ def event_to_dict(filename: str, swe: SimpleWindowsEvent, index: str):
         correlation={'activity_id': swe.activity_id, 'related_activity_id': swe.related_activity_id},
         channel=swe.channel,
         computer=swe.computer,
-        user={
-            'id': swe.user
-        },
+        user=user,
         execution={'process_id': swe.process_id, 'thread_id': swe.thread_id},
-        event_data=swe.event_data,
+        event_data=event_data,
         log={
             'file': {
                 'path': filename
@@ -164,8 +74,10 @@ class EventGenerator:
                  filename: str,
                  index: str,
                  raw_items: list,
-                 progress_bar: progressbar.progressbar):
+                 progress_bar: progressbar.progressbar,
+                 resolver: SidResolver = None):
         self.__filename = filename
+        self.__resolver = resolver
         self.__index = index
         self.__raw_items = raw_items
         self.__progress = progress_bar
@@ -178,22 +90,23 @@ class EventGenerator:
             yield event_to_dict(
                 filename=self.__filename,
                 swe=SimpleWindowsEvent(r),
-                index=self.__index)
+                index=self.__index,
+                resolver=self.__resolver)
 
 
-def evtx2elasticsearch(evtx_files: set, index: str,  override: False):
+def evtx2elasticsearch(evtx_files: set, index: str,  override: False, deduplicator: EventDeduplicator = None):
     connections.create_connection(hosts=['localhost'], timeout=20)
 
     create_index(index=index, override=override)
 
     el.WindowsEvent.init(index=index)
+    resolver = SidResolver()
 
     for f in evtx_files:
 
-        parser = PyEvtxParser(str(f))
         items = list()
         bar = progressbar.ProgressBar(prefix="parsing " + f.name)
-        iterator = parser.records_json()
+        iterator = event_source(f).records()
 
         n = 0
         while True:
@@ -201,7 +114,9 @@ def evtx2elasticsearch(evtx_files: set, index: str,  override: False):
             bar.update(n)
             try:
                 e = next(iterator)
-                items.append(e)
+                # duplicates are dropped before they are decoded
+                if deduplicator is None or not deduplicator.is_duplicate(e):
+                    items.append(e)
             except StopIteration:
                 break
             except RuntimeError as e:
@@ -213,10 +128,102 @@ def evtx2elasticsearch(evtx_files: set, index: str,  override: False):
             filename=f.name,
             index=index,
             raw_items=items,
-            progress_bar=bar
+            progress_bar=bar,
+            resolver=resolver
         )
         bulk(connections.get_connection(), generator, index=index)
 
+    SYSTEM_FIELDS.log_statistics("SimpleWindowsEvent")
+    for table in TABLES.values():
+        table.log_statistics()
+    if deduplicator is not None:
+        logging.info("dropped {duplicates} of {records} records as duplicates".format(
+            duplicates=deduplicator.duplicates, records=deduplicator.records))
+        deduplicator.close()
+
+
+# converts records to bulk actions. The ids of the documents are derived from `id_prefix` and the record ids, so
+# that records which are indexed again (e.g. after a crash) replace their documents. The record ids of all
+# converted records are appended to `record_ids`.
+def bulk_actions(records, filename: str, index: str, id_prefix: str, record_ids: list,
+                 resolver: SidResolver = None):
+    iterator = iter(records)
+    while True:
+        try:
+            record = next(iterator)
+            action = event_to_dict(filename=filename, swe=SimpleWindowsEvent(record), index=index, resolver=resolver)
+        except StopIteration:
+            break
+        except RuntimeError as e:
+            logging.error("{0}: {1}".format(filename, e))
+            continue
+        action['_id'] = "{0}/{1}".format(id_prefix, record['event_record_id'])
+        record_ids.append(record['event_record_id'])
+        yield action
+
+
+# indexes the records of a file which have not been indexed yet
+def index_new_records(path: Path, logsdir: Path, index: str, processed: ProcessedRecords,
+                      resolver: SidResolver = None) -> int:
+    record_ids = list()
+    bulk(connections.get_connection(),
+         bulk_actions(new_records(path, processed.of(path)), str(path.relative_to(logsdir)), index,
+                      processed.key(path), record_ids, resolver),
+         index=index)
+    processed.add(path, record_ids)
+    return len(record_ids)
+
+
+# connects to elasticsearch and creates the index, unless it exists already and is to be kept
+def prepare_index(index: str, override: bool):
+    connections.create_connection(hosts=['localhost'], timeout=20)
+    if override or not Index(name=index).exists():
+        create_index(index=index, override=override)
+    el.WindowsEvent.init(index=index)
+
+
+def watch(logsdir: Path, index: str, override: bool, processed: ProcessedRecords, workers: int,
+          settle_time: float, poll_interval: float = None):
+    prepare_index(index=index, override=override)
+
+    watcher = DirectoryWatcher(logsdir, settle_time=settle_time, poll_interval=poll_interval)
+    logging.info("watching {0} using {1}".format(logsdir, "inotify" if watcher.uses_inotify else "polling"))
+
+    # the records of a log are indexed by only one worker at a time, and not more files than workers are queued
+    running = dict()
+    failures = dict()
+    resolver = SidResolver()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                for key, (path, future) in list(running.items()):
+                    if not future.done():
+                        continue
+                    del running[key]
+                    if future.exception() is not None:
+                        # rotated logs are never changed again, so they would not be reported again by the watcher
+                        failures[key] = failures.get(key, 0) + 1
+                        delay = retry_delay(failures[key])
+                        logging.error("unable to index {0}, retrying in {1:.0f}s: {2}".format(
+                            path, delay, future.exception()))
+                        watcher.retry(path, delay)
+                        continue
+                    failures.pop(key, None)
+                    if future.result() > 0:
+                        logging.info("indexed {0} new records of {1}".format(future.result(), path))
+
+                for path in watcher.ready_files(timeout=1.0):
+                    key = processed.key(path)
+                    if key in running or len(running) >= workers:
+                        watcher.retry(path)
+                        continue
+                    running[key] = (path, pool.submit(index_new_records, path, logsdir, index, processed,
+                                                          resolver))
+        except KeyboardInterrupt:
+            logging.info("waiting for {0} running workers".format(len(running)))
+        finally:
+            watcher.close()
+
 
 def create_index(index: str, override: bool):
     logger = logging.getLogger()
@@ -255,21 +262,34 @@ def create_index(index: str, override: bool):
 
 
 def main():
+    return run(evtxtools.parse_evtx2elasticsearch_arguments())
+
+
+def run(args):
     logger = logging.getLogger()
     logging.getLogger("elasticsearch").setLevel(logging.ERROR)
     coloredlogs.install(
         level='INFO',
         logger=logger,
         fmt="%(levelname)s %(message)s")
-    args = evtxtools.parse_evtx2elasticsearch_arguments()
 
-    evtx_files = set()
-    for f in args.logsdir.iterdir():
-        if f.name.endswith(".evtx"):
-            evtx_files.add(f)
+    if args.watch:
+        try:
+            watch(args.logsdir, index=args.index, override=args.override_index,
+                  processed=ProcessedRecords(args.logsdir, args.state_file),
+                  workers=args.workers, settle_time=args.settle_time, poll_interval=args.poll_interval)
+        except ValueError as e:
+            logger.fatal(str(e))
+            return 1
+        return 0
+
+    # directories and archives are both supported, archive members are not extracted. Directories may also contain
+    # exported events.
+    evtx_files = set(event_files(args.logsdir))
 
     try:
-        evtx2elasticsearch(evtx_files, index=args.index, override=args.override_index)
+        evtx2elasticsearch(evtx_files, index=args.index, override=args.override_index,
+                           deduplicator=EventDeduplicator() if args.dedup else None)
     except ValueError as e:
         logger.fatal(str(e))
         return 1
@@ -0,0 +1,186 @@
+"""
+evtx2sqlite.py
+
+converts evtx files to a SQLite database, using the schema of the db module.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+import sqlite3
+
+import progressbar
+from sqlalchemy import create_engine, func, select
+
+import db
+import evtxtools
+from evtxtools.EventDataIndex import EventDataIndex
+from evtxtools.EventSource import event_files, event_source
+from evtxtools.SimpleWindowsEvent import SimpleWindowsEvent
+
+
+class SqliteLoader:
+    # events are inserted in batches, together with the rows they refer to
+    BATCH_SIZE = 10000
+
+    def __init__(self, connection):
+        self.__connection = connection
+        self.__providers = dict()
+        self.__channels = dict()
+        self.__computers = dict()
+        self.__correlations = dict()
+        self.__related_activity_ids = set()
+        self.__executions = dict()
+        self.__new_rows = {table: list() for table in (db.Provider.__table__, db.Channel.__table__,
+                                                       db.Computer.__table__, db.Correlation.__table__,
+                                                       db.Execution.__table__)}
+        self.__events = list()
+        self.__event_data = list()
+        self.__load_existing_rows()
+
+    # if events are added to an existing database, the ids continue after the existing rows
+    def __load_existing_rows(self):
+        self.__next_ids = dict()
+        for table in list(self.__new_rows.keys()) + [db.Event.__table__, db.EventData.__table__]:
+            max_id = self.__connection.execute(select(func.max(table.c.id))).scalar()
+            self.__next_ids[table] = (max_id or 0) + 1
+
+        for row in self.__connection.execute(db.Provider.__table__.select()):
+            self.__providers[row.name] = row.id
+        for row in self.__connection.execute(db.Channel.__table__.select()):
+            self.__channels[row.name] = row.id
+        for row in self.__connection.execute(db.Computer.__table__.select()):
+            self.__computers[row.name] = row.id
+        for row in self.__connection.execute(db.Correlation.__table__.select()):
+            self.__correlations[row.activityid] = row.id
+            if row.relatedactivityid is not None:
+                self.__related_activity_ids.add(row.relatedactivityid)
+        for row in self.__connection.execute(db.Execution.__table__.select()):
+            self.__executions[(row.process_id, row.thread_id)] = row.id
+
+    def __next_id(self, table) -> int:
+        row_id = self.__next_ids[table]
+        self.__next_ids[table] = row_id + 1
+        return row_id
+
+    # returns the id of a row in one of the lookup tables, and creates the row if it does not exist yet
+    def __lookup(self, cache: dict, table, key, row: dict):
+        if key is None:
+            return None
+        row_id = cache.get(key)
+        if row_id is None:
+            row_id = self.__next_id(table)
+            cache[key] = row_id
+            row['id'] = row_id
+            self.__new_rows[table].append(row)
+        return row_id
+
+    def add(self, swe: SimpleWindowsEvent):
+        activity_id = swe["/System/Correlation/@ActivityID"]
+        related_activity_id = swe["/System/Correlation/@RelatedActivityID"]
+        # related activity ids are unique in the schema
+        if related_activity_id in self.__related_activity_ids:
+            related_activity_id = None
+
+        correlation_id = self.__lookup(self.__correlations, db.Correlation.__table__, activity_id,
+                                       {'activityid': activity_id, 'relatedactivityid': related_activity_id})
+        if correlation_id is not None and related_activity_id is not None:
+            self.__related_activity_ids.add(related_activity_id)
+
+        execution_id = None
+        if swe.process_id is not None and swe.thread_id is not None:
+            execution_id = self.__lookup(self.__executions, db.Execution.__table__,
+                                         (swe.process_id, swe.thread_id),
+                                         {'process_id': swe.process_id, 'thread_id': swe.thread_id})
+
+        event_id = self.__next_id(db.Event.__table__)
+        self.__events.append({
+            'id': event_id,
+            'event_id': swe.event_id,
+            'provider_id': self.__lookup(self.__providers, db.Provider.__table__, swe.provider_name,
+                                         {'name': swe.provider_name, 'guid': swe.provider_guid}),
+            'timecreated': swe.timecreated,
+            'recordid': swe.record_id,
+            'correlation_id': correlation_id,
+            'execution_id': execution_id,
+            'channel_id': self.__lookup(self.__channels, db.Channel.__table__, swe.channel,
+                                        {'name': swe.channel}),
+            'computer_id': self.__lookup(self.__computers, db.Computer.__table__, swe.computer,
+                                         {'name': swe.computer}),
+            'userid': swe["/System/Security/@UserID"]
+        })
+
+        for key, value in (swe.event_data or {}).items():
+            self.__event_data.append({'id': self.__next_id(db.EventData.__table__), 'eventid': event_id,
+                                      'key': key, 'value': value})
+
+        if len(self.__events) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        for table, rows in self.__new_rows.items():
+            if len(rows) > 0:
+                self.__connection.execute(table.insert(), rows)
+                rows.clear()
+        if len(self.__events) > 0:
+            self.__connection.execute(db.Event.__table__.insert(), self.__events)
+            self.__events = list()
+        if len(self.__event_data) > 0:
+            self.__connection.execute(db.EventData.__table__.insert(), self.__event_data)
+            self.__event_data = list()
+
+
+def evtx2sqlite(evtx_files: list, loader: SqliteLoader):
+    for f in evtx_files:
+        bar = progressbar.ProgressBar(prefix="loading " + f.name)
+        iterator = event_source(f).records()
+        n = 0
+        while True:
+            n += 1
+            bar.update(n)
+            try:
+                loader.add(SimpleWindowsEvent(next(iterator)))
+            except StopIteration:
+                break
+            except RuntimeError as e:
+                logging.error(str(e))
+                continue
+        bar.finish()
+    loader.flush()
+
+
+def main():
+    return run(evtxtools.parse_evtx2sqlite_arguments())
+
+
+def run(args):
+    # evtx files and exported events
+    evtx_files = sorted(event_files(args.logsdir))
+
+    engine = create_engine("sqlite:///" + str(args.dbfile))
+    db.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        evtx2sqlite(evtx_files, SqliteLoader(connection))
+
+    # an existing index has already been updated while the events were inserted
+    if args.search_index:
+        connection = sqlite3.connect(str(args.dbfile))
+        try:
+            index = EventDataIndex(connection)
+            if not index.exists:
+                logging.info("building search index")
+                index.create()
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
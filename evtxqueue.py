@@ -0,0 +1,254 @@
+"""
+evtxqueue.py
+
+distributes the parsing of evtx files to workers on several hosts. The
+coordinator splits the files, and large files into ranges of chunks, and
+stores them as tasks in a SQLite database on a shared filesystem. Workers on
+any host which can access this filesystem claim tasks, and either index the
+records in elasticsearch or write them to JSON lines files. Exported events
+(JSON lines or XML) are processed as well, and uncompressed JSON lines are split
+into ranges of bytes.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import orjson
+from evtx import PyEvtxParser
+
+import evtxtools
+from evtxtools.EventSource import event_source, export_format, is_splittable
+from evtxtools.TaskQueue import TaskQueue, Task, split_file, read_chunks, worker_name
+
+
+def records_of(logsdir: Path, task: Task):
+    path = logsdir / task.path
+    if export_format(path.name) is not None:
+        if is_splittable(path):
+            yield from event_source(path, task.first_chunk, task.last_chunk).records()
+        else:
+            yield from event_source(path).records()
+        return
+
+    iterator = PyEvtxParser(read_chunks(path, task.first_chunk, task.last_chunk)).records_json()
+    while True:
+        try:
+            yield next(iterator)
+        except StopIteration:
+            break
+        except RuntimeError as e:
+            logging.error("{0}: {1}".format(task.path, e))
+
+
+# renews the lease of a task while a worker is busy with it, and stores the number of processed records
+class Heartbeat(threading.Thread):
+    def __init__(self, queue_file: Path, task: Task, worker: str, lease_time: float, progress: list):
+        super().__init__(daemon=True)
+        self.__queue_file = queue_file
+        self.__task = task
+        self.__worker = worker
+        self.__lease_time = lease_time
+        self.__progress = progress
+        self.__stopped = threading.Event()
+
+    def run(self):
+        # sqlite connections cannot be shared between threads
+        queue = TaskQueue(self.__queue_file)
+        try:
+            while not self.__stopped.wait(self.__lease_time / 3):
+                if not queue.renew(self.__task, self.__worker, self.__lease_time, len(self.__progress)):
+                    logging.warning("lost the lease of task {0}".format(self.__task.id))
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.__stopped.set()
+        self.join()
+
+
+# writes the records of a task to <task id>.jsonl, in the format of evtx_dump, so that they can be read again like
+# an evtx file. The file is renamed only when it is complete, so that a retried task never leaves a partial file
+# behind.
+def write_jsonl(records, task: Task, output_dir: Path, progress: list) -> int:
+    target = output_dir / "{0}.jsonl".format(task.id)
+    # workers on different hosts may have the same process id
+    temporary = target.with_name(target.name + ".{0}.tmp".format(worker_name().replace(':', '-')))
+    try:
+        with open(temporary, 'wb') as f:
+            for record in records:
+                f.write(orjson.dumps(orjson.loads(record['data'])))
+                f.write(b'\n')
+                progress.append(record['event_record_id'])
+        os.replace(temporary, target)
+    except BaseException:
+        if temporary.exists():
+            temporary.unlink()
+        raise
+    return len(progress)
+
+
+# indexes the records of a task. The ids of the documents depend only on the file and the record ids, so a
+# retried task replaces the documents which have been indexed before.
+def index_records(records, task: Task, index: str, progress: list) -> int:
+    from elasticsearch.helpers import bulk
+    from elasticsearch_dsl import connections
+    from evtx2elasticsearch import bulk_actions
+
+    bulk(connections.get_connection(), bulk_actions(records, task.path, index, task.path, progress), index=index)
+    return len(progress)
+
+
+def work(queue_file: Path, logsdir: Path, output_dir: Path, lease_time: float):
+    queue = TaskQueue(queue_file)
+    worker = worker_name()
+    if logsdir is None:
+        logsdir = Path(queue.get('logsdir'))
+    index = queue.get('index')
+    if output_dir is None:
+        from elasticsearch_dsl import connections
+        connections.create_connection(hosts=['localhost'], timeout=20)
+
+    processed = 0
+    try:
+        while True:
+            task = queue.claim(worker, lease_time)
+            if task is None:
+                # tasks of other workers are claimed again when their leases expire
+                if queue.finished:
+                    break
+                time.sleep(min(lease_time / 3, 10))
+                continue
+
+            progress = list()
+            heartbeat = Heartbeat(queue_file, task, worker, lease_time, progress)
+            heartbeat.start()
+            try:
+                records = records_of(logsdir, task)
+                if output_dir is not None:
+                    count = write_jsonl(records, task, output_dir, progress)
+                else:
+                    count = index_records(records, task, index, progress)
+            except Exception as e:
+                logging.error("task {0} ({1}) failed: {2}".format(task.id, task.path, e))
+                queue.fail(task, worker, str(e))
+                continue
+            finally:
+                heartbeat.stop()
+            if queue.complete(task, worker, count):
+                processed += 1
+            else:
+                logging.warning("task {0} has been claimed by another worker".format(task.id))
+    finally:
+        queue.close()
+    logging.info("{0} completed {1} tasks".format(worker, processed))
+
+
+def coordinate(args) -> int:
+    logsdir = args.logsdir.resolve()
+    queue = TaskQueue(args.queue_file, max_attempts=args.max_attempts)
+    try:
+        # the coordinator can be run again, but the paths of the tasks are relative to the logs directory, and the
+        # records of all tasks go to one index
+        for name, value in (('logsdir', str(logsdir)), ('index', args.index)):
+            previous = queue.get(name)
+            if previous is not None and value is not None and previous != value:
+                logging.fatal("{0} has been created for {1} {2}, not {3}".format(args.queue_file, name, previous, value))
+                return 1
+
+        if args.index is not None:
+            from evtx2elasticsearch import prepare_index
+            try:
+                prepare_index(index=args.index, override=args.override_index)
+            except ValueError as e:
+                logging.fatal(str(e))
+                return 1
+
+        tasks = list()
+        for dirpath, _, filenames in os.walk(logsdir):
+            for filename in sorted(filenames):
+                if filename.lower().endswith('.evtx') or export_format(filename) is not None:
+                    path = Path(dirpath) / filename
+                    tasks.extend((str(path.relative_to(logsdir)), first, last)
+                                 for first, last in split_file(path, args.chunks_per_task))
+
+        queue.set('logsdir', str(logsdir))
+        if args.index is not None:
+            queue.set('index', args.index)
+        added = queue.add_tasks(tasks)
+    finally:
+        queue.close()
+    logging.info("added {0} tasks to {1}, {2} tasks have already been queued".format(
+        added, args.queue_file, len(tasks) - added))
+    return 0
+
+
+def range_str(path: str, first: int, last: int) -> str:
+    return "%s %d-%d" % ('bytes' if export_format(path) is not None else 'chunks', first, last - 1)
+
+
+def status(args) -> int:
+    queue = TaskQueue(args.queue_file)
+    try:
+        s = queue.status()
+    finally:
+        queue.close()
+    for state in ('pending', 'leased', 'done', 'failed'):
+        count, records = s['states'].get(state, (0, 0))
+        print("%-8s %8d tasks %12d records" % (state, count, records or 0))
+    for worker, path, first_chunk, last_chunk, records, lease_expires in s['workers']:
+        print("%s: %s %s, %d records, lease expires in %ds" % (
+            worker, path, range_str(path, first_chunk, last_chunk), records, lease_expires - time.time()))
+    for path, first_chunk, last_chunk, attempts, error in s['failed']:
+        print("failed after %d attempts: %s %s: %s" % (attempts, path, range_str(path, first_chunk, last_chunk), error))
+    return 0
+
+
+def main():
+    return run(evtxtools.parse_evtxqueue_arguments())
+
+
+def run(args):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.queue_command == 'coordinator':
+        return coordinate(args)
+    if args.queue_command == 'status':
+        return status(args)
+
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        queue = TaskQueue(args.queue_file)
+        index = queue.get('index')
+        queue.close()
+        if index is None:
+            logging.fatal("the coordinator has not been given an --index, use --jsonl instead")
+            return 1
+    workers = [multiprocessing.Process(target=work,
+                                       args=(args.queue_file, args.logsdir, args.output_dir, args.lease_time))
+               for _ in range(args.processes)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return 0 if all(w.exitcode == 0 for w in workers) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
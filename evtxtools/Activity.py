@@ -1,11 +1,15 @@
 import functools
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
 
 from evtxtools.ActivityChange import ActivityChange
 from evtxtools.EventDescriptor import EventDescriptor
 from evtxtools.LogonType import EventType
 from evtxtools.WindowsEvent import WindowsEvent
 
+if TYPE_CHECKING:
+    from evtxtools.SidResolver import SidResolver
+
 
 @functools.total_ordering
 class Activity:
@@ -16,11 +20,15 @@ class Activity:
         self.__begin_event = None
         self.__end_event = None
         self.__events = dict()
+        # activities are compared by their first timestamp, e.g. by sorted() and heapq.merge()
+        self.__first_timestamp = None
         self.__activity_id = None
         self.__hostname = hostname
 
     def add_event(self, event: WindowsEvent):
         self.__events[event.timestamp] = event
+        if self.__first_timestamp is None or event.timestamp < self.__first_timestamp:
+            self.__first_timestamp = event.timestamp
         if self.__activity_id is None:
             self.__activity_id = event.activity_id
         else:
@@ -33,6 +41,24 @@ class Activity:
             if self.__end_event is None or event.timestamp > self.__end_event.timestamp:
                 self.__end_event = event
 
+    # merges the events of another activity (with a different activity id) into this activity,
+    # this activity's begin event is kept
+    def absorb(self, other):
+        for timestamp, event in other.__events.items():
+            self.__events.setdefault(timestamp, event)
+        if other.__first_timestamp is not None and \
+                (self.__first_timestamp is None or other.__first_timestamp < self.__first_timestamp):
+            self.__first_timestamp = other.__first_timestamp
+        if self.__begin_event is None:
+            self.__begin_event = other.__begin_event
+        if other.__end_event is not None:
+            if self.__end_event is None or other.__end_event.timestamp > self.__end_event.timestamp:
+                self.__end_event = other.__end_event
+
+    @property
+    def begin_event(self) -> WindowsEvent:
+        return self.__begin_event
+
     @property
     def logged_out(self) -> bool:
         return self.__begin_timestamp is not None
@@ -42,6 +68,9 @@ class Activity:
         return self.__end_timestamp is not None
 
     def __str__(self):
+        return self.describe()
+
+    def describe(self, resolver: 'SidResolver' = None) -> str:
         if self.__hostname:
             hostname = " {" + self.__hostname + "}"
         else:
@@ -52,7 +81,7 @@ class Activity:
             return "%s%s: %s" % (
                 event.timestamp,
                 hostname,
-                str(event)
+                event.describe(resolver)
             )
 
 
@@ -62,17 +91,17 @@ class Activity:
         return "%s%s: %s (ended %s (%s))" % (
             first_event.timestamp,
             hostname,
-            str(first_event),
+            first_event.describe(resolver),
             last_event.timestamp,
             last_event.timestamp - first_event.timestamp
         )
 
-    def latex_str(self):
+    def latex_str(self, resolver: 'SidResolver' = None):
         if len(self.__events) == 1:
             event = next(iter(self.__events.values()))
             return "\\mmsrow{\\ts{%s} & & & %s}" % (
                 event.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                event.latex_str()
+                event.latex_str(resolver)
             )
 
         timestamps = list(sorted(self.__events.keys()))
@@ -86,7 +115,7 @@ class Activity:
             first_event.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
             last_event.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
             td,
-            first_event.latex_str()
+            first_event.latex_str(resolver)
         )
 
     @property
@@ -133,6 +162,40 @@ class Activity:
     def activity_id(self):
         return self.__activity_id
 
+    @property
+    def first_timestamp(self):
+        return self.__first_timestamp
+
+    @property
+    def session_begin(self) -> datetime:
+        if self.__begin_event is not None:
+            return self.__begin_event.timestamp
+        return self.first_timestamp
+
+    # returns datetime.max for sessions which have been started, but not ended
+    @property
+    def session_end(self) -> datetime:
+        if self.__end_event is not None:
+            return self.__end_event.timestamp
+        if self.__begin_event is not None:
+            return datetime.max
+        return max(self.__events.keys())
+
+    # the computer which has logged the events, even if another hostname is displayed
+    @property
+    def computer(self) -> str:
+        return next(iter(self.__events.values())).computer
+
+    @property
+    def computer_code(self) -> int:
+        return next(iter(self.__events.values())).computer_code
+
+    @property
+    def hostname(self) -> str:
+        if self.__hostname:
+            return self.__hostname
+        return next(iter(self.__events.values())).computer
+
     def __eq__(self, other):
         if self.logged_in != other.logged_in:
             return False
@@ -148,6 +211,4 @@ class Activity:
     def __lt__(self, other):
         assert len(self.__events) > 0
         assert len(other.__events) > 0
-        my_first_event = self.__events[sorted(self.__events.keys())[0]]
-        your_first_event = other.__events[sorted(other.__events.keys())[-1]]
-        return my_first_event.timestamp < your_first_event.timestamp
\ No newline at end of file
+        return self.first_timestamp < other.first_timestamp
\ No newline at end of file
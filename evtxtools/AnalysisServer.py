@@ -0,0 +1,200 @@
+import logging
+import os
+import socketserver
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import orjson
+
+from evtxtools.EventStore import EventStore, AnalysisOptions
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Query:
+    def __init__(self, query_string: str):
+        self.__values = {key: values[-1] for key, values in parse_qs(query_string).items()}
+
+    def str(self, name: str, default: str = None) -> str:
+        return self.__values.get(name, default)
+
+    def flag(self, name: str) -> bool:
+        return self.__values.get(name, 'false').lower() in ('', '1', 'true', 'yes')
+
+    def int(self, name: str, default: int = None) -> int:
+        value = self.__values.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise BadRequest("{0} must be a number".format(name))
+
+    def timestamp(self, name: str) -> datetime:
+        value = self.__values.get(name)
+        if value is None:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise BadRequest("{0} must be an ISO timestamp".format(name))
+
+    def seconds(self, name: str) -> timedelta:
+        value = self.int(name)
+        return None if value is None else timedelta(seconds=value)
+
+
+# answers the queries of the clients, all responses are JSON objects:
+#
+#   /timeline  the rows which are printed by logins.py
+#   /sessions  the sessions which were open at a timestamp ('at') or in a time window ('from', 'to')
+#   /events    the decoded events, filtered by time, event id, computer, activity id or text
+#   /status    the contents of the event store
+#
+# 'logs' selects an evidence directory or archive, relative to the root directory of the server.
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    server_version = "evtxtools"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        handler = {
+            '/timeline': self.timeline,
+            '/sessions': self.sessions,
+            '/events': self.events,
+            '/status': self.status,
+        }.get(url.path)
+        if handler is None:
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': "unknown path {0}".format(url.path)})
+            return
+        try:
+            self.send_json(HTTPStatus.OK, handler(Query(url.query)))
+        except BadRequest as e:
+            self.send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            logging.exception("unable to answer {0}".format(self.path))
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+
+    def send_json(self, status: HTTPStatus, response: dict):
+        body = orjson.dumps(response, default=str)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # clients of a unix socket have no address
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logging.debug("%s %s" % (self.address_string(), format % args))
+
+    # evidences must be stored below the root directory of the server
+    def evidence_path(self, query: Query) -> Path:
+        root = self.server.evidence_root
+        path = (root / query.str('logs', '')).resolve()
+        if path != root and root not in path.parents:
+            raise BadRequest("logs must be below {0}".format(root))
+        if not path.exists():
+            raise BadRequest("{0} does not exist".format(path))
+        return path
+
+    def analysis(self, query: Query):
+        options = AnalysisOptions(from_date=query.timestamp('from'),
+                                  to_date=query.timestamp('to'),
+                                  include_local_system=query.flag('include_local_system'),
+                                  include_anonymous=query.flag('include_anonymous'),
+                                  failed_logon_window=query.seconds('aggregate_failures'),
+                                  rdp_tolerance=query.seconds('stitch_rdp'),
+                                  process_trees=query.flag('process_tree'),
+                                  hostname=query.str('hostname'))
+        return self.server.store.analysis(self.evidence_path(query), options)
+
+    def timeline(self, query: Query) -> dict:
+        return {'rows': self.analysis(query).lines(enable_latex=query.flag('latex'))}
+
+    def sessions(self, query: Query) -> dict:
+        at = query.timestamp('at')
+        begin, end = query.timestamp('begin'), query.timestamp('end')
+        session_index = self.analysis(query).session_index
+        if at is not None:
+            sessions = session_index.at(at, query.str('host'))
+        elif begin is not None or end is not None:
+            sessions = session_index.overlapping(begin or datetime.min, end or datetime.max, query.str('host'))
+        else:
+            sessions = session_index.sessions
+        latex = query.flag('latex')
+        return {'sessions': [{
+            'begin': s.begin,
+            'end': None if s.end == datetime.max else s.end,
+            'hostname': s.hostname,
+            'activity_id': s.activity_id,
+            'text': s.latex if latex else s.text
+        } for s in sessions]}
+
+    def events(self, query: Query) -> dict:
+        event_ids = None
+        if query.str('event_id') is not None:
+            try:
+                event_ids = set(int(i) for i in query.str('event_id').split(','))
+            except ValueError:
+                raise BadRequest("event_id must be a comma separated list of numbers")
+        computer = query.str('computer')
+        activity_id = query.str('activity_id')
+        text = query.str('contains')
+        limit = query.int('limit', 1000)
+
+        result = list()
+        evidence = self.server.store.evidence(self.evidence_path(query))
+        for event in evidence.events(query.timestamp('from'), query.timestamp('to')):
+            if event_ids is not None and event.event_id not in event_ids:
+                continue
+            if computer is not None and event.computer != computer:
+                continue
+            if activity_id is not None and event.activity_id != activity_id:
+                continue
+            if text is not None and not any(text in str(v) for v in event.event_data.values()):
+                continue
+            result.append({
+                'timestamp': event.timestamp,
+                'event_id': event.event_id,
+                'computer': event.computer,
+                'activity_id': event.activity_id,
+                'description': str(event),
+                'event_data': event.event_data
+            })
+            if len(result) >= limit:
+                break
+        return {'events': result}
+
+    def status(self, query: Query) -> dict:
+        return self.server.store.statistics()
+
+
+class AnalysisHTTPServer(ThreadingHTTPServer):
+    def __init__(self, address, store: EventStore, evidence_root: Path):
+        self.store = store
+        self.evidence_root = evidence_root.resolve()
+        super().__init__(address, AnalysisRequestHandler)
+
+
+class AnalysisUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, store: EventStore, evidence_root: Path):
+        self.store = store
+        self.evidence_root = evidence_root.resolve()
+        if socket_path.is_socket():
+            socket_path.unlink()
+        # only the user who started the server may connect. The socket is created with these permissions, so that
+        # no other user can connect before they would have been changed
+        umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), AnalysisRequestHandler)
+        finally:
+            os.umask(umask)
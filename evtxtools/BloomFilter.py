@@ -0,0 +1,54 @@
+import hashlib
+import math
+import mmap
+import tempfile
+
+
+# bloom filter whose bits are stored in a memory mapped file, so that it can hold billions of keys
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float, tmp_dir: str = None):
+        self.__bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.__hashes = max(1, round(self.__bits / capacity * math.log(2)))
+        self.__file = tempfile.TemporaryFile(dir=tmp_dir)
+        self.__file.truncate((self.__bits + 7) // 8)
+        self.__mapping = mmap.mmap(self.__file.fileno(), 0)
+        self.__count = 0
+
+    def __positions(self, key: bytes):
+        # double hashing, see Kirsch and Mitzenmacher, "Less Hashing, Same Performance"
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.__bits for i in range(self.__hashes)]
+
+    # adds the key and returns True if it had (probably) been added before
+    def add(self, key: bytes) -> bool:
+        found = True
+        mapping = self.__mapping
+        for position in self.__positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            value = mapping[byte]
+            if not value & mask:
+                mapping[byte] = value | mask
+                found = False
+        if not found:
+            self.__count += 1
+        return found
+
+    def __contains__(self, key: bytes) -> bool:
+        mapping = self.__mapping
+        for position in self.__positions(key):
+            if not mapping[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def size(self) -> int:
+        return len(self.__mapping)
+
+    def close(self):
+        self.__mapping.close()
+        self.__file.close()
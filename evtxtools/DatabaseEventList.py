@@ -0,0 +1,86 @@
+import itertools
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from evtxtools.EventDescriptor import EVENT_DESCRIPTORS
+from evtxtools.WindowsEvent import WindowsEvent
+
+# the queries filter by event id, channel and time, and join the event data by event
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_event_descriptor ON event (event_id, channel_id, timecreated)",
+    "CREATE INDEX IF NOT EXISTS ix_event_data_event ON event_data (eventid)",
+]
+
+# the event ids and channels are passed as a table of (event_id, channel) pairs, so that only events of
+# the channel of their descriptor are returned
+QUERY = """
+WITH descriptor(event_id, channel) AS (VALUES {descriptors})
+SELECT event.id, event.event_id, event.timecreated, channel.name, computer.name, correlation.activityid,
+       event_data.key, event_data.value
+FROM descriptor
+JOIN channel ON channel.name = descriptor.channel
+JOIN event ON event.event_id = descriptor.event_id AND event.channel_id = channel.id
+LEFT JOIN computer ON computer.id = event.computer_id
+LEFT JOIN correlation ON correlation.id = event.correlation_id
+LEFT JOIN event_data ON event_data.eventid = event.id
+WHERE event.timecreated >= ? AND event.timecreated <= ?
+ORDER BY event.timecreated, event.id
+"""
+
+
+# reads the events which have been stored by evtx2sqlite.py. Rows are streamed from the cursor, so that
+# only the event data of the current event is kept in memory.
+class DatabaseEventList:
+    def __init__(self, dbfile: Path, included_event_ids: set, from_date: datetime, to_date: datetime):
+        self.__connection = sqlite3.connect(str(dbfile))
+        self.__included_event_ids = included_event_ids
+        self.__from_date = from_date
+        self.__to_date = to_date
+        self.__create_indexes()
+
+    def __create_indexes(self):
+        try:
+            for statement in INDEXES:
+                self.__connection.execute(statement)
+            self.__connection.commit()
+        except sqlite3.OperationalError as e:
+            # read only databases can still be queried, only slower
+            logging.warning("unable to create indexes: {0}".format(e))
+
+    # timestamps are stored by sqlalchemy as 'YYYY-MM-DD HH:MM:SS.ffffff', which can be compared as strings
+    @staticmethod
+    def timestamp_str(timestamp: datetime) -> str:
+        return timestamp.isoformat(sep=' ', timespec='microseconds')
+
+    def __iter__(self):
+        descriptors = [(event_id, EVENT_DESCRIPTORS[event_id].log_source.value)
+                       for event_id in sorted(self.__included_event_ids) if event_id in EVENT_DESCRIPTORS]
+        if len(descriptors) == 0:
+            return
+        query = QUERY.format(descriptors=", ".join(["(?, ?)"] * len(descriptors)))
+        parameters = list(itertools.chain.from_iterable(descriptors))
+        parameters.append(self.timestamp_str(self.__from_date or datetime.min))
+        parameters.append(self.timestamp_str(self.__to_date or datetime.max))
+
+        cursor = self.__connection.execute(query, parameters)
+        try:
+            for row_id, rows in itertools.groupby(cursor, key=lambda r: r[0]):
+                first = next(rows)
+                _, event_id, timecreated, channel, computer, activity_id, key, value = first
+                event_data = dict()
+                if key is not None:
+                    event_data[key] = value
+                for row in rows:
+                    event_data[row[6]] = row[7]
+                try:
+                    yield WindowsEvent.from_database(event_id, datetime.fromisoformat(timecreated), channel,
+                                                     computer, activity_id, event_data, self.__included_event_ids)
+                except WindowsEvent.IgnoreThisEvent:
+                    pass
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.__connection.close()
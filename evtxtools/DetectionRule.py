@@ -0,0 +1,160 @@
+import bisect
+from datetime import timedelta
+
+from evtxtools.LogSource import LogSource
+from evtxtools.WindowsEvent import WindowsEvent
+
+
+class DetectionRule:
+    def __init__(self, name: str, log_source: LogSource, event_ids: set, description: str, condition=None):
+        self.__name = name
+        self.__log_source = log_source
+        self.__event_ids = frozenset(event_ids)
+        self.__description = description
+        self.__condition = condition
+        assert len(self.__event_ids) > 0
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def log_source(self) -> LogSource:
+        return self.__log_source
+
+    @property
+    def event_ids(self) -> frozenset:
+        return self.__event_ids
+
+    @property
+    def description(self) -> str:
+        return self.__description
+
+    def matches(self, event: WindowsEvent) -> bool:
+        return self.__condition is None or self.__condition(event)
+
+
+def event_data_contains(key: str, *patterns: str):
+    patterns = tuple(p.lower() for p in patterns)
+
+    def condition(event: WindowsEvent) -> bool:
+        value = event.event_data.get(key)
+        if value is None:
+            return False
+        value = str(value).lower()
+        return any(p in value for p in patterns)
+    return condition
+
+
+def event_data_equals(key: str, expected):
+    def condition(event: WindowsEvent) -> bool:
+        return event.event_data.get(key) == expected
+    return condition
+
+
+# matches as soon as `count` events with the same value of `key` have been seen within `window`. Events need not
+# arrive in time order, because RawEventList decodes several files in parallel: an event which arrives late is
+# counted in the windows of the events which have arrived before it. Conditions like this have state, so every
+# RuleEngine needs its own instance, see detection_rules().
+class RepeatedWithin:
+    def __init__(self, key: str, count: int, window: timedelta):
+        self.__key = key
+        self.__count = count
+        self.__window = window
+        # events which are older than the newest event of their key by more than this are assumed to be complete
+        self.__horizon = 2 * window
+        self.__seen = dict()
+        self.__newest = None
+        self.__next_eviction = None
+
+    def __call__(self, event: WindowsEvent) -> bool:
+        timestamp = event.timestamp
+        timestamps = self.__seen.setdefault(event.event_data.get(self.__key), list())
+        bisect.insort(timestamps, timestamp)
+        if timestamps[0] < timestamps[-1] - self.__horizon:
+            del timestamps[:bisect.bisect_left(timestamps, timestamps[-1] - self.__horizon)]
+
+        # the windows ending at this event and at all later events which it belongs to have been changed
+        largest = 0
+        position = bisect.bisect_left(timestamps, timestamp)
+        while position < len(timestamps) and timestamps[position] <= timestamp + self.__window:
+            first = bisect.bisect_left(timestamps, timestamps[position] - self.__window)
+            largest = max(largest, position - first + 1)
+            position += 1
+
+        self.__evict(timestamp)
+        return largest == self.__count
+
+    # values which have not been seen for a while are forgotten, e.g. the addresses of a scan
+    def __evict(self, timestamp):
+        if self.__newest is None or timestamp > self.__newest:
+            self.__newest = timestamp
+        if self.__next_eviction is None:
+            self.__next_eviction = self.__newest + self.__window
+        if self.__newest < self.__next_eviction:
+            return
+        oldest = self.__newest - self.__horizon
+        self.__seen = {value: timestamps for value, timestamps in self.__seen.items() if timestamps[-1] >= oldest}
+        self.__next_eviction = self.__newest + self.__window
+
+
+# returns new instances of the built-in rules
+def detection_rules() -> list:
+    return [
+        DetectionRule(name='failed-logon',
+                      log_source=LogSource.Security,
+                      event_ids={4625},
+                      description='failed logon'),
+
+        DetectionRule(name='brute-force',
+                      log_source=LogSource.Security,
+                      event_ids={4625},
+                      description='10 failed logons from the same address within 5 minutes',
+                      condition=RepeatedWithin('IpAddress', 10, timedelta(minutes=5))),
+
+        DetectionRule(name='explicit-credentials',
+                      log_source=LogSource.Security,
+                      event_ids={4648},
+                      description='logon using explicit credentials'),
+
+        DetectionRule(name='rdp-logon',
+                      log_source=LogSource.Security,
+                      event_ids={4624},
+                      description='RemoteInteractive logon',
+                      condition=event_data_equals('LogonType', 'RemoteInteractive')),
+
+        DetectionRule(name='new-service',
+                      log_source=LogSource.System,
+                      event_ids={7045},
+                      description='new service installed'),
+
+        DetectionRule(name='suspicious-service-image',
+                      log_source=LogSource.System,
+                      event_ids={7045},
+                      description='new service runs a shell or a binary from a user writable directory',
+                      condition=event_data_contains('ImagePath', 'cmd.exe', 'powershell', '%comspec%', 'rundll32',
+                                                    'mshta', '\\temp\\', '\\appdata\\', '\\users\\public\\')),
+
+        DetectionRule(name='powershell-encoded-command',
+                      log_source=LogSource.Windows_PowerShell,
+                      event_ids={400},
+                      description='PowerShell started with an encoded command',
+                      condition=event_data_contains('HostApplication', ' -enc', ' -e ', 'frombase64string')),
+
+        DetectionRule(name='powershell-download-cradle',
+                      log_source=LogSource.Windows_PowerShell,
+                      event_ids={400},
+                      description='PowerShell downloads content from the network',
+                      condition=event_data_contains('HostApplication', 'downloadstring', 'downloadfile',
+                                                    'invoke-webrequest', 'net.webclient', 'start-bitstransfer')),
+
+        DetectionRule(name='rdp-connection-failed',
+                      log_source=LogSource.Microsoft_Windows_RemoteDesktopServices_RdpCoreTS_Operational,
+                      event_ids={140},
+                      description='failed RDP connection'),
+
+        DetectionRule(name='smb-authentication-failed',
+                      log_source=LogSource.Microsoft_Windows_SmbServer_Security,
+                      event_ids={551},
+                      description='failed SMB authentication'),
+    ]
@@ -0,0 +1,214 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+# seconds to wait before a file is processed again after a failure, doubled after every failure
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+
+
+def is_evtx_file(name: str) -> bool:
+    return name.lower().endswith('.evtx')
+
+
+def retry_delay(failures: int) -> float:
+    # the exponent is limited, so that a file which keeps failing does not overflow the delay
+    return min(RETRY_DELAY * 2 ** min(failures - 1, 16), MAX_RETRY_DELAY)
+
+
+# reports changed files using inotify(7), which is called using ctypes
+class InotifyBackend:
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.__libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.__libc, 'inotify_init1'):
+            raise OSError("inotify is not supported")
+        self.__fd = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.__directories = dict()
+        self.__add_tree(root)
+
+    def __add_watch(self, directory: Path):
+        wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            logging.warning("unable to watch {0}: {1}".format(directory, os.strerror(ctypes.get_errno())))
+            return
+        self.__directories[wd] = directory
+
+    # returns all evtx files below the directory, which have been created before the watch has been added
+    def __add_tree(self, root: Path) -> list:
+        files = list()
+        for directory, _, filenames in os.walk(root):
+            self.__add_watch(Path(directory))
+            files.extend(Path(directory) / f for f in filenames if is_evtx_file(f))
+        return files
+
+    # returns the changed evtx files, and None if events have been lost and all files must be checked
+    def changes(self, timeout: float) -> list:
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return list()
+        try:
+            buffer = os.read(self.__fd, 65536)
+        except BlockingIOError:
+            return list()
+
+        changed = list()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self.__directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                # files can be written to a new directory before it is watched
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.extend(self.__add_tree(path))
+            elif is_evtx_file(path.name):
+                changed.append(path)
+        return changed
+
+    def close(self):
+        os.close(self.__fd)
+
+
+# reports changed files by comparing the size and modification time of all files
+class PollingBackend:
+    def __init__(self, root: Path, interval: float):
+        self.__root = root
+        self.__interval = interval
+        self.__known = dict()
+        self.__next_scan = 0
+
+    def __scan(self) -> list:
+        changed = list()
+        current = dict()
+        for directory, _, filenames in os.walk(self.__root):
+            for f in filter(is_evtx_file, filenames):
+                path = Path(directory) / f
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                current[path] = (st.st_size, st.st_mtime_ns)
+                if self.__known.get(path) != current[path]:
+                    changed.append(path)
+        self.__known = current
+        return changed
+
+    def changes(self, timeout: float) -> list:
+        delay = self.__next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return list()
+        if delay > 0:
+            time.sleep(delay)
+        self.__next_scan = time.monotonic() + self.__interval
+        return self.__scan()
+
+    def close(self):
+        pass
+
+
+# watches a directory tree for new or changed evtx files. Files are written by agents while they are watched,
+# so a file is reported only if it has not been changed and its size is the same for `settle_time` seconds.
+class DirectoryWatcher:
+    def __init__(self, root: Path, settle_time: float = 5.0, poll_interval: float = None):
+        self.__root = root
+        self.__settle_time = settle_time
+        self.__pending = dict()
+
+        self.__backend = None
+        if poll_interval is None:
+            try:
+                self.__backend = InotifyBackend(root)
+            except (OSError, AttributeError) as e:
+                logging.warning("inotify is not available, falling back to polling: {0}".format(e))
+                poll_interval = 5.0
+        if self.__backend is None:
+            self.__backend = PollingBackend(root, poll_interval)
+
+        # existing files are reported as well, records which have already been processed are skipped later
+        self.__rescan()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return isinstance(self.__backend, InotifyBackend)
+
+    def __rescan(self):
+        for directory, _, filenames in os.walk(self.__root):
+            for f in filter(is_evtx_file, filenames):
+                self.__changed(Path(directory) / f)
+
+    def __changed(self, path: Path):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            self.__pending.pop(path, None)
+            return
+        self.__pending[path] = (time.monotonic(), size)
+
+    # waits up to `timeout` seconds for changes, and returns the files which have settled
+    def ready_files(self, timeout: float) -> list:
+        if len(self.__pending) > 0:
+            timeout = min(timeout, self.__settle_time)
+        changes = self.__backend.changes(timeout)
+        if changes is None:
+            logging.warning("inotify queue overflow, checking all files")
+            self.__rescan()
+        else:
+            for path in changes:
+                self.__changed(path)
+
+        ready = list()
+        now = time.monotonic()
+        for path, (changed, size) in list(self.__pending.items()):
+            if now - changed < self.__settle_time:
+                continue
+            try:
+                current_size = path.stat().st_size
+            except FileNotFoundError:
+                del self.__pending[path]
+                continue
+            if current_size != size:
+                # the file is still being written, but no event has been reported yet
+                self.__pending[path] = (now, current_size)
+                continue
+            del self.__pending[path]
+            ready.append(path)
+        return ready
+
+    # files which could not be processed now are reported again after `delay` seconds
+    def retry(self, path: Path, delay: float = 0):
+        try:
+            self.__pending[path] = (time.monotonic() - self.__settle_time + delay, path.stat().st_size)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self.__backend.close()
@@ -0,0 +1,121 @@
+import logging
+import sqlite3
+
+# values of these keys are searched for fragments (e.g. of a command line), all other values for words
+PATH_KEYS = [
+    'CommandLine', 'ParentCommandLine', 'ProcessName', 'NewProcessName', 'ParentProcessName', 'Application',
+    'Image', 'ParentImage', 'ImagePath', 'ServiceFileName', 'TargetFilename', 'ObjectName', 'Path',
+    'ScriptBlockText', 'HostApplication',
+]
+
+SEARCH_QUERY = """
+SELECT event.timecreated, channel.name, event.event_id, event.recordid, computer.name,
+       event_data.key, event_data.value
+FROM {source}
+JOIN event_data ON event_data.id = {table}.rowid
+JOIN event ON event.id = event_data.eventid
+LEFT JOIN channel ON channel.id = event.channel_id
+LEFT JOIN computer ON computer.id = event.computer_id
+WHERE {condition}
+ORDER BY event.timecreated, event.id
+LIMIT ?
+"""
+
+
+# full text index over the values of the event_data table of a database which has been created by evtx2sqlite.py.
+# All values are indexed by words in event_data_fts, and the values of PATH_KEYS are indexed by trigrams in
+# event_data_trigram, which allows to search for any fragment of at least three characters. Both tables
+# read the values from event_data, and are kept up to date by triggers if events are appended later.
+class EventDataIndex:
+    def __init__(self, connection: sqlite3.Connection):
+        self.__connection = connection
+
+    def __has_table(self, name: str) -> bool:
+        return self.__connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                         (name,)).fetchone() is not None
+
+    @property
+    def exists(self) -> bool:
+        return self.__has_table('event_data_fts')
+
+    @property
+    def has_trigrams(self) -> bool:
+        return self.__has_table('event_data_trigram')
+
+    # builds the index over all existing rows, which is much faster than indexing the rows while they are inserted
+    def create(self):
+        path_keys = ", ".join("'%s'" % k for k in PATH_KEYS)
+        c = self.__connection
+        c.execute("CREATE VIRTUAL TABLE event_data_fts USING fts5(value, content='event_data', content_rowid='id')")
+        c.execute("INSERT INTO event_data_fts(event_data_fts) VALUES ('rebuild')")
+        c.execute("INSERT INTO event_data_fts(event_data_fts) VALUES ('optimize')")
+        c.executescript("""
+            CREATE TRIGGER event_data_fts_insert AFTER INSERT ON event_data BEGIN
+                INSERT INTO event_data_fts(rowid, value) VALUES (new.id, new.value);
+            END;
+            CREATE TRIGGER event_data_fts_delete AFTER DELETE ON event_data BEGIN
+                INSERT INTO event_data_fts(event_data_fts, rowid, value) VALUES ('delete', old.id, old.value);
+            END;
+            CREATE TRIGGER event_data_fts_update AFTER UPDATE ON event_data BEGIN
+                INSERT INTO event_data_fts(event_data_fts, rowid, value) VALUES ('delete', old.id, old.value);
+                INSERT INTO event_data_fts(rowid, value) VALUES (new.id, new.value);
+            END;
+        """)
+
+        try:
+            c.execute("CREATE VIRTUAL TABLE event_data_trigram "
+                      "USING fts5(value, content='event_data', content_rowid='id', tokenize='trigram')")
+        except sqlite3.OperationalError as e:
+            # the trigram tokenizer is available since SQLite 3.34
+            logging.warning("unable to create trigram index, fragments are searched without index: {0}".format(e))
+        else:
+            c.execute("INSERT INTO event_data_trigram(rowid, value) "
+                      "SELECT id, value FROM event_data WHERE key IN ({0})".format(path_keys))
+            c.execute("INSERT INTO event_data_trigram(event_data_trigram) VALUES ('optimize')")
+            c.executescript("""
+                CREATE TRIGGER event_data_trigram_insert AFTER INSERT ON event_data
+                WHEN new.key IN ({0}) BEGIN
+                    INSERT INTO event_data_trigram(rowid, value) VALUES (new.id, new.value);
+                END;
+                CREATE TRIGGER event_data_trigram_delete AFTER DELETE ON event_data
+                WHEN old.key IN ({0}) BEGIN
+                    INSERT INTO event_data_trigram(event_data_trigram, rowid, value)
+                    VALUES ('delete', old.id, old.value);
+                END;
+                CREATE TRIGGER event_data_trigram_update AFTER UPDATE ON event_data
+                WHEN old.key IN ({0}) OR new.key IN ({0}) BEGIN
+                    INSERT INTO event_data_trigram(event_data_trigram, rowid, value)
+                    SELECT 'delete', old.id, old.value WHERE old.key IN ({0});
+                    INSERT INTO event_data_trigram(rowid, value)
+                    SELECT new.id, new.value WHERE new.key IN ({0});
+                END;
+            """.format(path_keys))
+        c.commit()
+
+    # searches the words of text as a phrase. With query=True, text is passed to FTS5 as it is, which allows to
+    # use its query syntax (e.g. 'mimikatz OR procdump'). With fragment=True, text is searched as a part of the
+    # values of PATH_KEYS.
+    def search(self, text: str, key: str = None, fragment: bool = False, query: bool = False, limit: int = 100):
+        parameters = list()
+        if fragment and not self.has_trigrams:
+            source, table = "event_data AS matches", "matches"
+            condition = "matches.key IN ({0}) AND matches.value LIKE ? ESCAPE '\\'".format(
+                ", ".join("?" * len(PATH_KEYS)))
+            parameters.extend(PATH_KEYS)
+            parameters.append('%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        else:
+            source = table = 'event_data_trigram' if fragment else 'event_data_fts'
+            condition = "{0} MATCH ?".format(table)
+            parameters.append(text if query else '"' + text.replace('"', '""') + '"')
+
+        if key is not None:
+            condition += " AND event_data.key = ?"
+            parameters.append(key)
+        parameters.append(limit)
+
+        cursor = self.__connection.execute(SEARCH_QUERY.format(source=source, table=table, condition=condition),
+                                           parameters)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import re
+
+from evtxtools.BloomFilter import BloomFilter
+
+COMPUTER_PATTERN = re.compile(r'"Computer":\s*"((?:[^"\\]|\\.)*)"')
+CHANNEL_PATTERN = re.compile(r'"Channel":\s*"((?:[^"\\]|\\.)*)"')
+
+
+# detects events which have already been read from another file, e.g. from an archived log, a volume shadow copy
+# or from ForwardedEvents. Raw records are checked, so that duplicates do not need to be decoded.
+class EventDeduplicator:
+    # number of keys held in memory before switching to a bloom filter
+    MAX_KEYS = 20_000_000
+
+    def __init__(self, max_keys: int = MAX_KEYS, capacity: int = 1_000_000_000, error_rate: float = 1e-5,
+                 tmp_dir: str = None):
+        self.__max_keys = max_keys
+        self.__capacity = capacity
+        self.__error_rate = error_rate
+        self.__tmp_dir = tmp_dir
+        # keys are stored as 64 bit integers, which needs much less memory than the strings they are made of
+        self.__keys = set()
+        self.__bloom_filter = None
+        self.__records = 0
+        self.__duplicates = 0
+
+    @staticmethod
+    def record_key(record: dict) -> bytes:
+        data = record['data']
+        computer = COMPUTER_PATTERN.search(data)
+        channel = CHANNEL_PATTERN.search(data)
+        record_id = record.get('event_record_id')
+        if computer is None or channel is None or record_id is None:
+            # without an identity, events are compared by their content
+            return b'\1' + data.encode('utf-8')
+        return '\0{computer}\0{channel}\0{record_id}'.format(
+            computer=computer.group(1).lower(), channel=channel.group(1), record_id=record_id).encode('utf-8')
+
+    def is_duplicate(self, record: dict) -> bool:
+        self.__records += 1
+        key = hashlib.blake2b(self.record_key(record), digest_size=8).digest()
+
+        if self.__bloom_filter is not None:
+            duplicate = self.__bloom_filter.add(key)
+        else:
+            key_value = int.from_bytes(key, 'little')
+            duplicate = key_value in self.__keys
+            if not duplicate:
+                self.__keys.add(key_value)
+                if len(self.__keys) > self.__max_keys:
+                    self.__switch_to_bloom_filter()
+
+        if duplicate:
+            self.__duplicates += 1
+        return duplicate
+
+    def __switch_to_bloom_filter(self):
+        logging.info("more than {count} distinct events, using a bloom filter for deduplication".format(
+            count=self.__max_keys))
+        self.__bloom_filter = BloomFilter(self.__capacity, self.__error_rate, self.__tmp_dir)
+        for key_value in self.__keys:
+            self.__bloom_filter.add(key_value.to_bytes(8, 'little'))
+        self.__keys = set()
+
+    @property
+    def records(self) -> int:
+        return self.__records
+
+    @property
+    def duplicates(self) -> int:
+        return self.__duplicates
+
+    def close(self):
+        if self.__bloom_filter is not None:
+            self.__bloom_filter.close()
@@ -7,12 +7,14 @@ def escape_lstinline(s: str):
     return s.replace("\\", "\\\\")
 
 class EventDescriptor:
-    def __init__(self, activity_change: ActivityChange, log_source:LogSource, description:str, latex_description=None):
+    def __init__(self, activity_change: ActivityChange, log_source:LogSource, description:str, latex_description=None,
+                 timeline=True):
         self.__activity_change = activity_change
         self.__log_source = log_source
         self.__description = description
         assert self.__description is not None
         self.__latex_description = latex_description
+        self.__timeline = timeline
 
     @property
     def activity_change(self) -> ActivityChange:
@@ -30,6 +32,11 @@ class EventDescriptor:
     def log_source(self):
         return self.__log_source
 
+    # events which are not part of the session timeline are only used by specialized analyses
+    @property
+    def timeline(self) -> bool:
+        return self.__timeline
+
 
 EVENT_DESCRIPTORS = {
     # https://docs.microsoft.com/en-us/windows/security/threat-protection/auditing/event-4624
@@ -64,6 +71,20 @@ EVENT_DESCRIPTORS = {
                           log_source=LogSource.Security,
                           activity_change=ActivityChange.NO_ACTIVITY),
 
+    # https://docs.microsoft.com/en-us/windows/security/threat-protection/auditing/event-4688
+    4688: EventDescriptor(activity_change=ActivityChange.NO_ACTIVITY,
+                          log_source=LogSource.Security,
+                          description="Process {NewProcessName} ({NewProcessId}) created by {ParentProcessName} ({ProcessId}): {CommandLine}",
+                          latex_description="Process \\lstinline!{NewProcessName}! created by \\lstinline!{ParentProcessName}!: \\lstinline!{CommandLine}!",
+                          timeline=False),
+
+    # https://docs.microsoft.com/en-us/windows/security/threat-protection/auditing/event-4689
+    4689: EventDescriptor(activity_change=ActivityChange.NO_ACTIVITY,
+                          log_source=LogSource.Security,
+                          description="Process {ProcessName} ({ProcessId}) exited",
+                          latex_description="Process \\lstinline!{ProcessName}! exited",
+                          timeline=False),
+
     7045: EventDescriptor(activity_change=ActivityChange.NO_ACTIVITY,
                           log_source=LogSource.System,
                           description="New service {ServiceName} installed as {ImagePath}, "
@@ -100,6 +121,11 @@ EVENT_DESCRIPTORS = {
                             log_source=LogSource.Windows_PowerShell,
                             description="End of PowerShell command"),
 
+    4104:   EventDescriptor(activity_change=ActivityChange.NO_ACTIVITY,
+                            log_source=LogSource.Microsoft_Windows_PowerShell_Operational,
+                            description="PowerShell script block {ScriptBlockId} ({MessageNumber}/{MessageTotal})",
+                            timeline=False),
+
     551:    EventDescriptor(activity_change=ActivityChange.NO_ACTIVITY,
                             log_source=LogSource.Microsoft_Windows_SmbServer_Security,
                             description="SMB authentication by {ClientName} failed")
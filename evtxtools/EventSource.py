@@ -0,0 +1,286 @@
+import codecs
+import gzip
+import io
+import logging
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+import orjson
+from evtx import PyEvtxParser
+
+from evtxtools.EvtxArchive import ArchiveMember, EvtxArchive, open_evtx
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+COMPRESSION_SUFFIXES = ('.gz', '.zst')
+
+# events which have been exported with evtx_dump (JSON lines or XML) or wevtutil (XML)
+EXPORT_FORMATS = {
+    '.jsonl': 'jsonl',
+    '.xml': 'xml',
+}
+
+# the event id of a record, which is found without decoding it, also if EventID has attributes (Qualifiers)
+EVENT_ID_PATTERN = re.compile(r'"EventID":\s*(?:\{\s*"#attributes":\s*\{[^}]*\},\s*"#text":\s*)?(\d+)')
+
+# exported records are only parsed once, by WindowsEvent or SimpleWindowsEvent
+RECORD_ID_PATTERN = re.compile(r'"EventRecordID":\s*"?(\d+)')
+SYSTEM_TIME_PATTERN = re.compile(r'"SystemTime":\s*"([^"]*)"')
+TIMESTAMP_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d+))?')
+XML_DECLARATION_PATTERN = re.compile(r'<\?xml[^>]*\?>')
+
+# size of the blocks in which XML files are read
+BLOCK_SIZE = 1 << 20
+
+
+# returns 'jsonl' or 'xml' for exported events, e.g. Security.jsonl.gz, and None for all other files
+def export_format(filename: str) -> str:
+    name = filename.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    for suffix, export in EXPORT_FORMATS.items():
+        if name.endswith(suffix):
+            return export
+    return None
+
+
+def is_compressed(path: Path) -> bool:
+    with open(path, 'rb') as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    return magic.startswith(GZIP_MAGIC) or magic == ZSTD_MAGIC
+
+
+# opens a file, which is decompressed while it is read if it has been compressed with gzip or zstd
+def open_binary(path: Path):
+    f = open(path, 'rb')
+    magic = f.read(len(ZSTD_MAGIC))
+    f.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=f, mode='rb'), f
+    if magic == ZSTD_MAGIC:
+        try:
+            import zstandard
+        except ImportError:
+            f.close()
+            raise RuntimeError("{0} is compressed with zstd, which requires the zstandard package".format(path))
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f)), f
+    return f, f
+
+
+# the timestamps of records as they are returned by PyEvtxParser, e.g. 2021-01-01 03:00:00.123456 UTC
+def record_timestamp(system_time: str) -> str:
+    match = TIMESTAMP_PATTERN.match(system_time)
+    if match is None:
+        return None
+    return "%s %s.%s UTC" % (match.group(1), match.group(2), (match.group(3) or '').ljust(6, '0')[:6])
+
+
+def system_time(timestamp: str) -> str:
+    return timestamp[:10] + 'T' + timestamp[11:26] + 'Z'
+
+
+# records of an evtx file or of an evtx file in an archive
+class EvtxSource:
+    def __init__(self, f):
+        self.__file = f
+
+    def records(self):
+        evtx = open_evtx(self.__file)
+        try:
+            reader = PyEvtxParser(evtx).records_json()
+            while True:
+                try:
+                    yield next(reader)
+                except StopIteration:
+                    return
+                except RuntimeError as e:
+                    logging.fatal("fatal error while parsing {filename}:".format(filename=str(self.__file)))
+                    logging.fatal(str(e))
+        finally:
+            # archive members may be views of the archive, which can only be closed if they have been released
+            if not isinstance(evtx, str):
+                evtx.close()
+
+    def __str__(self):
+        return str(self.__file)
+
+
+# records which have been exported as JSON lines, one {"Event": ...} object per line. Uncompressed files can be
+# split into ranges of bytes, which are read independently: every line belongs to the range of its first byte.
+class JsonlSource:
+    def __init__(self, path: Path, start: int = 0, end: int = None):
+        self.__path = path
+        self.__start = start
+        self.__end = end
+
+    def records(self):
+        stream, f = open_binary(self.__path)
+        with f, stream:
+            position = 0
+            if self.__start > 0:
+                stream.seek(self.__start - 1)
+                position = self.__start - 1 + len(stream.readline())
+            for line in stream:
+                if self.__end is not None and position >= self.__end:
+                    break
+                position += len(line)
+                record = self.__record(line.strip().lstrip(codecs.BOM_UTF8))
+                if record is not None:
+                    yield record
+
+    def __record(self, line: bytes):
+        if len(line) == 0:
+            return None
+        data = line.decode('utf-8', errors='replace')
+        record_id = RECORD_ID_PATTERN.search(data)
+        timestamp = SYSTEM_TIME_PATTERN.search(data)
+        timestamp = record_timestamp(timestamp.group(1)) if timestamp is not None else None
+        if record_id is None or timestamp is None:
+            logging.error("{0}: skipping a line which is not an exported event".format(self))
+            return None
+        return {'event_record_id': int(record_id.group(1)), 'timestamp': timestamp, 'data': data}
+
+    def __str__(self):
+        if self.__start == 0 and self.__end is None:
+            return str(self.__path)
+        return "{0}[{1}:{2}]".format(self.__path, self.__start, '' if self.__end is None else self.__end)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition('}')[2]
+
+
+# converts an element to the structure which is created by evtx_dump and PyEvtxParser
+def _element_value(element: ElementTree.Element):
+    attributes = {_local_name(k): v for k, v in element.attrib.items()}
+    if len(element) == 0:
+        if len(attributes) == 0:
+            return element.text
+        value = {'#attributes': attributes}
+        if element.text is not None:
+            value['#text'] = element.text
+        return value
+
+    value = {'#attributes': attributes} if len(attributes) > 0 else dict()
+    for child in element:
+        name = _local_name(child.tag)
+        # <Data Name="TargetUserName">...</Data>
+        if name == 'Data' and 'Name' in child.attrib:
+            value[child.attrib['Name']] = child.text
+            continue
+        child_value = _element_value(child)
+        if name not in value:
+            value[name] = child_value
+        elif isinstance(value[name], list):
+            value[name].append(child_value)
+        else:
+            value[name] = [value[name], child_value]
+    return value
+
+
+# records which have been exported as XML, by evtx_dump or by wevtutil. Both write a sequence of <Event> elements
+# without a root element, which are parsed as they are read.
+class XmlSource:
+    def __init__(self, path: Path):
+        self.__path = path
+
+    def records(self):
+        stream, f = open_binary(self.__path)
+        with f, stream:
+            block = stream.read(BLOCK_SIZE)
+            # wevtutil output which has been redirected by PowerShell is encoded in UTF-16
+            encoding = 'utf-16' if block[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else 'utf-8-sig'
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            parser = ElementTree.XMLPullParser(events=('start', 'end'))
+            parser.feed('<Events>')
+            elements = list()
+            tail = ''
+            while len(block) > 0:
+                text = tail + decoder.decode(block)
+                # XML declarations precede every event of evtx_dump, and must be removed completely
+                cut = text.rfind('>') + 1
+                text, tail = text[:cut], text[cut:]
+                parser.feed(XML_DECLARATION_PATTERN.sub('', text))
+                yield from self.__records(parser, elements)
+                block = stream.read(BLOCK_SIZE)
+            parser.feed(XML_DECLARATION_PATTERN.sub('', tail + decoder.decode(b'', final=True)))
+            parser.feed('</Events>')
+            yield from self.__records(parser, elements)
+            parser.close()
+
+    def __records(self, parser: ElementTree.XMLPullParser, elements: list):
+        for event, element in parser.read_events():
+            if event == 'start':
+                elements.append(element)
+                continue
+            elements.pop()
+            if _local_name(element.tag) != 'Event' or len(elements) == 0:
+                continue
+            record = self.__record(element)
+            # events are removed from their parent, so that the document is not kept in memory
+            elements[-1].remove(element)
+            if record is not None:
+                yield record
+
+    def __record(self, element: ElementTree.Element):
+        event = _element_value(element)
+        system = event.get('System') if isinstance(event, dict) else None
+        if not isinstance(system, dict):
+            logging.error("{0}: skipping an event without System element".format(self))
+            return None
+        try:
+            record_id = int(system['EventRecordID'])
+            timestamp = record_timestamp(system['TimeCreated']['#attributes']['SystemTime'])
+        except (KeyError, TypeError, ValueError):
+            timestamp = None
+        if timestamp is None:
+            logging.error("{0}: skipping an event without record id or timestamp".format(self))
+            return None
+        # wevtutil writes timestamps with 100ns resolution, which cannot be parsed by datetime
+        system['TimeCreated']['#attributes']['SystemTime'] = system_time(timestamp)
+        return {'event_record_id': record_id, 'timestamp': timestamp,
+                'data': orjson.dumps({'Event': event}).decode('utf-8')}
+
+    def __str__(self):
+        return str(self.__path)
+
+
+# returns the source of the records of a file. `start` and `end` are only supported for splittable files.
+def event_source(f, start: int = 0, end: int = None):
+    if not isinstance(f, ArchiveMember):
+        export = export_format(f.name)
+        if export == 'jsonl':
+            return JsonlSource(f, start, end)
+        if export == 'xml':
+            return XmlSource(f)
+    return EvtxSource(f)
+
+
+# only uncompressed JSON lines can be read from any offset
+def is_splittable(path: Path) -> bool:
+    return export_format(path.name) == 'jsonl' and not is_compressed(path)
+
+
+# splits a file into ranges of at most `size` bytes
+def split_export(path: Path, size: int) -> list:
+    file_size = os.stat(path).st_size
+    return [(start, min(start + size, file_size)) for start in range(0, file_size, size)]
+
+
+# returns the exported events of a directory, which may contain events of any log
+def export_files(path: Path) -> list:
+    return [f for f in path.iterdir() if f.is_file() and export_format(f.name) is not None]
+
+
+# returns all evtx files and exported events of a directory, or the evtx files of an archive
+def event_files(path: Path) -> list:
+    if path.is_dir():
+        return [f for f in path.iterdir()
+                if f.is_file() and (f.name.endswith(".evtx") or export_format(f.name) is not None)]
+    archive = EvtxArchive(path)
+    archive.prefetch(archive.members)
+    return archive.members
@@ -0,0 +1,216 @@
+import bisect
+import itertools
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from evtxtools.EvtxArchive import EvtxArchive
+from evtxtools.EvtxParser import EvtxParser
+from evtxtools.RawEventList import RawEventList
+from evtxtools.SessionIndex import SessionIndex
+from evtxtools import StringTable
+from evtxtools.WellKnownSids import WellKnownSidFilter
+from evtxtools.WindowsEvent import WindowsEvent
+
+# the memory usage of the events of an evidence is estimated from a sample of its events
+SIZE_SAMPLE = 1000
+
+
+def estimate_size(event: WindowsEvent) -> int:
+    size = sys.getsizeof(event) + sys.getsizeof(event.__dict__) + sys.getsizeof(event.event_data)
+    for key, value in event.event_data.items():
+        size += sys.getsizeof(key)
+        # interned values are shared by all events
+        if key not in StringTable.EVENT_DATA_VALUES:
+            size += sys.getsizeof(value)
+    return size
+
+
+# the decoded events of one evidence directory or archive, sorted by their timestamp
+class Evidence:
+    def __init__(self, path: Path, events: list):
+        self.__path = path
+        self.__events = sorted(events, key=lambda e: e.timestamp)
+        self.__timestamps = [e.timestamp for e in self.__events]
+        sample = self.__events[::max(1, len(self.__events) // SIZE_SAMPLE)]
+        per_event = sum(map(estimate_size, sample)) / len(sample) if len(sample) > 0 else 0
+        self.__size = int(per_event * len(self.__events)) + sys.getsizeof(self.__timestamps) * 2
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __len__(self):
+        return len(self.__events)
+
+    # the events between from_date and to_date, which are both included
+    def events(self, from_date: datetime = None, to_date: datetime = None):
+        begin = 0 if from_date is None else bisect.bisect_left(self.__timestamps, from_date)
+        end = len(self.__events) if to_date is None else bisect.bisect_right(self.__timestamps, to_date)
+        return itertools.islice(self.__events, begin, end)
+
+
+class AnalysisOptions(NamedTuple):
+    from_date: datetime = None
+    to_date: datetime = None
+    include_local_system: bool = False
+    include_anonymous: bool = False
+    failed_logon_window: timedelta = None
+    rdp_tolerance: timedelta = None
+    process_trees: bool = False
+    hostname: str = None
+
+
+# the sessions of an evidence, as they are displayed by logins.py
+class Analysis:
+    def __init__(self, evidence: Evidence, options: AnalysisOptions):
+        sid_filter = WellKnownSidFilter()
+        if options.include_local_system:
+            sid_filter.include_local_system()
+        if options.include_anonymous:
+            sid_filter.include_anonymous()
+
+        self.__parser = EvtxParser([], sid_filter, options.from_date, options.to_date,
+                                   failed_logon_window=options.failed_logon_window,
+                                   process_trees=options.process_trees)
+        # the store also contains the events which are only needed for process trees
+        included_event_ids = self.__parser.included_event_ids
+        self.__parser.parse_event_stream((e for e in evidence.events(options.from_date, options.to_date)
+                                          if e.event_id in included_event_ids), options.hostname)
+        if options.rdp_tolerance is not None:
+            self.__parser.stitch_rdp_sessions(options.rdp_tolerance)
+        self.__session_index = SessionIndex.from_activities(self.__parser.activities)
+        self.__lines = dict()
+        self.__lock = threading.Lock()
+
+    @property
+    def session_index(self) -> SessionIndex:
+        return self.__session_index
+
+    def lines(self, enable_latex: bool = False) -> list:
+        with self.__lock:
+            if enable_latex not in self.__lines:
+                self.__lines[enable_latex] = [line for row in self.__parser.rows()
+                                              for line in self.__parser.row_lines(row, enable_latex)]
+            return self.__lines[enable_latex]
+
+
+# keeps the decoded events of evidence directories and archives in memory, so that they are parsed only once.
+# If the estimated size of all evidences exceeds `max_memory`, the least recently used evidence is dropped.
+# Analyses refer to the events of their evidence, so only their number is limited.
+class EventStore:
+    MAX_ANALYSES = 64
+
+    def __init__(self, max_memory: int):
+        self.__max_memory = max_memory
+        self.__lock = threading.Lock()
+        self.__evidences = OrderedDict()
+        self.__analyses = OrderedDict()
+        # every evidence is loaded only once, even if it is requested by many clients at the same time
+        self.__loading = dict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @staticmethod
+    def __load(path: Path) -> Evidence:
+        included_event_ids = EvtxParser([], WellKnownSidFilter(), None, None, process_trees=True).included_event_ids
+        archive = None
+        if path.is_dir():
+            files = EvtxParser.known_files_of(path, include_archives=True)
+        else:
+            archive = EvtxArchive(path)
+            files = [m for m in archive.members
+                     if m.name in EvtxParser.KNOWN_FILES or EvtxParser.is_archived_file(m.name)]
+            archive.prefetch(files)
+        try:
+            return Evidence(path, list(RawEventList(files, included_event_ids, datetime.min, datetime.max)))
+        finally:
+            if archive is not None:
+                archive.close()
+
+    def evidence(self, path: Path) -> Evidence:
+        with self.__lock:
+            evidence = self.__evidences.get(path)
+            if evidence is not None:
+                self.__evidences.move_to_end(path)
+                self.__hits += 1
+                return evidence
+            loading = self.__loading.setdefault(path, threading.Lock())
+
+        with loading:
+            with self.__lock:
+                evidence = self.__evidences.get(path)
+                if evidence is not None:
+                    self.__hits += 1
+                    return evidence
+                self.__misses += 1
+
+            begin = time.perf_counter()
+            try:
+                evidence = self.__load(path)
+                logging.info("loaded {0} events of {1} in {2:.1f}s, about {3} MiB".format(
+                    len(evidence), path, time.perf_counter() - begin, evidence.size >> 20))
+
+                with self.__lock:
+                    self.__evidences[path] = evidence
+                    self.__evict()
+            finally:
+                # clients which wait for a failed load try to load the evidence themselves
+                with self.__lock:
+                    if self.__loading.get(path) is loading:
+                        del self.__loading[path]
+            return evidence
+
+    # the most recently loaded evidence is kept, even if it is larger than max_memory
+    def __evict(self):
+        while len(self.__evidences) > 1 and self.memory > self.__max_memory:
+            path, _ = self.__evidences.popitem(last=False)
+            self.__analyses = OrderedDict((key, a) for key, a in self.__analyses.items() if key[0] != path)
+            self.__evictions += 1
+            logging.info("dropped the events of {0}".format(path))
+
+    def analysis(self, path: Path, options: AnalysisOptions) -> Analysis:
+        evidence = self.evidence(path)
+        key = (path, options)
+        with self.__lock:
+            analysis = self.__analyses.get(key)
+            if analysis is not None:
+                self.__analyses.move_to_end(key)
+                return analysis
+
+        # the same analysis might be created by two clients at the same time, but this is cheap compared to parsing
+        analysis = Analysis(evidence, options)
+        with self.__lock:
+            if path in self.__evidences:
+                self.__analyses[key] = analysis
+                while len(self.__analyses) > self.MAX_ANALYSES:
+                    self.__analyses.popitem(last=False)
+        return analysis
+
+    @property
+    def memory(self) -> int:
+        return sum(e.size for e in self.__evidences.values())
+
+    def statistics(self) -> dict:
+        with self.__lock:
+            return {
+                'evidences': [{'path': str(e.path), 'events': len(e), 'size': e.size}
+                              for e in self.__evidences.values()],
+                'analyses': len(self.__analyses),
+                'memory': self.memory,
+                'max_memory': self.__max_memory,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'strings': StringTable.statistics(),
+            }
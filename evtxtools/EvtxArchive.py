@@ -0,0 +1,186 @@
+import io
+import mmap
+import os
+import struct
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+
+
+# read-only file object for a part of a memory mapped file, which does not copy the data
+class MappedMember(io.RawIOBase):
+    def __init__(self, mapping: mmap.mmap, offset: int, size: int):
+        self.__view = memoryview(mapping)[offset:offset + size]
+        self.__position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), len(self.__view) - self.__position)
+        if count <= 0:
+            return 0
+        buffer[:count] = self.__view[self.__position:self.__position + count]
+        self.__position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.__position = offset
+        elif whence == io.SEEK_CUR:
+            self.__position += offset
+        else:
+            self.__position = len(self.__view) + offset
+        return self.__position
+
+    def tell(self) -> int:
+        return self.__position
+
+    def close(self):
+        self.__view.release()
+        super().close()
+
+
+class ArchiveMember:
+    def __init__(self, archive, member_name: str, size: int):
+        self.__archive = archive
+        self.__member_name = member_name
+        self.__size = size
+
+    @property
+    def archive(self) -> 'EvtxArchive':
+        return self.__archive
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.__member_name).name
+
+    @property
+    def member_name(self) -> str:
+        return self.__member_name
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    # returns a seekable file object with the contents of this member
+    def open(self):
+        return self.__archive.open_member(self)
+
+    def __str__(self):
+        return "{archive}:{member}".format(archive=self.__archive.path, member=self.__member_name)
+
+
+class EvtxArchive:
+    # number of members which are decompressed in advance
+    PREFETCH = 4
+
+    def __init__(self, path: Path, prefetch: int = PREFETCH):
+        self.__path = path
+        self.__prefetch = prefetch
+        self.__lock = threading.Lock()
+        self.__loading = dict()
+        self.__file = open(path, 'rb')
+        self.__mapping = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if zipfile.is_zipfile(path):
+            self.__zip = True
+            with zipfile.ZipFile(path) as archive:
+                infos = [i for i in archive.infolist() if not i.is_dir() and i.filename.lower().endswith('.evtx')]
+            self.__infos = {i.filename: i for i in infos}
+            # several members can be decompressed at the same time, because zlib releases the GIL
+            self.__executor = ThreadPoolExecutor(max_workers=prefetch)
+        else:
+            self.__zip = False
+            self.__tar = tarfile.open(path, 'r:*')
+            infos = [i for i in self.__tar.getmembers() if i.isfile() and i.name.lower().endswith('.evtx')]
+            self.__infos = {i.name: i for i in infos}
+            # compressed tar archives can only be read sequentially
+            self.__executor = ThreadPoolExecutor(max_workers=1)
+
+        self.__members = [ArchiveMember(self, name, info.file_size if self.__zip else info.size)
+                          for name, info in self.__infos.items()]
+        # only members which are going to be read are decompressed in advance
+        self.__pending = list()
+
+    @staticmethod
+    def is_archive(path: Path) -> bool:
+        return path.is_file() and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def members(self) -> list:
+        return list(self.__members)
+
+    # members which are going to be read, in this order
+    def prefetch(self, members: list):
+        with self.__lock:
+            self.__pending = [m for m in members if m.member_name not in self.__loading]
+
+    def __zip_data_offset(self, info: zipfile.ZipInfo) -> int:
+        name_length, extra_length = struct.unpack_from('<HH', self.__mapping, info.header_offset + 26)
+        return info.header_offset + 30 + name_length + extra_length
+
+    def __load(self, member: ArchiveMember):
+        info = self.__infos[member.member_name]
+        if self.__zip:
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                return MappedMember(self.__mapping, self.__zip_data_offset(info), info.file_size)
+            with zipfile.ZipFile(self.__path) as archive:
+                return io.BytesIO(archive.read(info))
+        if not self.__mapping[:6].startswith((b'\x1f\x8b', b'BZh', b'\xfd7zXZ')):
+            # uncompressed tar archives store member data contiguously
+            return MappedMember(self.__mapping, info.offset_data, info.size)
+        return io.BytesIO(self.__tar.extractfile(info).read())
+
+    def open_member(self, member: ArchiveMember):
+        with self.__lock:
+            future = self.__loading.pop(member.member_name, None)
+            if future is None:
+                if member in self.__pending:
+                    self.__pending.remove(member)
+                future = self.__executor.submit(self.__load, member)
+            # keep the next members of the archive loading, while this member is being parsed
+            while len(self.__loading) < self.__prefetch - 1 and len(self.__pending) > 0:
+                next_member = self.__pending.pop(0)
+                self.__loading[next_member.member_name] = self.__executor.submit(self.__load, next_member)
+        return future.result()
+
+    def close(self):
+        with self.__lock:
+            self.__pending = list()
+            loading = list(self.__loading.values())
+            self.__loading.clear()
+        for future in loading:
+            future.cancel()
+        self.__executor.shutdown(wait=True)
+        # members which have been loaded in advance but not opened still export views of the mapping
+        for future in loading:
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+        if not self.__zip:
+            self.__tar.close()
+        self.__mapping.close()
+        self.__file.close()
+
+
+# returns all evtx files of a directory or of an archive
+def evtx_files(path: Path) -> list:
+    if path.is_dir():
+        return [f for f in path.iterdir() if f.is_file() and f.name.endswith(".evtx")]
+    return EvtxArchive(path).members
+
+
+# returns something PyEvtxParser can be created from
+def open_evtx(f):
+    if isinstance(f, ArchiveMember):
+        return f.open()
+    return str(f)
@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from evtxtools.EvtxArchive import ArchiveMember
+from evtxtools.EvtxChunk import CHUNK_MAGIC, CHUNK_SIZE, CHUNK_HEADER_SIZE, RECORD_MAGIC, MAX_CHUNKS_PER_FILE, \
+    parse_chunk_header, header_checksum_valid, records_checksum_valid, chunk_offsets, write_evtx_file
+
+
+def chunk_digest(chunk) -> bytes:
+    return hashlib.blake2b(chunk, digest_size=16).digest()
+
+
+# searches for chunks which start in [start, end) and returns (offset, digest, records checksum is valid)
+def scan_segment(path: str, start: int, end: int) -> list:
+    chunks = list()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        search_end = min(len(m), end + len(CHUNK_MAGIC) - 1)
+        offset = m.find(CHUNK_MAGIC, start, search_end)
+        while offset >= 0:
+            if offset + CHUNK_SIZE <= len(m):
+                # only the chunk header and the first record magic are copied, until the chunk has been validated
+                header_data = m[offset:offset + CHUNK_HEADER_SIZE + 4]
+                header = parse_chunk_header(header_data)
+                if header is not None and header_checksum_valid(header_data, header) \
+                        and header_data[CHUNK_HEADER_SIZE:] == RECORD_MAGIC:
+                    chunk = m[offset:offset + CHUNK_SIZE]
+                    chunks.append((offset, chunk_digest(chunk), records_checksum_valid(chunk, header)))
+            offset = m.find(CHUNK_MAGIC, offset + 1, search_end)
+    return chunks
+
+
+def _scan_segment(args):
+    return scan_segment(*args)
+
+
+class EvtxCarver:
+    SEGMENT_SIZE = 256 << 20
+
+    def __init__(self, image: Path, jobs: int = None):
+        self.__image = image
+        self.__jobs = jobs or os.cpu_count()
+        self.__known_digests = set()
+
+    # chunks which are also contained in intact evtx files will not be carved again
+    def exclude_chunks_of(self, evtx_file):
+        with (evtx_file.open() if isinstance(evtx_file, ArchiveMember) else open(evtx_file, 'rb')) as f:
+            size = f.seek(0, os.SEEK_END)
+            for offset in chunk_offsets(size):
+                f.seek(offset)
+                self.__known_digests.add(chunk_digest(f.read(CHUNK_SIZE)))
+
+    def scan(self) -> list:
+        size = self.__image.stat().st_size
+        if size < CHUNK_SIZE:
+            return []
+        segments = [(str(self.__image), start, min(start + self.SEGMENT_SIZE, size))
+                    for start in range(0, size, self.SEGMENT_SIZE)]
+        found = list()
+        with ProcessPoolExecutor(max_workers=self.__jobs) as executor:
+            for chunks in executor.map(_scan_segment, segments):
+                found.extend(chunks)
+
+        carved = list()
+        for offset, digest, records_valid in sorted(found):
+            if digest in self.__known_digests:
+                continue
+            self.__known_digests.add(digest)
+            if not records_valid:
+                logging.warning("chunk at offset {offset} has an invalid records checksum, "
+                                "some of its records might be broken".format(offset=offset))
+            carved.append(offset)
+        return carved
+
+    # writes all carved chunks into new evtx files and returns their names
+    def carve(self, output_dir: Path, chunks_per_file: int = 1024) -> list:
+        assert chunks_per_file <= MAX_CHUNKS_PER_FILE
+        offsets = self.scan()
+        files = list()
+        if len(offsets) == 0:
+            return files
+        with open(self.__image, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for idx in range(0, len(offsets), chunks_per_file):
+                filename = output_dir / "carved-{0:05d}.evtx".format(len(files))
+                with open(filename, 'wb') as out:
+                    write_evtx_file(out, [m[o:o + CHUNK_SIZE] for o in offsets[idx:idx + chunks_per_file]])
+                files.append(filename)
+        return files
@@ -0,0 +1,93 @@
+import struct
+import zlib
+from typing import NamedTuple
+
+FILE_MAGIC = b'ElfFile\x00'
+CHUNK_MAGIC = b'ElfChnk\x00'
+RECORD_MAGIC = b'\x2a\x2a\x00\x00'
+
+FILE_HEADER_SIZE = 4096
+CHUNK_SIZE = 65536
+CHUNK_HEADER_SIZE = 512
+
+# the number of chunks is stored as 16 bit value in the file header
+MAX_CHUNKS_PER_FILE = 0xffff
+
+
+class ChunkHeader(NamedTuple):
+    first_record_number: int
+    last_record_number: int
+    first_record_id: int
+    last_record_id: int
+    free_space_offset: int
+    records_checksum: int
+    header_checksum: int
+
+    @property
+    def number_of_records(self) -> int:
+        return self.last_record_id - self.first_record_id + 1
+
+
+def parse_chunk_header(chunk) -> ChunkHeader:
+    if len(chunk) < CHUNK_HEADER_SIZE or chunk[:8] != CHUNK_MAGIC:
+        return None
+    first_number, last_number, first_id, last_id = struct.unpack_from('<QQQQ', chunk, 8)
+    free_space_offset, records_checksum = struct.unpack_from('<II', chunk, 48)
+    header_checksum, = struct.unpack_from('<I', chunk, 124)
+    return ChunkHeader(first_number, last_number, first_id, last_id, free_space_offset, records_checksum,
+                       header_checksum)
+
+
+def header_checksum_valid(chunk, header: ChunkHeader) -> bool:
+    return zlib.crc32(chunk[128:CHUNK_HEADER_SIZE], zlib.crc32(chunk[:120])) == header.header_checksum
+
+
+def records_checksum_valid(chunk, header: ChunkHeader) -> bool:
+    if not CHUNK_HEADER_SIZE <= header.free_space_offset <= CHUNK_SIZE:
+        return False
+    return zlib.crc32(chunk[CHUNK_HEADER_SIZE:header.free_space_offset]) == header.records_checksum
+
+
+# iterates over the records of a chunk and returns (record id, FILETIME written) from the record headers only
+def record_headers(chunk, header: ChunkHeader):
+    offset = CHUNK_HEADER_SIZE
+    end = min(header.free_space_offset, len(chunk))
+    while offset + 24 <= end and chunk[offset:offset + 4] == RECORD_MAGIC:
+        size, record_id, written = struct.unpack_from('<IQQ', chunk, offset + 4)
+        if size < 24 or offset + size > end:
+            return
+        yield record_id, written
+        offset += size
+
+
+def file_header(number_of_chunks: int, next_record_id: int) -> bytes:
+    assert number_of_chunks <= MAX_CHUNKS_PER_FILE
+    header = bytearray(FILE_HEADER_SIZE)
+    struct.pack_into('<8sQQQIHHHH', header, 0,
+                     FILE_MAGIC,
+                     0,
+                     max(number_of_chunks - 1, 0),
+                     next_record_id,
+                     128,
+                     1,
+                     3,
+                     FILE_HEADER_SIZE,
+                     number_of_chunks)
+    struct.pack_into('<I', header, 124, zlib.crc32(header[:120]))
+    return bytes(header)
+
+
+# writes a new evtx file, which consists of the given chunks
+def write_evtx_file(f, chunks: list):
+    next_record_id = 1
+    for chunk in chunks:
+        header = parse_chunk_header(chunk)
+        if header is not None:
+            next_record_id = max(next_record_id, header.last_record_id + 1)
+    f.write(file_header(len(chunks), next_record_id))
+    for chunk in chunks:
+        f.write(chunk)
+
+
+def chunk_offsets(file_size: int):
+    return range(FILE_HEADER_SIZE, file_size - CHUNK_SIZE + 1, CHUNK_SIZE)
@@ -0,0 +1,135 @@
+import io
+import logging
+import math
+import mmap
+import os
+import random
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from evtx import PyEvtxParser
+
+from evtxtools.EventSource import EVENT_ID_PATTERN
+from evtxtools.EvtxChunk import CHUNK_SIZE, parse_chunk_header, header_checksum_valid, record_headers, \
+    chunk_offsets, write_evtx_file
+
+# only the fields of the System element are extracted, the rest of the record is not decoded
+COMPUTER_PATTERN = re.compile(r'"Computer":\s*"((?:[^"\\]|\\.)*)"')
+CHANNEL_PATTERN = re.compile(r'"Channel":\s*"((?:[^"\\]|\\.)*)"')
+
+FILETIME_EPOCH = datetime(1601, 1, 1)
+
+
+def filetime_to_datetime(filetime: int) -> datetime:
+    return FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
+
+
+class FileInventory:
+    def __init__(self, filename: str, size: int):
+        self.filename = filename
+        self.size = size
+        self.chunks = 0
+        self.records = 0
+        self.parsed_records = 0
+        # histograms are extrapolated only if a sample of the chunks has been parsed. Otherwise they count the parsed
+        # records, which may be fewer than the record headers if records are damaged
+        self.sampled = False
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.event_ids = Counter()
+        self.computers = Counter()
+        self.channels = Counter()
+        self.hours = Counter()
+
+    def add_timestamp(self, timestamp: datetime):
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+    def add_record(self, record: dict):
+        data = record['data']
+        self.parsed_records += 1
+        event_id = EVENT_ID_PATTERN.search(data)
+        self.event_ids[int(event_id.group(1)) if event_id else None] += 1
+        computer = COMPUTER_PATTERN.search(data)
+        self.computers[computer.group(1) if computer else None] += 1
+        channel = CHANNEL_PATTERN.search(data)
+        self.channels[channel.group(1) if channel else None] += 1
+        # '2020-11-23 10:12:33.123 UTC' or '2020-11-23T10:12:33.123Z UTC'
+        self.hours[record['timestamp'][:13].replace('T', ' ')] += 1
+
+    def extrapolate(self):
+        if self.parsed_records == 0 or not self.sampled:
+            return
+        factor = self.records / self.parsed_records
+        for histogram in (self.event_ids, self.computers, self.channels, self.hours):
+            for key in histogram:
+                histogram[key] = round(histogram[key] * factor)
+
+
+def _parse_records(inventory: FileInventory, parser: PyEvtxParser):
+    reader = parser.records_json()
+    while True:
+        try:
+            inventory.add_record(next(reader))
+        except StopIteration:
+            return
+        except RuntimeError as e:
+            logging.warning("error while parsing {filename}: {error}".format(filename=inventory.filename, error=e))
+
+
+# collects the histograms of one evtx file. If `sample` is less than 1, only the chunk and record headers are
+# read completely, and the histograms are estimated from a random sample of the chunks
+def inventory_of(path: str, sample: float = 1.0, seed: int = None) -> FileInventory:
+    size = os.stat(path).st_size
+    inventory = FileInventory(os.path.basename(path), size)
+    if size == 0:
+        return inventory
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        chunks = list()
+        for offset in chunk_offsets(size):
+            chunk = m[offset:offset + CHUNK_SIZE]
+            header = parse_chunk_header(chunk)
+            if header is None or not header_checksum_valid(chunk, header):
+                continue
+            chunks.append(offset)
+            for record_id, written in record_headers(chunk, header):
+                inventory.records += 1
+                inventory.add_timestamp(filetime_to_datetime(written))
+        inventory.chunks = len(chunks)
+
+        # rust threads would compete with the other processes
+        if sample >= 1.0:
+            _parse_records(inventory, PyEvtxParser(path, 1))
+        elif len(chunks) > 0:
+            count = max(1, math.ceil(len(chunks) * sample))
+            selected = sorted(random.Random(seed).sample(chunks, min(count, len(chunks))))
+            sampled_file = io.BytesIO()
+            write_evtx_file(sampled_file, [m[offset:offset + CHUNK_SIZE] for offset in selected])
+            sampled_file.seek(0)
+            inventory.sampled = True
+            _parse_records(inventory, PyEvtxParser(sampled_file, 1))
+            inventory.extrapolate()
+    return inventory
+
+
+def _inventory_of(args):
+    return inventory_of(*args)
+
+
+class EvtxInventory:
+    def __init__(self, files: list, sample: float = 1.0, seed: int = None, jobs: int = None):
+        self.__files = files
+        self.__sample = sample
+        self.__seed = seed
+        self.__jobs = jobs or os.cpu_count()
+
+    # returns the inventories in the order of the files, while the files are parsed in parallel
+    def __iter__(self):
+        tasks = [(str(f), self.__sample, self.__seed) for f in self.__files]
+        with ProcessPoolExecutor(max_workers=self.__jobs) as executor:
+            yield from executor.map(_inventory_of, tasks)
@@ -1,14 +1,30 @@
+import heapq
 import xml
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import progressbar
 from evtx import PyEvtxParser
 from evtxtools.EventDescriptor import EVENT_DESCRIPTORS
 from evtxtools.Activity import Activity
+from evtxtools.DatabaseEventList import DatabaseEventList
+from evtxtools.EventSource import export_files
+from evtxtools.ExternalSorter import ExternalSorter
+from evtxtools.FailedLogonAggregator import FailedLogonAggregator, FAILED_LOGON_EVENT_IDS
+from evtxtools.ProcessTreeBuilder import ProcessTreeBuilder, PROCESS_EVENT_IDS
 from evtxtools.RawEventList import RawEventList
+from evtxtools.RdpSessionStitcher import RdpSessionStitcher
+from evtxtools.SessionIndex import Session
+from evtxtools.SidResolver import SidResolver
 from evtxtools.WellKnownSids import *
 from evtxtools.WindowsEvent import WindowsEvent
 
+if TYPE_CHECKING:
+    # deduplication and profiling are optional, their modules are only loaded if they are used
+    from evtxtools.EventDeduplicator import EventDeduplicator
+    from evtxtools.Profiler import Profiler
+
 
 class EvtxParser:
     pass
@@ -16,28 +32,61 @@ class EvtxParser:
 
 class EvtxParser:
 
-    def __init__(self, files_to_scan: list, sid_filter: WellKnownSidFilter, from_date: datetime, to_date: datetime):
+    def __init__(self, files_to_scan: list, sid_filter: WellKnownSidFilter, from_date: datetime, to_date: datetime,
+                 failed_logon_window: timedelta = None, process_trees: bool = False, max_memory: int = None,
+                 deduplicator: 'EventDeduplicator' = None, profiler: 'Profiler' = None):
         self.__files_to_scan = files_to_scan
+        self.__deduplicator = deduplicator
+        self.__profiler = profiler
         self.__sid_filter = sid_filter
         self.__from_date = from_date
         self.__to_date = to_date
+        self.__failed_logon_window = failed_logon_window
         self.__activities = dict()
+        self.__failed_logon_bursts = list()
+        self.__process_trees = ProcessTreeBuilder() if process_trees else None
+        self.__sid_resolver = SidResolver()
+
+        # with limited memory, events are sorted by activity id on disk and activities are built in a second pass
+        self.__max_memory = max_memory
+        self.__hostname = None
+        self.__events = None
+        self.__sorted_activities = None
+        if max_memory is not None:
+            self.__events = ExternalSorter(key=lambda e: (e[1].computer_code, e[1].activity_id),
+                                           max_memory=max_memory // 2)
 
     KNOWN_FILES = [
         'Security.evtx',
         'System.evtx',
-        'Windows PowerShell.evtx'
+        'Windows PowerShell.evtx',
         'Microsoft-Windows-WinRM%4Operational.evtx',
-        'Microsoft-Windows-RemoteDesktopServices-RdpCoreTS%4Operational.evtx'
+        'Microsoft-Windows-RemoteDesktopServices-RdpCoreTS%4Operational.evtx',
+        'ForwardedEvents.evtx'
     ]
 
+    # lists the files of a directory which we can use:
+    # - files must be regular files (no directories, etc.)
+    # - file names must be listed in EvtxParser.KNWON_FILES, or be archives of them
+    # - exported events (JSON lines or XML) are always used, because they may contain events of any log
+    @staticmethod
+    def known_files_of(logsdir: Path, include_archives: bool = False) -> list:
+        files = [f for f in (logsdir / sf for sf in EvtxParser.KNOWN_FILES) if f.is_file()]
+        if include_archives:
+            files.extend(f for f in logsdir.iterdir() if f.is_file() and EvtxParser.is_archived_file(f.name))
+        return files + export_files(logsdir)
+
+    # logs which are rotated by the event log service are stored as Archive-<log>-<timestamp>.evtx
+    @staticmethod
+    def is_archived_file(filename: str) -> bool:
+        if not filename.startswith('Archive-') or not filename.endswith('.evtx'):
+            return False
+        return any(filename[len('Archive-'):].startswith(f[:-len('.evtx')] + '-') for f in EvtxParser.KNOWN_FILES)
+
     def exclude_event(self, event: WindowsEvent) -> bool:
-        if 'TargetUserSid' in event.event_data:
-            try:
-                if self.__sid_filter.is_excluded(WellKnownSid(event.event_data['TargetUserSid'])):
-                    return True
-            except ValueError:
-                pass
+        sid = event.event_data.get('TargetUserSid')
+        if sid is not None and self.__sid_filter.is_excluded_sid(sid):
+            return True
 
         if event.event_id not in EVENT_DESCRIPTORS:
             return True
@@ -45,18 +94,146 @@ class EvtxParser:
         return False
 
     def handle_event(self, event: WindowsEvent, hostname: str):
-        activity = self.__activities.get(event.activity_id)
+        if self.__events is not None:
+            self.__hostname = hostname
+            self.__events.add((len(self.__events), event))
+            return
+
+        # logon ids are only unique per computer, and collected logs contain events of many computers
+        key = (event.computer_code, event.activity_id)
+        activity = self.__activities.get(key)
         if activity is None:
             activity = Activity(hostname)
-            self.__activities[event.activity_id] = activity
+            self.__activities[key] = activity
         activity.add_event(event)
 
+    @property
+    def included_event_ids(self) -> set:
+        included_event_ids = set(event_id for event_id, d in EVENT_DESCRIPTORS.items() if d.timeline)
+        if self.__process_trees is not None:
+            included_event_ids.update(PROCESS_EVENT_IDS)
+        return included_event_ids
+
     def parse_events(self, hostname: str = None):
-        event_list = RawEventList(self.__files_to_scan, set(EVENT_DESCRIPTORS.keys()), self.__from_date, self.__to_date)
-        for event in progressbar.progressbar(event_list):
-            if not self.exclude_event(event):
-                self.handle_event(event, hostname)
+        event_list = RawEventList(self.__files_to_scan, self.included_event_ids, self.__from_date, self.__to_date,
+                                  deduplicator=self.__deduplicator, profiler=self.__profiler)
+        if self.__profiler is None:
+            self.parse_event_stream(progressbar.progressbar(event_list), hostname)
+        else:
+            with self.__profiler.stage('correlation'):
+                self.parse_event_stream(progressbar.progressbar(event_list), hostname)
+
+    # reads the events from a database which has been created by evtx2sqlite.py, instead of the evtx files
+    def parse_database(self, dbfile: Path, hostname: str = None):
+        event_list = DatabaseEventList(dbfile, self.included_event_ids, self.__from_date, self.__to_date)
+        try:
+            if self.__profiler is None:
+                self.parse_event_stream(progressbar.progressbar(event_list), hostname)
+            else:
+                with self.__profiler.stage('correlation'):
+                    self.parse_event_stream(progressbar.progressbar(event_list), hostname)
+        finally:
+            event_list.close()
+
+    # correlates events which have already been decoded
+    def parse_event_stream(self, events, hostname: str = None):
+        aggregator = None
+        if self.__failed_logon_window is not None:
+            aggregator = FailedLogonAggregator(self.__failed_logon_window, hostname)
+
+        for event in events:
+            self.__sid_resolver.add_event(event.event_id, event.event_data)
+            if self.__process_trees is not None and event.event_id in PROCESS_EVENT_IDS:
+                self.__process_trees.add_event(event)
+            elif not self.exclude_event(event):
+                if aggregator is not None and event.event_id in FAILED_LOGON_EVENT_IDS:
+                    self.__failed_logon_bursts.extend(aggregator.add_event(event))
+                else:
+                    self.handle_event(event, hostname)
+
+        if aggregator is not None:
+            self.__failed_logon_bursts.extend(aggregator.flush())
+
+    # accounts of the SIDs which have been seen in logon events
+    @property
+    def sid_resolver(self) -> SidResolver:
+        return self.__sid_resolver
+
+    def stitch_rdp_sessions(self, tolerance: timedelta):
+        assert self.__events is None
+        for connection in RdpSessionStitcher(tolerance).stitch(self.activities):
+            del self.__activities[(connection.computer_code, connection.activity_id)]
+
+    # activities are sorted in the same order as by sorted(), which is stable
+    def __activities_from_disk(self):
+        if self.__sorted_activities is None:
+            sorter = ExternalSorter(key=lambda a: (a[1].first_timestamp, a[0]), max_memory=self.__max_memory // 2)
+            activity, first_arrival = None, None
+            for arrival, event in self.__events:
+                if activity is None or event.activity_id != activity.activity_id or \
+                        event.computer_code != activity.computer_code:
+                    if activity is not None:
+                        sorter.add((first_arrival, activity))
+                    activity, first_arrival = Activity(self.__hostname), arrival
+                activity.add_event(event)
+            if activity is not None:
+                sorter.add((first_arrival, activity))
+            self.__events.close()
+            self.__sorted_activities = sorter
+        return (activity for _, activity in self.__sorted_activities)
+
+    @property
+    def activities(self):
+        if self.__events is not None:
+            return self.__activities_from_disk()
+        return list(self.__activities.values())
+
+    def sorted_activities(self):
+        if self.__events is not None:
+            return self.__activities_from_disk()
+        return sorted(self.__activities.values())
+
+    # the sessions of all activities, e.g. for a session index
+    def sessions(self) -> list:
+        return [Session.from_activity(a) for a in self.activities]
+
+    # removes the temporary files of --max-memory
+    def close(self):
+        if self.__events is not None:
+            self.__events.close()
+        if self.__sorted_activities is not None:
+            self.__sorted_activities.close()
+
+    # sessions and failed logon bursts, sorted by their first timestamp
+    def rows(self):
+        return heapq.merge(self.sorted_activities(),
+                           sorted(self.__failed_logon_bursts, key=lambda b: b.first_timestamp),
+                           key=lambda r: r.first_timestamp)
+
+    # the lines of a row, which are followed by the process trees of sessions
+    def row_lines(self, row, enable_latex = False) -> list:
+        if not isinstance(row, Activity):
+            return [row.latex_str() if enable_latex else str(row)]
+        # accounts are resolved when they are shown, because the events may be shared with other parsers
+        lines = [row.latex_str(self.__sid_resolver) if enable_latex else row.describe(self.__sid_resolver)]
+        if self.__process_trees is not None:
+            lines.extend(self.__process_tree_lines(row, enable_latex))
+        return lines
+
+    def print_row(self, row, enable_latex = False):
+        for line in self.row_lines(row, enable_latex):
+            print(line)
 
     def print_logins(self, enable_latex = False):
-        for s in sorted(self.__activities.values()):
-            print(s.latex_str() if enable_latex else str(s))
\ No newline at end of file
+        for row in self.rows():
+            self.print_row(row, enable_latex)
+
+    def __process_tree_lines(self, activity: Activity, enable_latex: bool):
+        for process, depth in ProcessTreeBuilder.walk(self.__process_trees.trees(activity)):
+            if enable_latex:
+                yield "\\mmsrow{\\ts{%s} & & & %s%s}" % (
+                    process.created.strftime("%Y-%m-%d %H:%M:%S"),
+                    "\\quad " * (depth + 1),
+                    process.latex_str())
+            else:
+                yield "%s%s" % ("    " * (depth + 1), str(process))
@@ -0,0 +1,94 @@
+import heapq
+import pickle
+import tempfile
+
+# approximated memory needed per item, in addition to its pickled representation
+ITEM_OVERHEAD = 128
+
+# number of runs which are merged at once, every run keeps a temporary file open
+MAX_FAN_IN = 64
+
+
+class ExternalSorter:
+    def __init__(self, key, max_memory: int, tmp_dir: str = None, fan_in: int = MAX_FAN_IN):
+        self.__key = key
+        self.__max_memory = max_memory
+        self.__tmp_dir = tmp_dir
+        self.__fan_in = fan_in
+        self.__buffer = list()
+        self.__buffer_size = 0
+        # (level, file): runs of level n+1 have been merged from `fan_in` runs of level n
+        self.__runs = list()
+        self.__count = 0
+
+    def add(self, item):
+        blob = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        # the sequence number makes the sort stable and prevents blobs from being compared
+        self.__buffer.append((self.__key(item), self.__count, blob))
+        self.__buffer_size += len(blob) + ITEM_OVERHEAD
+        self.__count += 1
+        if self.__buffer_size > self.__max_memory:
+            self.__spill()
+
+    def __spill(self):
+        self.__buffer.sort()
+        self.__runs.append((0, self.__write_run(self.__buffer)))
+        self.__buffer = list()
+        self.__buffer_size = 0
+        # as soon as there are `fan_in` runs of a level, they are merged into one run of the next level
+        level = 0
+        while sum(1 for run_level, _ in self.__runs if run_level == level) >= self.__fan_in:
+            self.__merge_runs([run for run in self.__runs if run[0] == level])
+            level += 1
+
+    def __write_run(self, entries):
+        run = tempfile.TemporaryFile(dir=self.__tmp_dir)
+        pickler = pickle.Pickler(run, protocol=pickle.HIGHEST_PROTOCOL)
+        for entry in entries:
+            pickler.dump(entry)
+            # the memo would keep all entries in memory
+            pickler.clear_memo()
+        return run
+
+    # entries are unique because of their sequence numbers, so runs can be merged in any order
+    def __merge_runs(self, runs: list):
+        merged = self.__write_run(heapq.merge(*[self.__read_run(run) for _, run in runs]))
+        for _, run in runs:
+            run.close()
+        level = max(run_level for run_level, _ in runs) + 1
+        self.__runs = [run for run in self.__runs if run not in runs] + [(level, merged)]
+
+    @staticmethod
+    def __read_run(run):
+        run.seek(0)
+        unpickler = pickle.Unpickler(run)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def runs(self) -> int:
+        return len(self.__runs)
+
+    # returns all items sorted by key, items with equal keys are returned in the order in which they have been added
+    def __iter__(self):
+        self.__buffer.sort()
+        # runs of several levels may be left, the smallest ones are merged first
+        while len(self.__runs) >= self.__fan_in:
+            self.__runs.sort(key=lambda run: run[0])
+            self.__merge_runs(self.__runs[:self.__fan_in])
+        sources = [self.__read_run(run) for _, run in self.__runs] + [iter(self.__buffer)]
+        for _, _, blob in heapq.merge(*sources):
+            yield pickle.loads(blob)
+
+    def close(self):
+        for _, run in self.__runs:
+            run.close()
+        self.__runs.clear()
+        self.__buffer.clear()
+        self.__buffer_size = 0
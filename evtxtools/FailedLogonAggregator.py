@@ -0,0 +1,215 @@
+import heapq
+from collections import OrderedDict
+from datetime import timedelta
+
+from evtxtools.LogSource import LogSource
+from evtxtools.WindowsEvent import WindowsEvent
+
+FAILED_LOGON_EVENT_IDS = {4625, 140, 551}
+
+# number of events which are sorted before they are added to bursts. This is more than RawEventList can have in
+# flight between its reader and its consumer, which is where failed logons are reordered.
+MAX_PENDING = 50000
+
+
+class FailedLogonBurst:
+    # number of distinct account names which are remembered per burst
+    MAX_ACCOUNTS = 1000
+
+    def __init__(self, log_source: LogSource, source: str, hostname: str):
+        self.__log_source = log_source
+        self.__source = source
+        self.__hostname = hostname
+        self.__first_timestamp = None
+        self.__last_timestamp = None
+        self.__count = 0
+        self.__accounts = set()
+        self.__accounts_truncated = False
+
+    def add(self, timestamp, account: str):
+        if self.__first_timestamp is None or timestamp < self.__first_timestamp:
+            self.__first_timestamp = timestamp
+        if self.__last_timestamp is None or timestamp > self.__last_timestamp:
+            self.__last_timestamp = timestamp
+        self.__count += 1
+
+        if account is not None and account not in self.__accounts:
+            if len(self.__accounts) < self.MAX_ACCOUNTS:
+                self.__accounts.add(account)
+            else:
+                self.__accounts_truncated = True
+
+    @property
+    def log_source(self) -> LogSource:
+        return self.__log_source
+
+    @property
+    def source(self) -> str:
+        return self.__source
+
+    @property
+    def first_timestamp(self):
+        return self.__first_timestamp
+
+    @property
+    def last_timestamp(self):
+        return self.__last_timestamp
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def accounts(self) -> set:
+        return self.__accounts
+
+    def __accounts_str(self, escape=lambda a: a) -> str:
+        if len(self.__accounts) == 0:
+            return "no account"
+        accounts = ", ".join(escape(a) for a in sorted(self.__accounts)[:3])
+        if len(self.__accounts) > 3:
+            accounts += ", ..."
+        return "%s%d accounts: %s" % (">" if self.__accounts_truncated else "", len(self.__accounts), accounts)
+
+    def __str__(self):
+        if self.__hostname:
+            hostname = " {" + self.__hostname + "}"
+        else:
+            hostname = ""
+        return "%s%s: %d failed logons from %s (%s) (ended %s (%s))" % (
+            self.__first_timestamp,
+            hostname,
+            self.__count,
+            self.__source,
+            self.__accounts_str(),
+            self.__last_timestamp,
+            self.__last_timestamp - self.__first_timestamp
+        )
+
+    def latex_str(self):
+        td = str(self.__last_timestamp - self.__first_timestamp)
+        idx = td.find(".")
+        if idx > 0:
+            td = td[:idx]
+        return "\\mmsrow{\\ts{%s} & \\ts{%s} & \\ts{%s} & %d failed logons from \\host{%s} (%s) }" % (
+            self.__first_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            self.__last_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            td,
+            self.__count,
+            self.__source,
+            self.__accounts_str(lambda a: "\\username{%s}" % a.replace("\\", "\\\\"))
+        )
+
+
+# Events do not arrive in time order: RawEventList decodes batches in parallel, and archives, rotated and carved logs
+# are read one after another. So the last `max_pending` events of every log source are sorted in a buffer first. Bursts
+# are completed when the sorted events of their log source have moved past them, so that an older log which is read
+# after a newer one does not complete its bursts early.
+class FailedLogonAggregator:
+    def __init__(self, window: timedelta, hostname: str = None, max_keys: int = 100000,
+                 max_pending: int = MAX_PENDING):
+        self.__window = window
+        self.__hostname = hostname
+        self.__max_keys = max_keys
+        self.__max_pending = max_pending
+
+        # open bursts per log source, least recently updated first. Every log source is evicted on its own, because
+        # the position of a log source stops when its file has been read completely
+        self.__bursts = dict()
+        self.__open_bursts = 0
+
+        # events which have not been added to bursts yet, per log source as heap of
+        # (timestamp, sequence number, source, account), so that the events themselves need not be kept
+        self.__pending = dict()
+        self.__sequence = 0
+
+        # timestamp of the last released event, per log source
+        self.__positions = dict()
+
+    @staticmethod
+    def source_of(event: WindowsEvent) -> str:
+        data = event.event_data
+        if event.event_id == 4625:
+            ip_address = data.get('IpAddress')
+            if ip_address and ip_address != '-':
+                return ip_address
+            return data.get('WorkstationName') or '-'
+        elif event.event_id == 140:
+            return data.get('IPString') or '-'
+        else:
+            return data.get('ClientName') or '-'
+
+    @staticmethod
+    def account_of(event: WindowsEvent):
+        data = event.event_data
+        if event.event_id == 4625:
+            return "%s\\%s" % (data.get('TargetDomainName') or '-', data.get('TargetUserName') or '-')
+        return data.get('UserName')
+
+    # adds a failed logon event and returns all bursts which have been completed since
+    def add_event(self, event: WindowsEvent) -> list:
+        assert event.event_id in FAILED_LOGON_EVENT_IDS
+        completed = list()
+
+        pending = self.__pending.setdefault(event.log_source, list())
+        position = self.__positions.get(event.log_source)
+        if position is not None and event.timestamp < position - self.__window:
+            # an older log is read after a newer one, whose remaining events are added to their bursts first
+            while len(pending) > 0:
+                self.__release(event.log_source, heapq.heappop(pending), completed)
+        heapq.heappush(pending, (event.timestamp, self.__sequence, self.source_of(event), self.account_of(event)))
+        self.__sequence += 1
+        if len(pending) > self.__max_pending:
+            self.__release(event.log_source, heapq.heappop(pending), completed)
+        return completed
+
+    def __release(self, log_source: LogSource, pending_event: tuple, completed: list):
+        timestamp, _, source, account = pending_event
+        self.__positions[log_source] = timestamp
+
+        bursts = self.__bursts.setdefault(log_source, OrderedDict())
+        burst = bursts.get(source)
+        if burst is not None:
+            if timestamp > burst.last_timestamp + self.__window or \
+                    timestamp < burst.first_timestamp - self.__window:
+                completed.append(bursts.pop(source))
+                self.__open_bursts -= 1
+                burst = None
+            else:
+                bursts.move_to_end(source)
+
+        if burst is None:
+            burst = FailedLogonBurst(log_source, source, self.__hostname)
+            bursts[source] = burst
+            self.__open_bursts += 1
+        burst.add(timestamp, account)
+
+        self.__evict(bursts, timestamp, completed)
+
+    # completes the bursts of a log source which its sorted events have moved past, and the least recently updated
+    # bursts of the log source with the most open bursts if there are more than `max_keys`
+    def __evict(self, bursts: OrderedDict, position, completed: list):
+        while len(bursts) > 0:
+            source, burst = next(iter(bursts.items()))
+            if burst.last_timestamp + self.__window >= position:
+                break
+            del bursts[source]
+            completed.append(burst)
+            self.__open_bursts -= 1
+
+        while self.__open_bursts > self.__max_keys:
+            _, burst = max(self.__bursts.values(), key=len).popitem(last=False)
+            completed.append(burst)
+            self.__open_bursts -= 1
+
+    # returns all bursts which are still open
+    def flush(self) -> list:
+        completed = list()
+        for log_source, pending in self.__pending.items():
+            while len(pending) > 0:
+                self.__release(log_source, heapq.heappop(pending), completed)
+        for bursts in self.__bursts.values():
+            completed.extend(bursts.values())
+        self.__bursts.clear()
+        self.__open_bursts = 0
+        return completed
@@ -0,0 +1,107 @@
+import logging
+
+MISSING = object()
+
+
+# extracts a fixed set of fields (e.g. "/System/Provider/@Name") from decoded records. Records which are
+# created from the same template have the same structure, so the lookups are compiled into a function once per
+# structure. Every compiled plan checks that a record has its structure, before its values are returned.
+class FieldAccessorCache:
+    # number of plans which are kept, the most recently used plan is tried first
+    MAX_PLANS = 32
+
+    def __init__(self, paths: list):
+        self.__paths = list(paths)
+        self.__keys = [self.split_path(p) for p in self.__paths]
+        self.__plans = list()
+        self.__hits = 0
+        self.__misses = 0
+
+    # "/System/Provider/@Name" -> ['System', 'Provider', '#attributes', 'Name']
+    @staticmethod
+    def split_path(path: str) -> list:
+        keys = list()
+        for part in path.strip('/').split('/'):
+            if part.startswith('@'):
+                keys.extend(['#attributes', part[1:]])
+            else:
+                keys.append(part)
+        return keys
+
+    def __compile(self, event: dict):
+        guards = list()
+        values = list()
+        for keys in self.__keys:
+            node, expression = event, 'e'
+            for key in keys:
+                if type(node) is not dict:
+                    guards.append("type(%s) is not dict" % expression)
+                    node = MISSING
+                    break
+                if key not in node:
+                    guards.append("type(%s) is dict and %r not in %s" % (expression, key, expression))
+                    node = MISSING
+                    break
+                node = node[key]
+                expression = "%s[%r]" % (expression, key)
+
+            if node is MISSING:
+                values.append("None")
+            elif type(node) is dict:
+                # elements with attributes store their content in '#text'
+                if '#text' in node:
+                    guards.append("type(%s) is dict" % expression)
+                    values.append("%s['#text']" % expression)
+                else:
+                    guards.append("type(%s) is dict and '#text' not in %s" % (expression, expression))
+                    values.append("None")
+            else:
+                guards.append("type(%s) is not dict" % expression)
+                values.append(expression)
+
+        source = "def plan(e):\n" \
+                 "    if not (%s):\n" \
+                 "        raise LookupError()\n" \
+                 "    return (%s,)\n" % (" and ".join(guards) or "True", ", ".join(values))
+        namespace = dict()
+        exec(source, namespace)
+        return namespace['plan']
+
+    # returns the values of all fields, in the order of the paths, and None for fields which do not exist
+    def extract(self, event: dict) -> tuple:
+        plans = self.__plans
+        for idx, plan in enumerate(plans):
+            try:
+                values = plan(event)
+            except (LookupError, TypeError):
+                continue
+            self.__hits += 1
+            if idx > 0:
+                self.__plans = [plan] + [p for p in plans if p is not plan]
+            return values
+
+        self.__misses += 1
+        plan = self.__compile(event)
+        self.__plans = [plan] + plans[:self.MAX_PLANS - 1]
+        return plan(event)
+
+    @property
+    def paths(self) -> list:
+        return list(self.__paths)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.__hits + self.__misses
+        return self.__hits / total if total > 0 else 0.0
+
+    def log_statistics(self, name: str):
+        logging.info("{name}: {hits} of {total} records decoded with a cached plan ({rate:.2%})".format(
+            name=name, hits=self.__hits, total=self.__hits + self.__misses, rate=self.hit_rate))
@@ -0,0 +1,159 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from evtxtools.WindowsEvent import WindowsEvent
+
+
+class Hop(NamedTuple):
+    source_host: str
+    target_host: str
+    account: str
+    process_name: str
+    logon_type: str
+    ip_address: str
+    source_timestamp: datetime
+    target_timestamp: datetime
+
+    def __str__(self):
+        return "%s {%s} -> {%s}: %s using %s (%s login at %s from %s)" % (
+            self.source_timestamp,
+            self.source_host,
+            self.target_host,
+            self.account,
+            self.process_name,
+            self.logon_type,
+            self.target_timestamp,
+            self.ip_address
+        )
+
+
+class LateralMovementJoin:
+    REMOTE_LOGON_TYPES = {'Network', 'NetworkCleartext', 'RemoteInteractive'}
+    LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+    def __init__(self, tolerance: timedelta, include_machine_accounts: bool = False):
+        self.__tolerance = tolerance
+        self.__include_machine_accounts = include_machine_accounts
+
+        # both maps are bucketed by account name, every bucket is sorted by time before it is joined
+        self.__attempts = dict()
+        self.__logons = dict()
+
+    @staticmethod
+    def normalize_host(hostname: str):
+        if hostname is None or hostname in ('', '-'):
+            return None
+        hostname = hostname.lower()
+        if hostname.startswith('\\\\'):
+            hostname = hostname[2:]
+        # IP addresses must not be truncated
+        if not hostname.replace('.', '').isdigit():
+            hostname = hostname.split('.')[0]
+        return hostname
+
+    def __account_key(self, user_name: str):
+        if not user_name or user_name == '-':
+            return None
+        if user_name.endswith('$') and not self.__include_machine_accounts:
+            return None
+        return user_name.lower()
+
+    def add_event(self, event: WindowsEvent, hostname: str = None):
+        host = self.normalize_host(hostname or event.computer)
+        data = event.event_data
+        account = self.__account_key(data.get('TargetUserName'))
+        if host is None or account is None:
+            return
+
+        if event.event_id == 4648:
+            target_host = self.normalize_host(data.get('TargetServerName'))
+            if target_host in self.LOCAL_HOSTS or target_host == host:
+                return
+            self.__attempts.setdefault(account, list()).append((
+                event.timestamp,
+                host,
+                target_host,
+                "%s\\%s" % (data.get('TargetDomainName') or '-', data.get('TargetUserName')),
+                data.get('ProcessName') or '-'
+            ))
+        elif event.event_id == 4624:
+            logon_type = data.get('LogonType')
+            if logon_type not in self.REMOTE_LOGON_TYPES:
+                return
+            self.__logons.setdefault(account, list()).append((
+                event.timestamp,
+                host,
+                logon_type,
+                data.get('IpAddress') or '-'
+            ))
+
+    # joins explicit credential usage with remote logons on other hosts, using a sorted sweep per account
+    def hops(self) -> list:
+        hops = list()
+        for account, attempts in self.__attempts.items():
+            logons = self.__logons.get(account)
+            if not logons:
+                continue
+            attempts.sort(key=lambda a: a[0])
+            logons.sort(key=lambda l: l[0])
+
+            first = 0
+            for timestamp, source_host, target_host, account_name, process_name in attempts:
+                while first < len(logons) and logons[first][0] < timestamp - self.__tolerance:
+                    first += 1
+                idx = first
+                while idx < len(logons) and logons[idx][0] <= timestamp + self.__tolerance:
+                    logon_timestamp, logon_host, logon_type, ip_address = logons[idx]
+                    idx += 1
+                    if logon_host == source_host:
+                        continue
+                    if target_host is not None and target_host != logon_host:
+                        continue
+                    hops.append(Hop(source_host=source_host,
+                                    target_host=logon_host,
+                                    account=account_name,
+                                    process_name=process_name,
+                                    logon_type=logon_type,
+                                    ip_address=ip_address,
+                                    source_timestamp=timestamp,
+                                    target_timestamp=logon_timestamp))
+        hops.sort(key=lambda h: h.source_timestamp)
+        return hops
+
+    # links hops to chains A -> B -> C, where the hop from B starts not later than max_gap after the hop to B
+    def chains(self, max_gap: timedelta) -> list:
+        hops = self.hops()
+        by_source = dict()
+        for idx, hop in enumerate(hops):
+            times, indices = by_source.setdefault(hop.source_host, (list(), list()))
+            times.append(hop.source_timestamp)
+            indices.append(idx)
+
+        successor = dict()
+        for idx, hop in enumerate(hops):
+            if hop.target_host not in by_source:
+                continue
+            # hops are sorted by time, so are the candidates
+            times, candidates = by_source[hop.target_host]
+            pos = bisect.bisect_left(times, hop.source_timestamp)
+            while pos < len(candidates) and times[pos] <= hop.target_timestamp + max_gap:
+                if candidates[pos] != idx:
+                    successor[idx] = candidates[pos]
+                    break
+                pos += 1
+
+        has_predecessor = set(successor.values())
+        chains = list()
+        for idx in range(len(hops)):
+            if idx in has_predecessor or idx not in successor:
+                continue
+            chain = [hops[idx]]
+            visited = {idx}
+            next_idx = successor.get(idx)
+            while next_idx is not None and next_idx not in visited:
+                chain.append(hops[next_idx])
+                visited.add(next_idx)
+                next_idx = successor.get(next_idx)
+            chains.append(chain)
+        return chains
@@ -0,0 +1,142 @@
+import bisect
+from datetime import datetime
+
+from evtxtools.Activity import Activity
+from evtxtools.WindowsEvent import WindowsEvent
+
+PROCESS_EVENT_IDS = {4688, 4689}
+
+
+def parse_pid(pid: str):
+    if pid is None:
+        return None
+    try:
+        return int(pid, 0)
+    except ValueError:
+        return None
+
+
+def normalize_logon_id(logon_id: str):
+    if logon_id is None or logon_id in ('', '-', '0x0'):
+        return None
+    try:
+        return hex(int(logon_id, 0))
+    except ValueError:
+        return logon_id.lower()
+
+
+class Process:
+    __slots__ = ('computer', 'pid', 'parent_pid', 'name', 'command_line', 'created', 'exited', 'logon_id',
+                 'parent', 'children')
+
+    def __init__(self, event: WindowsEvent):
+        data = event.event_data
+        self.computer = event.computer
+        self.pid = parse_pid(data.get('NewProcessId'))
+        self.parent_pid = parse_pid(data.get('ProcessId'))
+        self.name = data.get('NewProcessName') or '-'
+        self.command_line = data.get('CommandLine') or ''
+        self.created = event.timestamp
+        self.exited = None
+        # processes which have been started with other credentials carry their own logon id
+        self.logon_id = normalize_logon_id(data.get('TargetLogonId')) or \
+            normalize_logon_id(data.get('SubjectLogonId'))
+        self.parent = None
+        self.children = list()
+
+    def __str__(self):
+        return "%s %s (%d)%s" % (
+            self.created,
+            self.name,
+            self.pid,
+            ": " + self.command_line if self.command_line else ""
+        )
+
+    def latex_str(self):
+        return "\\lstinline!%s! (%d)" % (self.command_line or self.name, self.pid)
+
+
+class ProcessTreeBuilder:
+    def __init__(self):
+        # (computer, pid) -> processes which used this pid, sorted by creation time once all events have been read
+        self.__processes = dict()
+        self.__created = dict()
+        self.__exits = list()
+        self.__sessions = None
+
+    def add_event(self, event: WindowsEvent):
+        if event.event_id == 4688:
+            process = Process(event)
+            if process.pid is not None:
+                self.__processes.setdefault((process.computer, process.pid), list()).append(process)
+        elif event.event_id == 4689:
+            pid = parse_pid(event.event_data.get('ProcessId'))
+            if pid is not None:
+                self.__exits.append((event.computer, pid, event.timestamp))
+        self.__sessions = None
+
+    # returns the process which used `pid` at `timestamp`, taking into account that process ids are reused
+    def lookup(self, computer: str, pid: int, timestamp: datetime):
+        processes = self.__processes.get((computer, pid))
+        if processes is None:
+            return None
+        idx = bisect.bisect_right(self.__created[(computer, pid)], timestamp) - 1
+        if idx < 0:
+            return None
+        process = processes[idx]
+        if process.exited is not None and process.exited < timestamp:
+            return None
+        return process
+
+    def __resolve(self):
+        for key, processes in self.__processes.items():
+            processes.sort(key=lambda p: p.created)
+            self.__created[key] = [p.created for p in processes]
+            for p in processes:
+                p.parent = None
+                p.children.clear()
+
+        for computer, pid, timestamp in self.__exits:
+            process = self.lookup(computer, pid, timestamp)
+            if process is not None and (process.exited is None or timestamp < process.exited):
+                process.exited = timestamp
+
+        self.__sessions = dict()
+        for processes in self.__processes.values():
+            for p in processes:
+                if p.parent_pid is not None:
+                    p.parent = self.lookup(p.computer, p.parent_pid, p.created)
+                    if p.parent is p:
+                        p.parent = None
+                    if p.parent is not None:
+                        p.parent.children.append(p)
+
+        for processes in self.__processes.values():
+            for p in processes:
+                if p.logon_id is None:
+                    continue
+                if p.parent is None or p.parent.logon_id != p.logon_id:
+                    self.__sessions.setdefault((p.computer, p.logon_id), list()).append(p)
+
+        for roots in self.__sessions.values():
+            roots.sort(key=lambda p: p.created)
+
+    # returns the root processes which have been started in the logon session of `activity`
+    def trees(self, activity: Activity) -> list:
+        if self.__sessions is None:
+            self.__resolve()
+        if activity.begin_event is None:
+            return []
+        # the activity id is the correlation ActivityID of the logon event, if Windows has set one
+        logon_id = normalize_logon_id(activity.begin_event.event_data.get('TargetLogonId')) or \
+            normalize_logon_id(activity.activity_id)
+        return self.__sessions.get((activity.begin_event.computer, logon_id), [])
+
+    @staticmethod
+    def walk(roots: list):
+        stack = [(p, 0) for p in reversed(roots)]
+        while len(stack) > 0:
+            process, depth = stack.pop()
+            yield process, depth
+            for child in sorted(process.children, key=lambda p: p.created, reverse=True):
+                stack.append((child, depth + 1))
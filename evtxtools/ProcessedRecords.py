@@ -0,0 +1,127 @@
+import bisect
+import io
+import json
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+
+from evtx import PyEvtxParser
+
+from evtxtools.EvtxChunk import CHUNK_MAGIC, CHUNK_SIZE, CHUNK_HEADER_SIZE, parse_chunk_header, \
+    header_checksum_valid, chunk_offsets, write_evtx_file
+
+# the event log service rotates e.g. Security.evtx to Archive-Security-2021-01-31-23-59-59-123.evtx
+ARCHIVE_PATTERN = re.compile(r'^Archive-(.+)-\d{4}-\d{2}-\d{2}-\d{2}-\d{2}-\d{2}-\d{3}\.evtx$', re.IGNORECASE)
+
+
+# returns the name of the log a file belongs to, which is the same for a log and its archives
+def log_name(filename: str) -> str:
+    match = ARCHIVE_PATTERN.match(filename)
+    if match is not None:
+        return match.group(1)
+    return filename[:-len('.evtx')] if filename.lower().endswith('.evtx') else filename
+
+
+# sorted list of disjoint, inclusive ranges of record ids
+class RecordRanges:
+    def __init__(self, ranges: list = None):
+        self.__ranges = [tuple(r) for r in ranges or []]
+        self.__starts = [r[0] for r in self.__ranges]
+
+    def __contains__(self, record_id: int) -> bool:
+        idx = bisect.bisect_right(self.__starts, record_id) - 1
+        return idx >= 0 and self.__ranges[idx][1] >= record_id
+
+    def covers(self, first: int, last: int) -> bool:
+        idx = bisect.bisect_right(self.__starts, first) - 1
+        return idx >= 0 and self.__ranges[idx][1] >= last
+
+    def add(self, record_ids):
+        ranges = list(self.__ranges)
+        for record_id in sorted(record_ids):
+            if len(ranges) > 0 and ranges[-1][0] <= record_id <= ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], record_id))
+            else:
+                ranges.append((record_id, record_id))
+
+        merged = list()
+        for first, last in sorted(ranges):
+            if len(merged) > 0 and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        self.__ranges = merged
+        self.__starts = [r[0] for r in merged]
+
+    def to_list(self) -> list:
+        return [list(r) for r in self.__ranges]
+
+
+# returns the records of an evtx file which are not contained in `processed`. Chunks whose header shows that
+# they contain only processed records are not parsed. Chunks with an invalid header, e.g. one which is still
+# being written, are always parsed.
+def new_records(path: Path, processed: RecordRanges):
+    size = os.stat(path).st_size
+    if size == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        chunks = list()
+        for offset in chunk_offsets(size):
+            # only the header is read from chunks which are skipped
+            chunk_header = m[offset:offset + CHUNK_HEADER_SIZE]
+            if chunk_header[:len(CHUNK_MAGIC)] != CHUNK_MAGIC:
+                continue
+            header = parse_chunk_header(chunk_header)
+            if header_checksum_valid(chunk_header, header) and processed.covers(header.first_record_id,
+                                                                               header.last_record_id):
+                continue
+            chunks.append(m[offset:offset + CHUNK_SIZE])
+
+    if len(chunks) == 0:
+        return
+    new_chunks = io.BytesIO()
+    write_evtx_file(new_chunks, chunks)
+    new_chunks.seek(0)
+    for record in PyEvtxParser(new_chunks).records_json():
+        if record['event_record_id'] not in processed:
+            yield record
+
+
+# remembers which records of every log of every directory have been processed. Record ids keep increasing when a
+# log is rotated, so the records of an archive are known to be processed if they have been read from the log
+# before it was rotated, and vice versa.
+class ProcessedRecords:
+    def __init__(self, root: Path, state_file: Path = None):
+        self.__root = root
+        self.__state_file = state_file
+        self.__lock = threading.Lock()
+        self.__logs = dict()
+        if state_file is not None and state_file.is_file():
+            with open(state_file, 'r') as f:
+                self.__logs = {key: RecordRanges(ranges) for key, ranges in json.load(f).items()}
+
+    def key(self, path: Path) -> str:
+        return str(path.parent.relative_to(self.__root) / log_name(path.name))
+
+    def of(self, path: Path) -> RecordRanges:
+        with self.__lock:
+            return RecordRanges(self.__logs.get(self.key(path), RecordRanges()).to_list())
+
+    def add(self, path: Path, record_ids: list):
+        if len(record_ids) == 0:
+            return
+        key = self.key(path)
+        with self.__lock:
+            self.__logs.setdefault(key, RecordRanges()).add(record_ids)
+            self.__save()
+
+    # the state is replaced atomically, so that it is never lost if the process is killed
+    def __save(self):
+        if self.__state_file is None:
+            return
+        temp_file = self.__state_file.with_name(self.__state_file.name + '.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump({key: ranges.to_list() for key, ranges in self.__logs.items()}, f, indent=1, sort_keys=True)
+        os.replace(temp_file, self.__state_file)
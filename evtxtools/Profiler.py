@@ -0,0 +1,178 @@
+import cProfile
+import contextlib
+import heapq
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from evtxtools.EventSource import EVENT_ID_PATTERN
+
+
+# profiles the stages of the event pipeline (reader, workers, correlation) separately, in all threads and
+# processes which use it. Every process writes its own files into `output_dir`, which are merged by report():
+# - <stage>-<pid>-<thread>.prof: cProfile statistics of one thread
+# - stacks-<pid>.collapsed: sampled call stacks, one line per stack ("stage;frame;frame count"), which can be
+#   rendered with flamegraph.pl or speedscope
+# - slow-records-<pid>.tsv: the records which took longest to parse or to decode
+# Since Python 3.12, cProfile uses sys.monitoring, which allows only one active profiler per process, and which
+# records the calls of all threads. So stages are profiled only by sampling there, which is written per stage as well.
+class Profiler:
+    SAMPLING_INTERVAL = 0.005
+    PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+    def __init__(self, output_dir: Path, slow_records: int = 20, sampling_interval: float = SAMPLING_INTERVAL):
+        self.__output_dir = output_dir
+        self.__slow_records = slow_records
+        self.__sampling_interval = sampling_interval
+        self.__init_process()
+
+        # files of previous runs would be merged into the report, and files of the user must not be overwritten
+        if output_dir.exists() and (not output_dir.is_dir() or any(output_dir.iterdir())):
+            raise ValueError("{0} must be an empty directory, or must not exist".format(output_dir))
+
+    # profilers are passed to worker processes, which must start their own sampler
+    def __getstate__(self):
+        return self.__output_dir, self.__slow_records, self.__sampling_interval
+
+    def __setstate__(self, state):
+        self.__output_dir, self.__slow_records, self.__sampling_interval = state
+        self.__init_process()
+
+    def __init_process(self):
+        self.__pid = os.getpid()
+        self.__lock = threading.Lock()
+        self.__stages = dict()
+        self.__stacks = Counter()
+        self.__slowest = list()
+        self.__sampler = None
+        self.__stop = threading.Event()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        # forked processes inherit the samples and the (stopped) sampler of their parent
+        if self.__pid != os.getpid():
+            self.__init_process()
+        self.__output_dir.mkdir(parents=True, exist_ok=True)
+        thread = threading.get_ident()
+        with self.__lock:
+            self.__stages[thread] = name
+            if self.__sampler is None:
+                self.__sampler = threading.Thread(target=self.__sample, daemon=True)
+                self.__sampler.start()
+
+        profile = None
+        if self.PER_THREAD_CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # e.g. another profiler is active, the stage is still sampled
+                logging.warning("profiling stage {name} only by sampling: {error}".format(name=name, error=e))
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self.__output_dir / "{stage}-{pid}-{thread}.prof".format(
+                    stage=name, pid=os.getpid(), thread=thread))
+            with self.__lock:
+                del self.__stages[thread]
+
+    @staticmethod
+    def __frame_name(frame) -> str:
+        code = frame.f_code
+        return "{function} ({file}:{line})".format(
+            function=code.co_name, file=os.path.basename(code.co_filename), line=code.co_firstlineno)
+
+    def __sample(self):
+        while not self.__stop.wait(self.__sampling_interval):
+            with self.__lock:
+                stages = dict(self.__stages)
+            frames = sys._current_frames()
+            for thread, name in stages.items():
+                frame = frames.get(thread)
+                stack = list()
+                while frame is not None:
+                    stack.append(self.__frame_name(frame))
+                    frame = frame.f_back
+                stack.append(name)
+                self.__stacks[";".join(reversed(stack))] += 1
+
+    # remembers a record, if it is one of the slowest records of a stage. `begin` is the value of
+    # time.perf_counter() before the record has been processed
+    def record_finished(self, stage: str, filename, record: dict, begin: float):
+        duration = time.perf_counter() - begin
+        if len(self.__slowest) < self.__slow_records or duration > self.__slowest[0][0]:
+            self.add_slow_record(stage, filename, record, duration)
+
+    def add_slow_record(self, stage: str, filename, record: dict, duration: float):
+        event_id = EVENT_ID_PATTERN.search(record['data'])
+        entry = (duration, stage, str(filename), record.get('event_record_id'),
+                 int(event_id.group(1)) if event_id else None)
+        with self.__lock:
+            if len(self.__slowest) < self.__slow_records:
+                heapq.heappush(self.__slowest, entry)
+            elif duration > self.__slowest[0][0]:
+                heapq.heapreplace(self.__slowest, entry)
+
+    # writes the sampled stacks and slow records of this process
+    def flush(self):
+        self.__stop.set()
+        if self.__sampler is not None:
+            self.__sampler.join()
+        self.__output_dir.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        with open(self.__output_dir / "stacks-{pid}.collapsed".format(pid=pid), 'w') as f:
+            for stack, count in self.__stacks.items():
+                f.write("%s %d\n" % (stack, count))
+        with open(self.__output_dir / "slow-records-{pid}.tsv".format(pid=pid), 'w') as f:
+            for entry in self.__slowest:
+                f.write("%.6f\t%s\t%s\t%s\t%s\n" % entry)
+
+    # merges the files of all processes and returns the slowest records
+    def report(self) -> list:
+        self.flush()
+        stages = dict()
+        for f in self.__output_dir.glob("*-*-*.prof"):
+            stages.setdefault(f.name.split('-')[0], list()).append(str(f))
+        for stage, files in stages.items():
+            pstats.Stats(*files).dump_stats(self.__output_dir / "{stage}.prof".format(stage=stage))
+
+        stacks = Counter()
+        for f in self.__output_dir.glob("stacks-*.collapsed"):
+            with open(f) as lines:
+                for line in lines:
+                    stack, count = line.rstrip("\n").rsplit(" ", 1)
+                    stacks[stack] += int(count)
+        with open(self.__output_dir / "stacks.collapsed", 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write("%s %d\n" % (stack, count))
+        # the stacks of every stage, which replace its cProfile statistics if they could not be recorded
+        stage_stacks = dict()
+        for stack, count in sorted(stacks.items()):
+            stage, _, frames = stack.partition(";")
+            stage_stacks.setdefault(stage, list()).append((frames, count))
+        for stage, lines in stage_stacks.items():
+            with open(self.__output_dir / "{stage}.collapsed".format(stage=stage), 'w') as f:
+                for frames, count in lines:
+                    f.write("%s %d\n" % (frames, count))
+
+        slowest = list()
+        for f in self.__output_dir.glob("slow-records-*.tsv"):
+            with open(f) as lines:
+                for line in lines:
+                    duration, stage, filename, record_id, event_id = line.rstrip("\n").split("\t")
+                    slowest.append((float(duration), stage, filename, record_id, event_id))
+        slowest = heapq.nlargest(self.__slow_records, slowest)
+        with open(self.__output_dir / "slow-records.tsv", 'w') as f:
+            f.write("seconds\tstage\tfile\trecord id\tevent id\n")
+            for entry in slowest:
+                f.write("%.6f\t%s\t%s\t%s\t%s\n" % entry)
+        return slowest
@@ -1,102 +1,154 @@
+import collections
+import contextlib
 import math
 import os, sys
 import queue
 import threading
+import time
 import logging
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-from evtx import PyEvtxParser
-
+from evtxtools.EventSource import event_source
 from evtxtools.WindowsEvent import WindowsEvent
 
+if TYPE_CHECKING:
+    # deduplication and profiling are optional, their modules are only loaded if they are used
+    from evtxtools.EventDeduplicator import EventDeduplicator
+    from evtxtools.Profiler import Profiler
+
 
 class RawEventList:
-    def __init__(self, files: list, included_event_ids: set, from_date: datetime, to_date: datetime):
-        self.__files = files
+    # records are passed between the threads in batches, to reduce the locking overhead per record
+    BATCH_SIZE = 500
+
+    # limits the number of batches held in the queues, if the reader is faster than the consumers
+    QUEUE_SIZE = 32
+
+    def __init__(self, files: list, included_event_ids: set, from_date: datetime, to_date: datetime,
+                 deduplicator: 'EventDeduplicator' = None, profiler: 'Profiler' = None):
+        # files are read in the order of the list, in which archive members are decompressed in advance
+        self.__files = collections.deque(files)
+        self.__deduplicator = deduplicator
+        self.__profiler = profiler
         self.__included_event_ids = included_event_ids
         self.__from_date = from_date
         self.__to_date = to_date
 
     def __iter__(self):
-        self.__events = dict()
-        self.__queue = queue.Queue()
-        self.__results = queue.Queue()
+        self.__queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.__results = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.__batch = iter(())
         self.__reader = None
-        self.__reader_thread = threading.Thread(target=self.__event_reader_worker)
+        self.__worker_count = math.ceil(os.cpu_count() / 2)
+        self.__running_workers = self.__worker_count
+
+        # threads are daemons, because they would block forever if the consumer stops iterating
+        self.__reader_thread = threading.Thread(target=self.__event_reader_worker, daemon=True)
         self.__reader_thread.start()
-        self.__workers = set()
-        for _ in range(0, math.ceil(os.cpu_count() / 2)):
-            th = threading.Thread(target=self.__event_parser_worker)
-            self.__workers.add(th)
-            th.start()
+        for _ in range(0, self.__worker_count):
+            threading.Thread(target=self.__event_parser_worker, daemon=True).start()
         return self
 
     def __next__(self):
-        # if there are no workers anymore, no further results can be expected
-        while len(self.__workers) > 0:
-            # there are still workers, but maybe they return no result anymore
+        while True:
             try:
-                return self.__results.get(timeout=1)
-            except queue.Empty:
-                continue
-        try:
-            return self.__results.get_nowait()
-        except queue.Empty:
-            raise StopIteration
+                return next(self.__batch)
+            except StopIteration:
+                pass
 
-    def __event_parser_worker(self):
-        while True:
-            if self.__reader_thread is None:  # no records will ever be made available to be parsed
-                try:
-                    record = self.__queue.get_nowait()
-                except queue.Empty:
-                    # this may happen if another worker has removed the last remaining element
-                    # after we have checked that the queue is not empty
-                    self.__workers.remove(threading.current_thread())
-                    return
+            # every worker sends None when it has finished
+            if self.__running_workers == 0:
+                raise StopIteration
+            batch = self.__results.get()
+            if batch is None:
+                self.__running_workers -= 1
             else:
-                try:
-                    record = self.__queue.get(timeout=1)
-                except queue.Empty:
-                    # this may happen if all records provided by the reader got consumed by other workers
-                    continue
-            assert record is not None
+                self.__batch = iter(batch)
 
-            try:
-                self.__results.put(WindowsEvent(record,
-                                                self.__included_event_ids,
-                                                self.__from_date,
-                                                self.__to_date))
-            except WindowsEvent.IgnoreThisEvent:
-                pass
+    def __stage(self, name: str):
+        if self.__profiler is None:
+            return contextlib.nullcontext()
+        return self.__profiler.stage(name)
 
-            self.__queue.task_done()
+    def __event_parser_worker(self):
+        profiler = self.__profiler
+        try:
+            with self.__stage('decoder'):
+                while True:
+                    batch = self.__queue.get()
+                    if batch is None:
+                        return
+
+                    filename, records = batch
+                    events = list()
+                    for record in records:
+                        if profiler is not None:
+                            begin = time.perf_counter()
+                        try:
+                            events.append(WindowsEvent(record,
+                                                       self.__included_event_ids,
+                                                       self.__from_date,
+                                                       self.__to_date))
+                        except WindowsEvent.IgnoreThisEvent:
+                            pass
+                        except Exception as e:
+                            # a single malformed record must not stop the worker and truncate the results
+                            logging.error("{filename}: skipping record {record_id}: {error}".format(
+                                filename=str(filename), record_id=record.get('event_record_id'), error=repr(e)))
+                        if profiler is not None:
+                            profiler.record_finished('decoder', filename, record, begin)
+                    if len(events) > 0:
+                        self.__results.put(events)
+        finally:
+            self.__results.put(None)
 
     def __event_reader_worker(self):
-        event = self.__get_next_record()
-        while event is not None:
-            self.__queue.put(event)
-            event = self.__get_next_record()
-        self.__reader_thread = None
+        batch = list()
+        batch_file = None
+        try:
+            with self.__stage('reader'):
+                record = self.__get_next_record()
+                while record is not None:
+                    # duplicates are dropped before they are decoded by the workers
+                    if self.__deduplicator is not None and self.__deduplicator.is_duplicate(record):
+                        record = self.__get_next_record()
+                        continue
+                    # every batch contains records of only one file
+                    if self.__current_file is not batch_file and len(batch) > 0:
+                        self.__queue.put((batch_file, batch))
+                        batch = list()
+                    batch_file = self.__current_file
+                    batch.append(record)
+                    if len(batch) >= self.BATCH_SIZE:
+                        self.__queue.put((batch_file, batch))
+                        batch = list()
+                    record = self.__get_next_record()
+                if len(batch) > 0:
+                    self.__queue.put((batch_file, batch))
+        finally:
+            for _ in range(0, self.__worker_count):
+                self.__queue.put(None)
 
     def __get_next_record(self):
         while len(self.__files) > 0 or self.__reader is not None:
             if self.__reader is None:
-                self.__current_file = self.__files.pop()
-                self.__reader = PyEvtxParser(str(self.__current_file)).records_json()
+                self.__current_file = self.__files.popleft()
+                # evtx files or exported events
+                self.__reader = event_source(self.__current_file).records()
 
             try:
-                return self.__reader.__next__()
+                if self.__profiler is None:
+                    return self.__reader.__next__()
+                begin = time.perf_counter()
+                record = self.__reader.__next__()
+                self.__profiler.record_finished('reader', self.__current_file, record, begin)
+                return record
             except StopIteration:
                 self.__reader = None
             except RuntimeError as e:
+                # e.g. a zstd compressed file, if zstandard is not installed
                 logging.fatal("fatal error while parsing {filename}:".format(filename=str(self.__current_file)))
                 logging.fatal(str(e))
-                continue
-        return None
-
-    @staticmethod
-    def __fill_queue(self, fstream):
-        records = PyEvtxParser(fstream)
-        for record in records.records():
-            self.__queue.put(record)
\ No newline at end of file
+                self.__reader = None
+        return None
\ No newline at end of file
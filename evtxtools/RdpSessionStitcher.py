@@ -0,0 +1,68 @@
+import bisect
+from datetime import timedelta
+
+from evtxtools.Activity import Activity
+
+
+class RdpSessionStitcher:
+    def __init__(self, tolerance: timedelta):
+        self.__tolerance = tolerance
+
+    @staticmethod
+    def connection_ip(activity: Activity):
+        event = activity.begin_event
+        if event is None or event.event_id != 131:
+            return None
+        client_ip = event.event_data.get('ClientIP')
+        if not client_ip:
+            return None
+        # ClientIP contains the source port, e.g. 10.0.0.1:50123 or [fe80::1]:50123
+        ip, _, port = client_ip.rpartition(':')
+        if not ip or not port.isdigit():
+            ip = client_ip
+        return ip.strip('[]')
+
+    @staticmethod
+    def logon_ip(activity: Activity):
+        event = activity.begin_event
+        if event is None or event.event_id != 4624:
+            return None
+        if event.event_data.get('LogonType') != 'RemoteInteractive':
+            return None
+        ip = event.event_data.get('IpAddress')
+        if not ip or ip == '-':
+            return None
+        return ip
+
+    # merges every RDP connection (131/103) into the RemoteInteractive logon (4624/4634/4647) which
+    # follows it from the same client address, and returns the connections which have been merged
+    def stitch(self, activities: list) -> list:
+        logons = dict()
+        connections = dict()
+        for activity in activities:
+            ip = self.logon_ip(activity)
+            if ip is not None:
+                logons.setdefault((activity.hostname, ip), list()).append(activity)
+                continue
+            ip = self.connection_ip(activity)
+            if ip is not None:
+                connections.setdefault((activity.hostname, ip), list()).append(activity)
+
+        merged = list()
+        for key, ip_connections in connections.items():
+            ip_logons = logons.get(key)
+            if ip_logons is None:
+                continue
+            ip_logons.sort(key=lambda a: a.session_begin)
+            begin_times = [a.session_begin for a in ip_logons]
+            ip_connections.sort(key=lambda a: a.session_begin)
+
+            # every logon is matched at most once and both lists are sorted, so the search never moves backwards
+            next_logon = 0
+            for connection in ip_connections:
+                idx = max(next_logon, bisect.bisect_left(begin_times, connection.session_begin))
+                if idx < len(ip_logons) and begin_times[idx] <= connection.session_begin + self.__tolerance:
+                    ip_logons[idx].absorb(connection)
+                    merged.append(connection)
+                    next_logon = idx + 1
+        return merged
@@ -0,0 +1,60 @@
+import time
+
+from evtxtools.DetectionRule import DetectionRule, detection_rules
+from evtxtools.EventDescriptor import EVENT_DESCRIPTORS
+from evtxtools.WindowsEvent import WindowsEvent
+
+
+class RuleEngine:
+    def __init__(self, rules: list = None):
+        self.__index = dict()
+        self.__rules = dict()
+        self.__hits = dict()
+        self.__match_time = dict()
+        for rule in (detection_rules() if rules is None else rules):
+            self.add_rule(rule)
+
+    def add_rule(self, rule: DetectionRule):
+        if rule.name in self.__rules:
+            raise ValueError("duplicate rule name '{name}'".format(name=rule.name))
+
+        for event_id in rule.event_ids:
+            descriptor = EVENT_DESCRIPTORS.get(event_id)
+            if descriptor is None or descriptor.log_source != rule.log_source:
+                raise ValueError("rule '{name}' refers to event {event_id} of '{log_source}', "
+                                 "which is not listed in EVENT_DESCRIPTORS".format(name=rule.name,
+                                                                                  event_id=event_id,
+                                                                                  log_source=rule.log_source.value))
+
+        self.__rules[rule.name] = rule
+        self.__hits[rule.name] = 0
+        self.__match_time[rule.name] = 0
+        for event_id in rule.event_ids:
+            self.__index.setdefault((rule.log_source, event_id), list()).append(rule)
+
+    @property
+    def event_ids(self) -> set:
+        return set(event_id for _, event_id in self.__index.keys())
+
+    @property
+    def log_sources(self) -> set:
+        return set(log_source for log_source, _ in self.__index.keys())
+
+    def match(self, event: WindowsEvent) -> list:
+        rules = self.__index.get((event.log_source, event.event_id))
+        if rules is None:
+            return []
+
+        matches = list()
+        for rule in rules:
+            start = time.perf_counter_ns()
+            matched = rule.matches(event)
+            self.__match_time[rule.name] += time.perf_counter_ns() - start
+            if matched:
+                self.__hits[rule.name] += 1
+                matches.append(rule)
+        return matches
+
+    # returns a list of (rule, number of hits, time spent in matching in seconds)
+    def statistics(self) -> list:
+        return [(rule, self.__hits[name], self.__match_time[name] / 1e9) for name, rule in self.__rules.items()]
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from evtxtools.WindowsEvent import WindowsEvent
+
+
+class ScriptBlock:
+    def __init__(self, script_block_id: str, total: int, path: str, timestamp: datetime):
+        self.__script_block_id = script_block_id
+        self.__total = total
+        self.__path = path
+        self.__timestamp = timestamp
+        self.__parts = dict()
+        self.__memory = 0
+
+        # parts which have been moved to the spill file of the reassembler: number -> (offset, length)
+        self.__spilled_parts = dict()
+
+    @property
+    def script_block_id(self) -> str:
+        return self.__script_block_id
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def timestamp(self) -> datetime:
+        return self.__timestamp
+
+    @property
+    def memory(self) -> int:
+        return self.__memory
+
+    @property
+    def complete(self) -> bool:
+        return len(self.__parts) + len(self.__spilled_parts) == self.__total
+
+    @property
+    def missing_parts(self) -> int:
+        return self.__total - len(self.__parts) - len(self.__spilled_parts)
+
+    # returns the number of bytes which are now additionally held in memory
+    def add_part(self, number: int, text: str) -> int:
+        if number in self.__parts or number in self.__spilled_parts:
+            return 0
+        self.__parts[number] = text
+        self.__memory += len(text)
+        return len(text)
+
+    # appends all parts to the spill file and returns the number of bytes which have been freed
+    def spill(self, spill_file) -> int:
+        spill_file.seek(0, os.SEEK_END)
+        for number, text in self.__parts.items():
+            data = text.encode('utf-8')
+            self.__spilled_parts[number] = (spill_file.tell(), len(data))
+            spill_file.write(data)
+        freed = self.__memory
+        self.__parts.clear()
+        self.__memory = 0
+        return freed
+
+    def text(self, spill_file) -> str:
+        parts = list()
+        for number in sorted(set(self.__parts.keys()) | set(self.__spilled_parts.keys())):
+            if number in self.__parts:
+                parts.append(self.__parts[number])
+            else:
+                offset, length = self.__spilled_parts[number]
+                spill_file.seek(offset)
+                parts.append(spill_file.read(length).decode('utf-8'))
+        return "".join(parts)
+
+
+class ScriptBlockReassembler:
+    INDEX_FILE = 'index.tsv'
+
+    def __init__(self, output_dir: Path, max_memory: int, spill_dir: str = None):
+        self.__output_dir = output_dir
+        self.__max_memory = max_memory
+        self.__memory = 0
+        self.__blocks = dict()
+
+        # parts of all blocks are appended to one file, because thousands of blocks can be spilled at the same time
+        self.__spill_dir = spill_dir
+        self.__spill_file = None
+
+        # content hash -> [file name, number of occurrences, first occurrence, last occurrence, script block id, path]
+        self.__scripts = dict()
+
+    def add_event(self, event: WindowsEvent):
+        assert event.event_id == 4104
+        data = event.event_data
+        script_block_id = data.get('ScriptBlockId')
+        text = data.get('ScriptBlockText') or ''
+        try:
+            number = int(data.get('MessageNumber'))
+            total = int(data.get('MessageTotal'))
+        except (TypeError, ValueError):
+            number, total = 1, 1
+
+        if total == 1:
+            self.__store(text, script_block_id, data.get('Path'), event.timestamp)
+            return
+
+        block = self.__blocks.get(script_block_id)
+        if block is None:
+            block = ScriptBlock(script_block_id, total, data.get('Path'), event.timestamp)
+            self.__blocks[script_block_id] = block
+        self.__memory += block.add_part(number, text)
+
+        if block.complete:
+            self.__memory -= block.memory
+            del self.__blocks[script_block_id]
+            self.__store(block.text(self.__spill_file), block.script_block_id, block.path, block.timestamp)
+
+        while self.__memory > self.__max_memory:
+            if self.__spill_file is None:
+                self.__spill_file = tempfile.TemporaryFile(dir=self.__spill_dir)
+            largest = max(self.__blocks.values(), key=lambda b: b.memory)
+            self.__memory -= largest.spill(self.__spill_file)
+
+    def __store(self, text: str, script_block_id: str, path: str, timestamp: datetime, suffix='.ps1'):
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        script = self.__scripts.get(digest)
+        if script is None:
+            filename = digest + suffix
+            with open(self.__output_dir / filename, 'wb') as f:
+                f.write(data)
+            self.__scripts[digest] = [filename, 1, timestamp, timestamp, script_block_id, path or '']
+        else:
+            script[1] += 1
+            script[2] = min(script[2], timestamp)
+            script[3] = max(script[3], timestamp)
+
+    # stores all incomplete script blocks and writes the index of all scripts
+    def close(self):
+        for block in self.__blocks.values():
+            logging.warning("script block {id} is missing {n} parts".format(id=block.script_block_id,
+                                                                            n=block.missing_parts))
+            self.__store(block.text(self.__spill_file), block.script_block_id, block.path, block.timestamp,
+                         suffix='.partial.ps1')
+        self.__blocks.clear()
+        self.__memory = 0
+        if self.__spill_file is not None:
+            self.__spill_file.close()
+            self.__spill_file = None
+
+        with open(self.__output_dir / self.INDEX_FILE, 'w') as f:
+            f.write("file\toccurrences\tfirst\tlast\tscript_block_id\tpath\n")
+            for script in sorted(self.__scripts.values(), key=lambda s: s[2]):
+                f.write("\t".join(str(v) for v in script) + "\n")
+
+    @property
+    def scripts(self) -> int:
+        return len(self.__scripts)
@@ -0,0 +1,148 @@
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from evtxtools.Activity import Activity
+
+
+class Session(NamedTuple):
+    begin: datetime
+    # datetime.max, if the session has not been closed
+    end: datetime
+    hostname: str
+    activity_id: str
+    text: str
+    latex: str
+
+    # the logoff of a session can be logged before its logon (e.g. with unsynchronized clocks), but the interval
+    # tree requires that no session ends before it begins
+    @staticmethod
+    def from_activity(activity: Activity):
+        return Session(begin=activity.session_begin,
+                       end=max(activity.session_begin, activity.session_end),
+                       hostname=activity.hostname,
+                       activity_id=activity.activity_id,
+                       text=str(activity),
+                       latex=activity.latex_str())
+
+
+# centered interval tree, see https://en.wikipedia.org/wiki/Interval_tree#Centered_interval_tree
+class IntervalTree:
+    class Node:
+        __slots__ = ('center', 'by_begin', 'by_end', 'left', 'right')
+
+        def __init__(self, center, by_begin, by_end, left, right):
+            self.center = center
+            self.by_begin = by_begin
+            self.by_end = by_end
+            self.left = left
+            self.right = right
+
+    def __init__(self, sessions: list):
+        self.__root = self.__build(sessions)
+
+    @classmethod
+    def __build(cls, sessions: list):
+        if len(sessions) == 0:
+            return None
+        endpoints = sorted([s.begin for s in sessions] + [s.end for s in sessions])
+        center = endpoints[len(endpoints) // 2]
+
+        left, right, overlapping = list(), list(), list()
+        for s in sessions:
+            if s.end < center:
+                left.append(s)
+            elif s.begin > center:
+                right.append(s)
+            else:
+                overlapping.append(s)
+
+        return IntervalTree.Node(center=center,
+                                 by_begin=sorted(overlapping, key=lambda s: s.begin),
+                                 by_end=sorted(overlapping, key=lambda s: s.end, reverse=True),
+                                 left=cls.__build(left),
+                                 right=cls.__build(right))
+
+    # returns all sessions which overlap [begin, end]
+    def overlapping(self, begin: datetime, end: datetime) -> list:
+        result = list()
+        stack = [self.__root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end < node.center:
+                for s in node.by_begin:
+                    if s.begin > end:
+                        break
+                    result.append(s)
+                stack.append(node.left)
+            elif begin > node.center:
+                for s in node.by_end:
+                    if s.end < begin:
+                        break
+                    result.append(s)
+                stack.append(node.right)
+            else:
+                result.extend(node.by_begin)
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+    def at(self, timestamp: datetime) -> list:
+        return self.overlapping(timestamp, timestamp)
+
+
+class SessionIndex:
+    FORMAT_VERSION = 1
+
+    def __init__(self, sessions: list):
+        self.__sessions = sessions
+        by_host = dict()
+        for s in sessions:
+            by_host.setdefault(s.hostname, list()).append(s)
+        self.__trees = {hostname: IntervalTree(host_sessions) for hostname, host_sessions in by_host.items()}
+
+    @staticmethod
+    def from_activities(activities) -> 'SessionIndex':
+        return SessionIndex([Session.from_activity(a) for a in activities])
+
+    @staticmethod
+    def load(path: Path) -> 'SessionIndex':
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != SessionIndex.FORMAT_VERSION:
+            raise ValueError("{path} has an unsupported format".format(path=path))
+        return SessionIndex(data['sessions'])
+
+    def save(self, path: Path):
+        with open(path, 'wb') as f:
+            pickle.dump({'version': self.FORMAT_VERSION, 'sessions': self.__sessions}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @property
+    def sessions(self) -> list:
+        return sorted(self.__sessions, key=lambda s: s.begin)
+
+    @property
+    def hostnames(self) -> set:
+        return set(self.__trees.keys())
+
+    def __trees_of(self, hostname: str):
+        if hostname is None:
+            return self.__trees.values()
+        tree = self.__trees.get(hostname)
+        return [] if tree is None else [tree]
+
+    def at(self, timestamp: datetime, hostname: str = None) -> list:
+        result = list()
+        for tree in self.__trees_of(hostname):
+            result.extend(tree.at(timestamp))
+        return sorted(result, key=lambda s: s.begin)
+
+    def overlapping(self, begin: datetime, end: datetime, hostname: str = None) -> list:
+        result = list()
+        for tree in self.__trees_of(hostname):
+            result.extend(tree.overlapping(begin, end))
+        return sorted(result, key=lambda s: s.begin)
@@ -0,0 +1,313 @@
+import contextlib
+import heapq
+import logging
+import math
+import multiprocessing
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from evtxtools.EventDeduplicator import EventDeduplicator, COMPUTER_PATTERN
+from evtxtools.EventSource import event_source, is_splittable, split_export
+from evtxtools.EvtxArchive import ArchiveMember, EvtxArchive
+from evtxtools.EvtxParser import EvtxParser
+from evtxtools.Profiler import Profiler
+from evtxtools.WellKnownSids import WellKnownSidFilter
+from evtxtools.WindowsEvent import WindowsEvent
+
+# records are passed between the shards in batches, to reduce the pickling and locking overhead per record
+BATCH_SIZE = 500
+
+# rows and sessions are sent to the parent in batches
+RESULT_BATCH_SIZE = 1000
+
+
+def shard_of(record: dict, shards: int) -> int:
+    computer = COMPUTER_PATTERN.search(record['data'])
+    if computer is None:
+        return 0
+    return zlib.crc32(computer.group(1).lower().encode('utf-8')) % shards
+
+
+# opens a file or a range of a file. Archive members are passed by name, because archives cannot be pickled.
+def _task_source(task: tuple, archives: dict):
+    path, member_name, start, end = task
+    if member_name is None:
+        return event_source(Path(path), start, end)
+    _, members = archives[path]
+    return event_source(members[member_name])
+
+
+# reads the files of one shard, and sends every record to the shard of its computer
+def _read_tasks(tasks: list, records: list, profiler: Profiler, failures: list):
+    archives = dict()
+    batches = [(None, list()) for _ in records]
+    try:
+        with (profiler.stage('reader') if profiler is not None else contextlib.nullcontext()):
+            for path, member_name, _, _ in tasks:
+                if member_name is not None and path not in archives:
+                    archive = EvtxArchive(Path(path))
+                    members = {m.member_name: m for m in archive.members}
+                    archive.prefetch([members[t[1]] for t in tasks if t[0] == path])
+                    archives[path] = (archive, members)
+
+            for task in tasks:
+                source = _task_source(task, archives)
+                filename = str(source)
+                reader = source.records()
+                while True:
+                    try:
+                        if profiler is None:
+                            record = next(reader)
+                        else:
+                            begin = time.perf_counter()
+                            record = next(reader)
+                            profiler.record_finished('reader', filename, record, begin)
+                    except StopIteration:
+                        break
+                    except RuntimeError as e:
+                        logging.fatal("fatal error while parsing {filename}:".format(filename=filename))
+                        logging.fatal(str(e))
+                        continue
+
+                    # every batch contains records of only one file
+                    shard = shard_of(record, len(records))
+                    batch_file, batch = batches[shard]
+                    if batch_file != filename and len(batch) > 0:
+                        records[shard].put((batch_file, batch))
+                        batch = list()
+                    batch.append(record)
+                    batches[shard] = (filename, batch)
+                    if len(batch) >= BATCH_SIZE:
+                        records[shard].put((filename, batch))
+                        batches[shard] = (filename, list())
+
+            for shard, (batch_file, batch) in enumerate(batches):
+                if len(batch) > 0:
+                    records[shard].put((batch_file, batch))
+    except Exception as e:
+        failures.append(e)
+    finally:
+        # every shard waits until all readers have finished
+        for q in records:
+            q.put(None)
+        for archive, _ in archives.values():
+            archive.close()
+
+
+def _put_batches(results: multiprocessing.Queue, items):
+    batch = list()
+    for item in items:
+        batch.append(item)
+        if len(batch) >= RESULT_BATCH_SIZE:
+            results.put(batch)
+            batch = list()
+    if len(batch) > 0:
+        results.put(batch)
+    results.put(None)
+
+
+# reads a part of the files, decodes and correlates the events of the computers of one shard, and then answers the
+# requests of the parent process until it is closed
+def _shard_worker(shard: int, tasks: list, records: list, results: multiprocessing.Queue,
+                  sid_filter: WellKnownSidFilter, from_date: datetime, to_date: datetime,
+                  failed_logon_window: timedelta, process_trees: bool, dedup: bool, hostname: str,
+                  profiler: Profiler):
+    failures = list()
+    reader = threading.Thread(target=_read_tasks, args=(tasks, records, profiler, failures), daemon=True)
+    reader.start()
+
+    evtx_parser = EvtxParser([], sid_filter, from_date, to_date,
+                             failed_logon_window=failed_logon_window,
+                             process_trees=process_trees)
+    included_event_ids = evtx_parser.included_event_ids
+    # duplicates have the same computer, and are therefore always sent to the same shard
+    deduplicator = EventDeduplicator() if dedup else None
+
+    def events():
+        running_readers = len(records)
+        while running_readers > 0:
+            batch = records[shard].get()
+            if batch is None:
+                running_readers -= 1
+                continue
+            filename, batch = batch
+            for record in batch:
+                if deduplicator is not None and deduplicator.is_duplicate(record):
+                    continue
+                if profiler is not None:
+                    begin = time.perf_counter()
+                try:
+                    yield WindowsEvent(record, included_event_ids, from_date, to_date)
+                except WindowsEvent.IgnoreThisEvent:
+                    pass
+                except Exception as e:
+                    # a single malformed record must not terminate the shard
+                    logging.error("{filename}: skipping record {record_id}: {error}".format(
+                        filename=filename, record_id=record.get('event_record_id'), error=repr(e)))
+                if profiler is not None:
+                    profiler.record_finished('shard', filename, record, begin)
+
+    if profiler is None:
+        evtx_parser.parse_event_stream(events(), hostname)
+    else:
+        with profiler.stage('shard'):
+            evtx_parser.parse_event_stream(events(), hostname)
+    reader.join()
+    if profiler is not None:
+        profiler.flush()
+    if deduplicator is not None:
+        deduplicator.close()
+    if len(failures) > 0:
+        raise failures[0]
+    results.put(None)
+
+    # the events stay in this process, only rendered rows and sessions are sent to the parent
+    while True:
+        command = records[shard].get()
+        if command is None:
+            break
+        name, argument = command
+        if name == 'stitch':
+            evtx_parser.stitch_rdp_sessions(argument)
+            results.put(None)
+        elif name == 'sessions':
+            _put_batches(results, evtx_parser.sessions())
+        elif name == 'rows':
+            _put_batches(results, ((row.first_timestamp, evtx_parser.row_lines(row, argument))
+                                   for row in evtx_parser.rows()))
+    evtx_parser.close()
+
+
+# correlates the events of many computers (e.g. of ForwardedEvents.evtx) in several processes. Every shard reads a
+# part of the files and sends every record to the shard of its computer, so that every session is built by exactly
+# one shard. The shards send their rows sorted, which are merged by the parent.
+class ShardedSessionizer:
+    # limits the number of batches held per shard, if the readers are faster than the shard
+    QUEUE_SIZE = 16
+
+    # uncompressed JSON lines are split into ranges, so that a large file is read by several shards
+    MIN_SPLIT_SIZE = 1 << 20
+
+    def __init__(self, files_to_scan: list, sid_filter: WellKnownSidFilter, from_date: datetime, to_date: datetime,
+                 shards: int, failed_logon_window: timedelta = None, process_trees: bool = False,
+                 deduplicator: EventDeduplicator = None, profiler: Profiler = None):
+        self.__files_to_scan = files_to_scan
+        self.__profiler = profiler
+        self.__sid_filter = sid_filter
+        self.__from_date = from_date
+        self.__to_date = to_date
+        self.__shard_count = shards
+        self.__failed_logon_window = failed_logon_window
+        self.__process_trees = process_trees
+        self.__deduplicator = deduplicator
+        self.__processes = list()
+        self.__records = list()
+        self.__results = list()
+
+    # distributes the files over the shards, so that every shard reads about the same number of bytes
+    def __tasks(self) -> list:
+        tasks = list()
+        for index, f in enumerate(self.__files_to_scan):
+            if isinstance(f, ArchiveMember):
+                tasks.append((f.size, index, (str(f.archive.path), f.member_name, 0, None)))
+            elif is_splittable(f):
+                size = max(math.ceil(f.stat().st_size / self.__shard_count), self.MIN_SPLIT_SIZE)
+                tasks.extend((end - start, index, (str(f), None, start, end)) for start, end in split_export(f, size))
+            else:
+                tasks.append((f.stat().st_size, index, (str(f), None, 0, None)))
+
+        shards = [list() for _ in range(self.__shard_count)]
+        sizes = [0] * self.__shard_count
+        for size, index, task in sorted(tasks, key=lambda t: t[0], reverse=True):
+            shard = sizes.index(min(sizes))
+            shards[shard].append((index, task))
+            sizes[shard] += size
+        # files are read in the order of the list, e.g. archive members in the order in which they are stored
+        return [[task for _, task in sorted(s, key=lambda t: t[0])] for s in shards]
+
+    def parse_events(self, hostname: str = None):
+        tasks = self.__tasks()
+        self.__records = [multiprocessing.Queue(maxsize=self.QUEUE_SIZE) for _ in range(self.__shard_count)]
+        self.__results = [multiprocessing.Queue(maxsize=self.QUEUE_SIZE) for _ in range(self.__shard_count)]
+        self.__processes = [multiprocessing.Process(target=_shard_worker,
+                                                    args=(shard, tasks[shard], self.__records, self.__results[shard],
+                                                          self.__sid_filter, self.__from_date, self.__to_date,
+                                                          self.__failed_logon_window, self.__process_trees,
+                                                          self.__deduplicator is not None, hostname,
+                                                          self.__profiler),
+                                                    daemon=True)
+                            for shard in range(self.__shard_count)]
+        for p in self.__processes:
+            p.start()
+
+        # every shard reports when it has correlated its events
+        for shard in range(self.__shard_count):
+            self.__receive(shard)
+
+    # waits for the next message of a shard, but fails if any shard has terminated, because the other shards
+    # may wait for its records
+    def __receive(self, shard: int):
+        while True:
+            try:
+                return self.__results[shard].get(timeout=1)
+            except queue.Empty:
+                for s, p in enumerate(self.__processes):
+                    if not p.is_alive():
+                        self.__terminate()
+                        raise RuntimeError("shard {shard} has terminated with exit code {code}".format(
+                            shard=s, code=p.exitcode))
+
+    def __terminate(self):
+        for p in self.__processes:
+            p.terminate()
+        # batches which will never be read must not block the exit of this process
+        for q in self.__records + self.__results:
+            q.cancel_join_thread()
+        self.__processes = list()
+
+    def __request(self, command):
+        for q in self.__records:
+            q.put(command)
+
+    def __responses(self, shard: int):
+        while True:
+            batch = self.__receive(shard)
+            if batch is None:
+                return
+            yield from batch
+
+    def stitch_rdp_sessions(self, tolerance: timedelta):
+        # RDP connections and logons of the same computer are always in the same shard
+        self.__request(('stitch', tolerance))
+        for shard in range(self.__shard_count):
+            self.__receive(shard)
+
+    def sessions(self) -> list:
+        self.__request(('sessions', None))
+        return [s for shard in range(self.__shard_count) for s in self.__responses(shard)]
+
+    def print_logins(self, enable_latex = False):
+        # every row is rendered by its shard, which holds the events and process trees of its sessions
+        self.__request(('rows', enable_latex))
+        rows = heapq.merge(*[self.__responses(shard) for shard in range(self.__shard_count)], key=lambda r: r[0])
+        for _, lines in rows:
+            for line in lines:
+                print(line)
+
+    def close(self):
+        if len(self.__processes) == 0:
+            return
+        self.__request(None)
+        for shard, p in enumerate(self.__processes):
+            # responses which have not been read completely must not block the exit of the shard
+            while p.is_alive():
+                try:
+                    self.__results[shard].get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            p.join()
+        self.__processes = list()
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+from evtxtools.WellKnownSids import parse_sid
+
+# logon events name the accounts of their SIDs
+LEARNING_EVENT_IDS = {4624, 4648}
+
+# (SID, domain, account name) fields of the event data
+ACCOUNT_FIELDS = (
+    ('TargetUserSid', 'TargetDomainName', 'TargetUserName'),
+    ('SubjectUserSid', 'SubjectDomainName', 'SubjectUserName'),
+)
+
+
+def _has_value(value) -> bool:
+    return value is not None and value != '' and value != '-'
+
+
+# learns the accounts of SIDs from logon events while they are read, so that events which carry only a SID can be
+# shown with the account name. Event data is never changed, because events may be shared, e.g. by the analyses of
+# the server: the names are looked up when an event is shown. The least recently used SIDs are forgotten.
+# A resolver can be shared by several threads, e.g. by the workers of evtx2elasticsearch.py.
+class SidResolver:
+    def __init__(self, max_sids: int = 100000):
+        self.__accounts = OrderedDict()
+        self.__max_sids = max_sids
+        self.__lock = threading.Lock()
+
+    def learn(self, event_data: dict):
+        for sid_key, domain_key, name_key in ACCOUNT_FIELDS:
+            name = event_data.get(name_key)
+            if not _has_value(name):
+                continue
+            sid = parse_sid(event_data.get(sid_key))
+            if sid is None:
+                continue
+            with self.__lock:
+                self.__accounts[sid] = (event_data.get(domain_key) or '-', name)
+                self.__accounts.move_to_end(sid)
+                if len(self.__accounts) > self.__max_sids:
+                    self.__accounts.popitem(last=False)
+
+    # returns (domain, account name) of a SID, or None if the SID is not known
+    def resolve(self, s: str) -> tuple:
+        sid = parse_sid(s)
+        if sid is None:
+            return None
+        with self.__lock:
+            account = self.__accounts.get(sid)
+            if account is not None:
+                self.__accounts.move_to_end(sid)
+        return account
+
+    # returns the domain and account names of SIDs which have no names in the event data
+    def accounts(self, event_data: dict) -> dict:
+        accounts = dict()
+        for sid_key, domain_key, name_key in ACCOUNT_FIELDS:
+            if sid_key not in event_data or _has_value(event_data.get(name_key)):
+                continue
+            account = self.resolve(event_data[sid_key])
+            if account is not None:
+                accounts[domain_key], accounts[name_key] = account
+        return accounts
+
+    def add_event(self, event_id: int, event_data: dict):
+        if event_data and event_id in LEARNING_EVENT_IDS:
+            self.learn(event_data)
+
+    def __len__(self):
+        return len(self.__accounts)
@@ -0,0 +1,133 @@
+from datetime import datetime
+
+import orjson
+
+from evtxtools.FieldAccessorCache import FieldAccessorCache
+from evtxtools.StringTable import CHANNELS, COMPUTERS, PROVIDERS, intern_event_data
+
+SYSTEM_PATHS = [
+    "/System/EventID",
+    "/System/EventRecordID",
+    "/System/Level",
+    "/System/Provider/@Name",
+    "/System/Provider/@Guid",
+    "/System/Execution/@ProcessID",
+    "/System/Execution/@ThreadID",
+    "/System/Correlation/@ActivityID",
+    "/System/Correlation/@RelatedActivityID",
+    "/System/Channel",
+    "/System/Computer",
+    "/System/TimeCreated/@SystemTime",
+    "/System/Security/@UserID"
+]
+SYSTEM_FIELDS = FieldAccessorCache(SYSTEM_PATHS)
+
+
+class SimpleWindowsEvent:
+    SEPARATOR = "/"
+    event_id: int
+    record_id: int
+    level: int
+    provider_name: str
+    provider_guid: str
+    process_id: int
+    thread_id: int
+    activity_id: str
+    related_activity_id: str
+    channel: str
+    computer: str
+    timestamp: datetime
+    timecreated: datetime
+    user: str
+    event_data: dict
+
+    def __init__(self, record: dict):
+        self.__values = dict()
+        if record['timestamp'][19] == '.':
+            self.timestamp = datetime.strptime(record['timestamp'], "%Y-%m-%d %H:%M:%S.%f %Z")
+        else:
+            self.timestamp = datetime.strptime(record['timestamp'], "%Y-%m-%d %H:%M:%S %Z")
+
+        self.__record = orjson.loads(record['data'])
+        # all other values are only collected if they are requested
+        self.__values = dict(zip(SYSTEM_PATHS, SYSTEM_FIELDS.extract(self.__record['Event'])))
+        self.__all_values_cached = False
+
+        self.event_id = self.safe_int(self["/System/EventID"])
+        self.record_id = self.safe_int(self["/System/EventRecordID"])
+        self.level = self.safe_int(self["/System/Level"])
+        self.provider_name = PROVIDERS.intern(str(self["/System/Provider/@Name"]))
+        self.provider_guid = str(self["/System/Provider/@Guid"])
+        self.process_id = self.safe_int(self["/System/Execution/@ProcessID"])
+        self.thread_id = self.safe_int(self["/System/Execution/@ThreadID"])
+        self.activity_id = str(self["/System/Correlation/@ActivityID"])
+        self.related_activity_id = str(self["/System/Correlation/@RelatedActivityID"])
+        self.channel = CHANNELS.intern(str(self["/System/Channel"]))
+        self.computer = COMPUTERS.intern(str(self["/System/Computer"]))
+        self.timecreated = self.get_time_created(self["/System/TimeCreated/@SystemTime"])
+        self.user = str(self["/System/Security/@UserID"])
+        self.event_data = self.__record['Event'].get('EventData')
+
+        if self.event_data:
+            if '#attributes' in self.event_data:
+                for key, value in self.event_data['#attributes'].items():
+                    self.event_data['@' + key] = value
+                del self.event_data['#attributes']
+
+            for key, value in self.event_data.items():
+                if isinstance(value, dict):
+                    if '#text' in value:
+                        self.event_data[key] = str(value['#text'])
+                    else:
+                        raise RuntimeError("invalid datatype")
+                else:
+                    self.event_data[key] = str(value)
+            intern_event_data(self.event_data)
+
+
+    @staticmethod
+    def safe_int(item):
+        return int(item) if item else None
+
+    @staticmethod
+    def get_time_created(timecreated):
+        if timecreated[19] == '.':
+            return datetime.strptime(timecreated, "%Y-%m-%dT%H:%M:%S.%fZ")
+        else:
+            return datetime.strptime(timecreated, "%Y-%m-%dT%H:%M:%SZ")
+
+    def cache_values(self, prefix: str, dictionary: dict):
+        for _key, _value in dictionary.items():
+            if _key == '#attributes':
+                assert isinstance(_value, dict)
+                for _a_key, _a_value in _value.items():
+                    assert not isinstance(_a_value, dict)
+                    self.__values[prefix + self.SEPARATOR + "@" + _a_key] = _a_value
+                continue
+
+            _id = prefix + self.SEPARATOR + _key
+
+            if _key == '#text':
+                self.__values[prefix] = _value
+                continue
+
+            if isinstance(_value, dict):
+                self.cache_values(_id, _value)
+            else:
+                assert _key not in self.__values
+                self.__values[_id] = _value
+
+    def __getitem__(self, item) -> str:
+        return self.get_property(item, allow_none=True)
+
+    def get_property(self, path: str, allow_none=False) -> str:
+        if path not in self.__values and not self.__all_values_cached:
+            self.cache_values(prefix="", dictionary=self.__record['Event'])
+            self.__all_values_cached = True
+        if allow_none:
+            return self.__values.get(path)
+        else:
+            return self.__values[path]
+
+    def to_json(self):
+        return orjson.dumps(self.__record).decode("UTF-8")
@@ -0,0 +1,110 @@
+import logging
+import sys
+import threading
+
+# event data fields which have only a few distinct values, even in millions of events
+EVENT_DATA_KEYS = (
+    'TargetDomainName',
+    'TargetUserName',
+    'SubjectDomainName',
+    'SubjectUserName',
+    'WorkstationName',
+    'IpAddress',
+    'LogonType',
+    'LogonProcessName',
+    'AuthenticationPackageName',
+    'ClientName',
+    'UserName',
+)
+
+
+# dictionary encoding of values which are repeated in many events. Every distinct value is stored once and gets a
+# small integer code, and events keep the code or the canonical string object instead of their own copy of the
+# value. Codes are only valid in the process which has assigned them, so events which are passed to another process
+# carry their values and are encoded again by the receiving process. Values are encoded by the decoder threads of
+# RawEventList, so new codes are assigned under a lock.
+class StringTable:
+    def __init__(self, name: str):
+        self.__name = name
+        self.__lock = threading.Lock()
+        # code 0 is reserved for missing values
+        self.__codes = {None: 0}
+        self.__values = [None]
+        self.__occurrences = 0
+        self.__saved = 0
+
+    def encode(self, value: str) -> int:
+        with self.__lock:
+            self.__occurrences += 1
+            code = self.__codes.get(value)
+            if code is None:
+                code = len(self.__values)
+                self.__codes[value] = code
+                self.__values.append(value)
+            elif value is not self.__values[code]:
+                # the copy of the value can be released by the caller
+                self.__saved += sys.getsizeof(value)
+            return code
+
+    def decode(self, code: int) -> str:
+        return self.__values[code]
+
+    # returns the canonical object of a value
+    def intern(self, value: str) -> str:
+        return self.__values[self.encode(value)]
+
+    def __len__(self):
+        return len(self.__values) - 1
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def occurrences(self) -> int:
+        return self.__occurrences
+
+    @property
+    def saved(self) -> int:
+        return self.__saved
+
+    def statistics(self) -> dict:
+        return {'values': len(self), 'occurrences': self.__occurrences, 'saved': self.__saved}
+
+    def log_statistics(self):
+        logging.info("{name}: {values} distinct values in {occurrences} occurrences, {saved} bytes saved".format(
+            name=self.__name, **self.statistics()))
+
+
+# all tables of this process, by name
+TABLES = dict()
+
+
+def string_table(name: str) -> StringTable:
+    table = TABLES.get(name)
+    if table is None:
+        table = StringTable(name)
+        TABLES[name] = table
+    return table
+
+
+COMPUTERS = string_table('Computer')
+CHANNELS = string_table('Channel')
+PROVIDERS = string_table('Provider')
+EVENT_DATA_VALUES = {key: string_table(key) for key in EVENT_DATA_KEYS}
+
+
+# replaces the values of EVENT_DATA_KEYS by their canonical objects
+def intern_event_data(event_data: dict):
+    for key, table in EVENT_DATA_VALUES.items():
+        value = event_data.get(key)
+        if type(value) is str:
+            event_data[key] = table.intern(value)
+
+
+def statistics() -> dict:
+    return {name: table.statistics() for name, table in TABLES.items() if table.occurrences > 0}
+
+
+def saved() -> int:
+    return sum(table.saved for table in TABLES.values())
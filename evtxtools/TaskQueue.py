@@ -0,0 +1,189 @@
+import io
+import mmap
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from evtxtools.EventSource import export_format, is_splittable, split_export
+from evtxtools.EvtxChunk import CHUNK_SIZE, FILE_HEADER_SIZE, chunk_offsets, write_evtx_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS task (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    first_chunk INTEGER NOT NULL,
+    last_chunk INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    records INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS ix_task_state ON task (state, lease_expires);
+CREATE INDEX IF NOT EXISTS ix_task_range ON task (path, first_chunk, last_chunk);
+"""
+
+
+class Task(NamedTuple):
+    id: int
+    path: str
+    # chunks first_chunk, ..., last_chunk - 1 of the file, or bytes of exported events
+    first_chunk: int
+    last_chunk: int
+    attempts: int
+
+
+def number_of_chunks(path: Path) -> int:
+    return len(chunk_offsets(os.stat(path).st_size))
+
+
+# splits a file into ranges of at most `chunks_per_task` chunks. Every chunk can be parsed on its own, because the
+# templates of its records are stored in the chunk itself. Exported events are split into ranges of the same number of
+# bytes, if they can be read from any offset.
+def split_file(path: Path, chunks_per_task: int) -> list:
+    if export_format(path.name) is not None:
+        if is_splittable(path):
+            return split_export(path, chunks_per_task * CHUNK_SIZE)
+        size = os.stat(path).st_size
+        return [(0, size)] if size > 0 else []
+    chunks = number_of_chunks(path)
+    return [(first, min(first + chunks_per_task, chunks)) for first in range(0, chunks, chunks_per_task)]
+
+
+# returns an evtx file in memory, which contains only the chunks of a task
+def read_chunks(path: Path, first_chunk: int, last_chunk: int) -> io.BytesIO:
+    chunks = list()
+    size = os.stat(path).st_size
+    if size > FILE_HEADER_SIZE:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for offset in chunk_offsets(size)[first_chunk:last_chunk]:
+                chunks.append(m[offset:offset + CHUNK_SIZE])
+    evtx_file = io.BytesIO()
+    write_evtx_file(evtx_file, chunks)
+    evtx_file.seek(0)
+    return evtx_file
+
+
+def worker_name() -> str:
+    return "{0}:{1}".format(socket.gethostname(), os.getpid())
+
+
+# durable queue of parsing tasks, which is stored in a SQLite database on a shared filesystem. Workers claim a
+# task with a lease, which they renew while they are working on it. If a worker dies, its lease expires and the
+# task is claimed by another worker. Failed tasks are retried until they have been attempted `max_attempts` times,
+# which is stored in the queue by the coordinator.
+class TaskQueue:
+    def __init__(self, path: Path, max_attempts: int = None):
+        # WAL mode requires shared memory, which is not available on network filesystems, so the default rollback
+        # journal is used, and writers wait for each other
+        self.__connection = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+        self.__connection.executescript(SCHEMA)
+        if max_attempts is not None:
+            self.set('max_attempts', str(max_attempts))
+        self.__max_attempts = int(self.get('max_attempts', '3'))
+
+    def __write(self, statement: str, parameters=()):
+        c = self.__connection
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = c.execute(statement, parameters)
+            c.execute("COMMIT")
+            return cursor.rowcount
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+
+    def set(self, name: str, value: str):
+        self.__write("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, value))
+
+    def get(self, name: str, default: str = None) -> str:
+        row = self.__connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return default if row is None else row[0]
+
+    # adds the tasks which are not in the queue yet, so that the coordinator can be run again, e.g. after more files
+    # have been copied into the logs directory. Returns the number of added tasks.
+    def add_tasks(self, tasks: list) -> int:
+        c = self.__connection
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            added = c.executemany("INSERT INTO task (path, first_chunk, last_chunk, updated) SELECT ?, ?, ?, ? "
+                                  "WHERE NOT EXISTS (SELECT 1 FROM task "
+                                  "WHERE path = ? AND first_chunk = ? AND last_chunk = ?)",
+                                  [(path, first, last, now, path, first, last) for path, first, last in tasks]).rowcount
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        return added
+
+    # claims the oldest task which is pending or whose lease has expired
+    def claim(self, worker: str, lease_time: float) -> Task:
+        c = self.__connection
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            # tasks of dead workers count as failed attempts
+            c.execute("UPDATE task SET state = 'failed', error = 'lease expired', updated = ? "
+                      "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                      (now, now, self.__max_attempts))
+            row = c.execute("SELECT id, path, first_chunk, last_chunk, attempts FROM task "
+                            "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                            "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                c.execute("COMMIT")
+                return None
+            c.execute("UPDATE task SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                      "records = 0, updated = ? WHERE id = ?", (worker, now + lease_time, now, row[0]))
+            c.execute("COMMIT")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        return Task(row[0], row[1], row[2], row[3], row[4] + 1)
+
+    # extends the lease and stores the progress of a task, returns False if the lease has been lost
+    def renew(self, task: Task, worker: str, lease_time: float, records: int) -> bool:
+        now = time.time()
+        return self.__write("UPDATE task SET lease_expires = ?, records = ?, updated = ? "
+                            "WHERE id = ? AND worker = ? AND state = 'leased'",
+                            (now + lease_time, records, now, task.id, worker)) == 1
+
+    def complete(self, task: Task, worker: str, records: int) -> bool:
+        return self.__write("UPDATE task SET state = 'done', records = ?, error = NULL, updated = ? "
+                            "WHERE id = ? AND worker = ? AND state = 'leased'",
+                            (records, time.time(), task.id, worker)) == 1
+
+    def fail(self, task: Task, worker: str, error: str) -> bool:
+        state = 'failed' if task.attempts >= self.__max_attempts else 'pending'
+        return self.__write("UPDATE task SET state = ?, error = ?, updated = ? "
+                            "WHERE id = ? AND worker = ? AND state = 'leased'",
+                            (state, error, time.time(), task.id, worker)) == 1
+
+    # True, if no task is pending or being worked on
+    @property
+    def finished(self) -> bool:
+        return self.__connection.execute("SELECT COUNT(*) FROM task WHERE state IN ('pending', 'leased')")\
+                   .fetchone()[0] == 0
+
+    def status(self) -> dict:
+        c = self.__connection
+        states = {state: (count, records) for state, count, records in
+                  c.execute("SELECT state, COUNT(*), SUM(records) FROM task GROUP BY state")}
+        now = time.time()
+        workers = c.execute("SELECT worker, path, first_chunk, last_chunk, records, lease_expires FROM task "
+                            "WHERE state = 'leased' AND lease_expires >= ? ORDER BY worker", (now,)).fetchall()
+        failed = c.execute("SELECT path, first_chunk, last_chunk, attempts, error FROM task "
+                           "WHERE state = 'failed' ORDER BY id").fetchall()
+        return {'states': states, 'workers': workers, 'failed': failed}
+
+    def close(self):
+        self.__connection.close()
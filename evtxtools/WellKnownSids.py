@@ -1,4 +1,47 @@
+import functools
+import string
 from enum import Enum, unique
+from typing import NamedTuple
+
+# number of distinct SID strings whose parsed and classified forms are cached
+SID_CACHE_SIZE = 1 << 16
+
+
+class Sid(NamedTuple):
+    revision: int
+    authority: int
+    sub_authorities: tuple
+
+    # the relative identifier of an account or group, e.g. 500 for the administrator of a domain
+    @property
+    def rid(self) -> int:
+        return self.sub_authorities[-1] if len(self.sub_authorities) > 0 else None
+
+    def __str__(self):
+        return "S-%d-%d%s" % (self.revision, self.authority, "".join("-%d" % s for s in self.sub_authorities))
+
+
+def _number(s: str, hexadecimal: bool = False):
+    if hexadecimal and s[:2] in ('0x', '0X') and len(s) > 2 and all(c in string.hexdigits for c in s[2:]):
+        return int(s[2:], 16)
+    if s.isascii() and s.isdecimal():
+        return int(s)
+    return None
+
+
+# parses a SID such as S-1-5-21-1004336348-1177238915-682003330-512, and returns None if it is not a valid SID.
+# The same SIDs occur in millions of events, so they are parsed only once.
+@functools.lru_cache(maxsize=SID_CACHE_SIZE)
+def parse_sid(s: str) -> Sid:
+    if type(s) is not str:
+        return None
+    parts = s.split('-')
+    if len(parts) < 3 or parts[0] not in ('S', 's'):
+        return None
+    numbers = [_number(parts[1]), _number(parts[2], hexadecimal=True)] + [_number(p) for p in parts[3:]]
+    if None in numbers:
+        return None
+    return Sid(numbers[0], numbers[1], tuple(numbers[2:]))
 
 
 @unique
@@ -65,10 +108,19 @@ class WellKnownSid(Enum):
 
     @staticmethod
     def is_wellknown_sid(s:str) -> bool:
-        if len(s) > 8:
-            return False
-        values = set(item.value for item in WellKnownSid)
-        return s in values
+        return classify_sid(s) is not None
+
+
+WELL_KNOWN_SIDS = {parse_sid(item.value): item for item in WellKnownSid}
+
+
+# returns the well known SID which is represented by `s`, or None for all other SIDs, e.g. of domain accounts
+@functools.lru_cache(maxsize=SID_CACHE_SIZE)
+def classify_sid(s: str) -> WellKnownSid:
+    sid = parse_sid(s)
+    if sid is None:
+        return None
+    return WELL_KNOWN_SIDS.get(sid)
 
 
 class WellKnownSidFilter:
@@ -90,4 +142,9 @@ class WellKnownSidFilter:
         return sid in self.__included
 
     def is_excluded(self, sid: WellKnownSid) -> bool:
-        return sid not in self.__included
\ No newline at end of file
+        return sid not in self.__included
+
+    # only well known SIDs can be excluded
+    def is_excluded_sid(self, s: str) -> bool:
+        sid = classify_sid(s)
+        return sid is not None and sid not in self.__included
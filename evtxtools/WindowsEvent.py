@@ -1,10 +1,16 @@
 import xml
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 import orjson
 
 from evtxtools.EventDescriptor import EVENT_DESCRIPTORS, EventDescriptor
+from evtxtools.FieldAccessorCache import FieldAccessorCache
 from evtxtools.LogSource import LogSource
+from evtxtools.StringTable import COMPUTERS, intern_event_data
+
+if TYPE_CHECKING:
+    from evtxtools.SidResolver import SidResolver
 
 LOGON_TYPES = {
     0: "System",
@@ -19,6 +25,13 @@ LOGON_TYPES = {
     11: "CachedInteractive"
 }
 
+SYSTEM_FIELDS = FieldAccessorCache([
+    '/System/EventID',
+    '/System/Channel',
+    '/System/Computer',
+    '/System/Correlation/@ActivityID'
+])
+
 
 class WindowsEvent:
     class IgnoreThisEvent(Exception):
@@ -39,24 +52,41 @@ class WindowsEvent:
             raise WindowsEvent.IgnoreThisEvent()
 
         record_data = orjson.loads(record['data'])
+        event_id, channel, computer, activity_id = SYSTEM_FIELDS.extract(record_data['Event'])
+        self.__check_descriptor(int(event_id), channel, included_event_ids)
+        self.__computer_code = COMPUTERS.encode(computer)
 
-        self.__event_id = record_data['Event']['System']['EventID']
-        if isinstance(self.__event_id, dict):
-            self.__event_id = self.__event_id['#text']
-        self.__event_id = int(self.__event_id)
-
+        self.__event_data = record_data['Event']['EventData']
+        self.__init_activity_id(activity_id)
+
+    # creates an event from a row of a database which has been created by evtx2sqlite.py
+    @staticmethod
+    def from_database(event_id: int, timestamp: datetime, channel: str, computer: str, activity_id: str,
+                      event_data: dict, included_event_ids: set):
+        event = WindowsEvent.__new__(WindowsEvent)
+        event.__timestamp = timestamp
+        event.__check_descriptor(event_id, channel, included_event_ids)
+        event.__computer_code = COMPUTERS.encode(computer)
+
+        event.__event_data = event_data
+        event.__init_activity_id(activity_id)
+        return event
+
+    def __check_descriptor(self, event_id: int, channel: str, included_event_ids: set):
+        self.__event_id = event_id
         if self.__event_id not in included_event_ids:
             raise WindowsEvent.IgnoreThisEvent()
 
         self.__descriptor = EVENT_DESCRIPTORS[self.__event_id]
-        if self.__descriptor.log_source != LogSource(record_data['Event']['System']['Channel']):
+        # exported events and forwarded events contain events of any channel, also of unknown ones
+        if self.__descriptor.log_source.value != channel:
             raise WindowsEvent.IgnoreThisEvent()
 
-        self.__event_data = record_data['Event']['EventData']
+    def __init_activity_id(self, activity_id: str):
         self.__beautify_event_data()
 
         try:
-            self.__activity_id = self.__get_correlation_id(record_data)\
+            self.__activity_id = self.__get_correlation_id(activity_id)\
                                  or self.__timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")
         except TypeError:
             pass
@@ -68,22 +98,33 @@ class WindowsEvent:
     def __beautify_event_data(self):
         if 'LogonType' in self.__event_data:
             self.__event_data['LogonType'] = LOGON_TYPES[int(self.__event_data['LogonType'])]
+        intern_event_data(self.__event_data)
 
-    def __get_correlation_id(self, record_data: dict) -> str:
-        try:
-            activity_id = record_data['Event']['System']['Correlation']['#attributes']['ActivityID']
-            if activity_id and len(activity_id) > 0:
-                return activity_id
-        except Exception:
-            pass
+    def __get_correlation_id(self, activity_id: str) -> str:
+        if activity_id and len(activity_id) > 0:
+            return activity_id
 
         try:
-            return record_data['Event']['EventData']['TargetLogonId']
+            return self.__event_data['TargetLogonId']
         except Exception:
             pass
 
         return None
 
+    # descriptors are shared by all events and must not be pickled with every single event. Codes of strings
+    # are only valid in this process, so the receiving process encodes the values again.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_WindowsEvent__descriptor']
+        state['_WindowsEvent__computer_code'] = self.computer
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__descriptor = EVENT_DESCRIPTORS[self.__event_id]
+        self.__computer_code = COMPUTERS.encode(self.__computer_code)
+        intern_event_data(self.__event_data)
+
     @property
     def event_id(self) -> int:
         return self.__event_id
@@ -96,6 +137,15 @@ class WindowsEvent:
     def activity_id(self):
         return self.__activity_id
 
+    @property
+    def computer(self) -> str:
+        return COMPUTERS.decode(self.__computer_code)
+
+    # the computer as code of the StringTable COMPUTERS, which is cheaper to hash and compare
+    @property
+    def computer_code(self) -> int:
+        return self.__computer_code
+
     @property
     def event_data(self) -> dict:
         return self.__event_data
@@ -104,6 +154,10 @@ class WindowsEvent:
     def descriptor(self) -> EventDescriptor:
         return self.__descriptor
 
+    @property
+    def log_source(self) -> LogSource:
+        return self.__descriptor.log_source
+
     #def __getattr__(self, item):
     #    key = self.descriptor.properties.get(item)
     #    if key is None:
@@ -115,12 +169,22 @@ class WindowsEvent:
         def __missing__(self, key):
             return '-'
 
+    # the names of accounts which are only given by their SIDs are taken from `resolver`
+    def __display_data(self, resolver: 'SidResolver') -> dict:
+        if resolver is None:
+            return self.event_data
+        accounts = resolver.accounts(self.event_data)
+        return dict(self.event_data, **accounts) if len(accounts) > 0 else self.event_data
+
     def __str__(self):
-        return self.descriptor.description.format_map(WindowsEvent.FriendlyDict(self.event_data))
+        return self.describe()
+
+    def describe(self, resolver: 'SidResolver' = None) -> str:
+        return self.descriptor.description.format_map(WindowsEvent.FriendlyDict(self.__display_data(resolver)))
 
-    def latex_str(self):
+    def latex_str(self, resolver: 'SidResolver' = None):
         data = dict()
-        for key, value in self.event_data.items():
+        for key, value in self.__display_data(resolver).items():
             data[key] = value.replace("\\", "\\\\").replace('"', '\\"') if isinstance(value, str) else value
         res = self.descriptor.latex_description.format_map(WindowsEvent.FriendlyDict(data))
         return res.replace("%", "\\%").replace("$", "\\$")
\ No newline at end of file
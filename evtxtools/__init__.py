@@ -1,13 +1,17 @@
 import argparse
+import importlib
 import os
 from pathlib import Path
 
-from evtxtools.WellKnownSids import *
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 class readable_dir(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
+        # optional positional arguments are set to their default value
+        if values is None:
+            setattr(namespace, self.dest, None)
+            return
         prospective_dir=Path(values)
         if not prospective_dir.is_dir():
             raise argparse.ArgumentTypeError("{0} is not a valid directory name, but you must specify a directory".format(prospective_dir))
@@ -16,6 +20,41 @@ class readable_dir(argparse.Action):
         else:
             raise argparse.ArgumentTypeError("{0} is not a readable dir".format(prospective_dir))
 
+class readable_logs(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        # optional positional arguments are set to their default value
+        if values is None:
+            setattr(namespace, self.dest, None)
+            return
+        prospective_path = Path(values)
+        if prospective_path.is_file():
+            from evtxtools.EvtxArchive import EvtxArchive
+            if not EvtxArchive.is_archive(prospective_path):
+                raise argparse.ArgumentTypeError("{0} is neither a directory nor a ZIP or tar archive".format(prospective_path))
+            if not os.access(prospective_path, os.R_OK):
+                raise argparse.ArgumentTypeError("{0} is not a readable file".format(prospective_path))
+            setattr(namespace, self.dest, prospective_path)
+        else:
+            readable_dir.__call__(self, parser, namespace, values, option_string)
+
+class readable_dirs(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        dirs = list()
+        for value in values:
+            readable_dir.__call__(self, parser, namespace, value, option_string)
+            dirs.append(getattr(namespace, self.dest))
+        setattr(namespace, self.dest, dirs)
+
+class readable_file(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        prospective_file = Path(values)
+        if not prospective_file.is_file():
+            raise argparse.ArgumentTypeError("{0} is not a valid file name".format(prospective_file))
+        if os.access(prospective_file, os.R_OK):
+            setattr(namespace, self.dest, prospective_file)
+        else:
+            raise argparse.ArgumentTypeError("{0} is not a readable file".format(prospective_file))
+
 class creatable_file(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         prospective_file = Path(values)
@@ -27,11 +66,22 @@ class creatable_file(argparse.Action):
             raise argparse.ArgumentTypeError("{0} is not a writable dir".format(prospective_file.parent))
 
 
-def parse_logins_arguments():
-    parser = argparse.ArgumentParser(description='analyse user sessions')
+def memory_size(value: str) -> int:
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+    value = value.strip().upper().rstrip('B')
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("{0} is not a valid size, use e.g. 512M or 4G".format(value))
+
+
+def add_logins_arguments(parser: argparse.ArgumentParser):
     parser.add_argument('logsdir',
-                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
-                        action=readable_dir)
+                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs, or a ZIP or tar archive containing them',
+                        nargs='?',
+                        action=readable_logs)
     parser.add_argument('--from',
                         dest='from_date',
                         help='timestamp pattern, where to start',
@@ -58,32 +108,511 @@ def parse_logins_arguments():
                         dest='hostname',
                         help='display this value as hostname',
                         type=str)
-    args = parser.parse_args()
-    return args
+    parser.add_argument('--aggregate-failures',
+                        dest='failed_logon_window',
+                        metavar='SECONDS',
+                        help='collapse failed logons from the same source into one row, '
+                             'as long as they are not more than SECONDS apart',
+                        type=lambda s: timedelta(seconds=int(s)))
+    parser.add_argument('--stitch-rdp',
+                        dest='rdp_tolerance',
+                        metavar='SECONDS',
+                        help='merge RDP connections with the RemoteInteractive logon from the same client address, '
+                             'which follows not later than SECONDS (default: 10)',
+                        nargs='?',
+                        const=timedelta(seconds=10),
+                        type=lambda s: timedelta(seconds=int(s)))
+    parser.add_argument('--process-tree',
+                        dest='process_trees',
+                        help='display the processes (4688/4689) which have been started in every logon session',
+                        action='store_true')
+    parser.add_argument('--carve',
+                        dest='carve_image',
+                        metavar='IMAGE',
+                        help='also parse evtx chunks which are carved from a disk image or memory dump',
+                        action=readable_file)
+    parser.add_argument('--max-memory',
+                        dest='max_memory',
+                        metavar='SIZE',
+                        help='sort events and sessions in temporary files if they need more than SIZE, e.g. 16G '
+                             '(not with --aggregate-failures, --stitch-rdp, --process-tree and --shards, which need '
+                             'their state in memory)',
+                        type=memory_size)
+    parser.add_argument('--shards',
+                        dest='shards',
+                        metavar='N',
+                        help='correlate the events in N processes, partitioned by computer (for collected logs)',
+                        type=int)
+    parser.add_argument('--include-archives',
+                        dest='include_archives',
+                        help='also parse logs which have been archived by the event log service (Archive-*.evtx)',
+                        action='store_true')
+    parser.add_argument('--dedup',
+                        dest='dedup',
+                        help='drop events which are contained in more than one file, e.g. in overlapping archives',
+                        action='store_true')
+    parser.add_argument('--profile',
+                        dest='profile_dir',
+                        metavar='DIR',
+                        help='profile the reader, decoder and correlation stages and store the results in DIR',
+                        type=Path)
+    parser.add_argument('--slow-records',
+                        dest='slow_records',
+                        metavar='N',
+                        help='with --profile, remember the N records which took longest to parse (default: 20)',
+                        type=int,
+                        default=20)
+    parser.add_argument('--database',
+                        dest='database',
+                        metavar='FILE',
+                        help='read the events from a SQLite database which has been created by evtx2sqlite.py, '
+                             'instead of parsing the evtx files again',
+                        action=readable_file)
+    parser.add_argument('--session-index',
+                        dest='session_index',
+                        metavar='FILE',
+                        help='store the sessions in FILE; if no logsdir is given, the sessions are loaded from FILE',
+                        type=Path)
+    parser.add_argument('--at',
+                        dest='at',
+                        metavar='TIMESTAMP',
+                        help='only show sessions which were open at TIMESTAMP',
+                        type=datetime.fromisoformat)
+    parser.add_argument('--overlapping',
+                        dest='overlapping',
+                        metavar=('FROM', 'TO'),
+                        help='only show sessions which were open at some time between FROM and TO',
+                        nargs=2,
+                        type=datetime.fromisoformat)
+    parser.add_argument('--host',
+                        dest='host',
+                        metavar='HOSTNAME',
+                        help='with --at, --overlapping or --session-index, only show sessions on HOSTNAME, '
+                             'as it is displayed in the output',
+                        type=str)
 
-def parse_evtx2sqlite_arguments():
-    parser = argparse.ArgumentParser(description='convert evtx files to sqlite database')
+def check_logins_arguments(parser: argparse.ArgumentParser, args):
+    if args.database is not None:
+        if args.logsdir is not None:
+            parser.error("logsdir cannot be combined with --database")
+        for option, value in (('--carve', args.carve_image), ('--shards', args.shards),
+                              ('--include-archives', args.include_archives), ('--dedup', args.dedup)):
+            if value:
+                parser.error("{0} cannot be combined with --database".format(option))
+    elif args.logsdir is None:
+        if args.session_index is None:
+            parser.error("either logsdir, --database or --session-index must be specified")
+        if not args.session_index.is_file():
+            parser.error("{0} does not exist".format(args.session_index))
+    # sessions are selected by host only when they are queried from a session index
+    if args.host is not None and args.at is None and args.overlapping is None and \
+            (args.logsdir is not None or args.database is not None):
+        parser.error("--host can only be used with --at, --overlapping, or when the sessions are loaded from "
+                     "--session-index")
+    # these options keep their state in memory, which would not be limited by --max-memory
+    if args.max_memory is not None:
+        for option, used in (('--aggregate-failures', args.failed_logon_window is not None),
+                             ('--stitch-rdp', args.rdp_tolerance is not None),
+                             ('--process-tree', args.process_trees),
+                             ('--shards', args.shards is not None)):
+            if used:
+                parser.error("{0} cannot be combined with --max-memory".format(option))
+    if args.shards is not None and args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.profile_dir is not None and args.profile_dir.exists() and \
+            (not args.profile_dir.is_dir() or any(args.profile_dir.iterdir())):
+        parser.error("--profile {0} must be an empty directory, or must not exist".format(args.profile_dir))
+
+def parse_logins_arguments():
+    return parse_arguments('logins')
+
+def add_detect_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('logsdir',
+                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
+                        action=readable_dir)
+    parser.add_argument('--from',
+                        dest='from_date',
+                        help='timestamp pattern, where to start',
+                        type=datetime.fromisoformat,
+                        default=datetime.min)
+    parser.add_argument('--to',
+                        dest='to_date',
+                        help='timestamp pattern, where to end',
+                        type=datetime.fromisoformat,
+                        default=datetime.max)
+    parser.add_argument('--statistics',
+                        dest='statistics',
+                        help='print the number of hits and the matching time of every rule',
+                        action='store_true')
+
+def parse_detect_arguments():
+    return parse_arguments('detect')
+
+def add_lateral_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('logsdirs',
+                        help='directories where logs are stored, one per host',
+                        nargs='+',
+                        action=readable_dirs)
+    parser.add_argument('--tolerance',
+                        dest='tolerance',
+                        metavar='SECONDS',
+                        help='maximum time difference between the use of explicit credentials and the remote logon',
+                        type=lambda s: timedelta(seconds=int(s)),
+                        default=timedelta(seconds=5))
+    parser.add_argument('--chains',
+                        dest='max_gap',
+                        metavar='SECONDS',
+                        help='link hops to chains, if the next hop starts not later than SECONDS after the previous one',
+                        type=lambda s: timedelta(seconds=int(s)))
+    parser.add_argument('--include-machine-accounts',
+                        dest='include_machine_accounts',
+                        help='also consider logons of machine accounts',
+                        action='store_true')
+
+def parse_lateral_arguments():
+    return parse_arguments('lateral')
+
+def add_scriptblocks_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('logsdir',
+                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
+                        action=readable_dir)
+    parser.add_argument('outputdir',
+                        help='directory where the scripts will be stored',
+                        type=Path)
+    parser.add_argument('--from',
+                        dest='from_date',
+                        help='timestamp pattern, where to start',
+                        type=datetime.fromisoformat,
+                        default=datetime.min)
+    parser.add_argument('--to',
+                        dest='to_date',
+                        help='timestamp pattern, where to end',
+                        type=datetime.fromisoformat,
+                        default=datetime.max)
+    parser.add_argument('--max-memory',
+                        dest='max_memory',
+                        metavar='SIZE',
+                        help='incomplete script blocks are moved to disk if they need more than SIZE (default: 256M)',
+                        type=memory_size,
+                        default=memory_size('256M'))
+
+def parse_scriptblocks_arguments():
+    return parse_arguments('scriptblocks')
+
+def add_carve_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('image',
+                        help='disk image or memory dump',
+                        action=readable_file)
+    parser.add_argument('outputdir',
+                        help='directory where the carved evtx files will be stored',
+                        type=Path)
+    parser.add_argument('--exclude',
+                        dest='exclude_dir',
+                        metavar='LOGSDIR',
+                        help='do not carve chunks which are also contained in the evtx files in LOGSDIR',
+                        action=readable_dir)
+    parser.add_argument('--jobs',
+                        dest='jobs',
+                        help='number of processes used for scanning (default: number of CPUs)',
+                        type=int)
+
+def parse_carve_arguments():
+    return parse_arguments('carve')
+
+def sample_fraction(value: str) -> float:
+    fraction = float(value)
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError("{0} is not between 0 and 1".format(value))
+    return fraction
+
+def add_inventory_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('logsdir',
+                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
+                        action=readable_dir)
+    parser.add_argument('--sample',
+                        dest='sample',
+                        metavar='FRACTION',
+                        help='only parse a random sample of FRACTION of the chunks of every file and extrapolate '
+                             'the histograms, e.g. 0.05',
+                        type=sample_fraction,
+                        default=1.0)
+    parser.add_argument('--seed',
+                        dest='seed',
+                        help='seed for the random selection of chunks',
+                        type=int)
+    parser.add_argument('--top',
+                        dest='top',
+                        metavar='N',
+                        help='number of entries which are displayed per histogram (default: 10)',
+                        type=int,
+                        default=10)
+    parser.add_argument('--json',
+                        dest='json_output',
+                        help='print the complete histograms as JSON',
+                        action='store_true')
+    parser.add_argument('--jobs',
+                        dest='jobs',
+                        help='number of files which are parsed in parallel (default: number of CPUs)',
+                        type=int)
+
+def parse_inventory_arguments():
+    return parse_arguments('inventory')
+
+def add_evtx2sqlite_arguments(parser: argparse.ArgumentParser):
     parser.add_argument('logsdir',
                         help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
                         action=readable_dir)
     parser.add_argument('dbfile',
                         help="name of SQLite Database to be created",
-                        action=creatable_file)
-    args = parser.parse_args()
-    return args
+                        type=Path)
+    parser.add_argument('--append',
+                        dest='append',
+                        help='add the events to an existing database',
+                        action='store_true')
+    parser.add_argument('--search-index',
+                        dest='search_index',
+                        help='build a full text index over the event data after loading, which is used by search.py',
+                        action='store_true')
 
+def check_evtx2sqlite_arguments(parser: argparse.ArgumentParser, args):
+    if args.append:
+        if not args.dbfile.is_file():
+            parser.error("{0} does not exist".format(args.dbfile))
+    elif args.dbfile.exists():
+        parser.error("{0} already exists, use --append to add events to it".format(args.dbfile))
 
-def parse_evtx2elasticsearch_arguments():
-    parser = argparse.ArgumentParser(description='convert evtx files to an elasticsearch index')
+def parse_evtx2sqlite_arguments():
+    return parse_arguments('sqlite')
+
+def add_search_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('dbfile',
+                        help="SQLite database which has been created by evtx2sqlite.py",
+                        action=readable_file)
+    parser.add_argument('text',
+                        help='words to search for, e.g. an IP address or a user name')
+    parser.add_argument('--fragment',
+                        dest='fragment',
+                        help='search for a part of a command line or path (at least three characters)',
+                        action='store_true')
+    parser.add_argument('--query',
+                        dest='query',
+                        help='pass text as FTS5 query, e.g. "mimikatz OR procdump"',
+                        action='store_true')
+    parser.add_argument('--key',
+                        dest='key',
+                        help='only search values of this event data field, e.g. TargetUserName',
+                        type=str)
+    parser.add_argument('--limit',
+                        dest='limit',
+                        metavar='N',
+                        help='show at most N events (default: 100)',
+                        type=int,
+                        default=100)
+
+def check_search_arguments(parser: argparse.ArgumentParser, args):
+    if args.fragment and args.query:
+        parser.error("--fragment cannot be combined with --query")
+    if args.fragment and len(args.text) < 3:
+        parser.error("--fragment requires at least three characters")
+
+def parse_search_arguments():
+    return parse_arguments('search')
+
+def add_evtx2elasticsearch_arguments(parser: argparse.ArgumentParser):
     parser.add_argument('--override',
                         dest='override_index',
                         help='overrides an existing index, if it already exists',
                         action='store_true')
     parser.add_argument('logsdir',
-                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs',
-                        action=readable_dir)
+                        help='directory where logs are stored, e.g. %%windir%%\\System32\\winevt\\Logs, or a ZIP or tar archive containing them',
+                        action=readable_logs)
+    parser.add_argument('--dedup',
+                        dest='dedup',
+                        help='drop events which are contained in more than one file, e.g. in overlapping archives',
+                        action='store_true')
     parser.add_argument('--index',
                         help="name of elasticsearch index",
                         type=str)
-    args = parser.parse_args()
-    return args
\ No newline at end of file
+    parser.add_argument('--watch',
+                        dest='watch',
+                        help='keep running and index new records of new or changed files in logsdir and its '
+                             'subdirectories, e.g. one per host',
+                        action='store_true')
+    parser.add_argument('--state',
+                        dest='state_file',
+                        metavar='FILE',
+                        help='with --watch, remember which records have been indexed in FILE, '
+                             'so that they are not indexed again after a restart',
+                        type=Path)
+    parser.add_argument('--workers',
+                        dest='workers',
+                        metavar='N',
+                        help='with --watch, index up to N files at the same time (default: 2)',
+                        type=int,
+                        default=2)
+    parser.add_argument('--settle',
+                        dest='settle_time',
+                        metavar='SECONDS',
+                        help='with --watch, wait until a file has not been changed for SECONDS (default: 5)',
+                        type=float,
+                        default=5.0)
+    parser.add_argument('--poll',
+                        dest='poll_interval',
+                        metavar='SECONDS',
+                        help='with --watch, check for changes every SECONDS instead of using inotify',
+                        type=float)
+
+def check_evtx2elasticsearch_arguments(parser: argparse.ArgumentParser, args):
+    if args.watch:
+        if not args.logsdir.is_dir():
+            parser.error("--watch requires a directory")
+        if args.dedup:
+            parser.error("--dedup cannot be combined with --watch")
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+    elif args.state_file is not None or args.poll_interval is not None:
+        parser.error("--state and --poll require --watch")
+
+def parse_evtx2elasticsearch_arguments():
+    return parse_arguments('es')
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('root',
+                        help='directory which contains the evidence directories or archives, e.g. one per host',
+                        action=readable_dir)
+    parser.add_argument('--port',
+                        dest='port',
+                        help='listen on this port of localhost (default: 8017)',
+                        type=int,
+                        default=8017)
+    parser.add_argument('--socket',
+                        dest='socket',
+                        metavar='PATH',
+                        help='listen on a unix socket instead of a TCP port',
+                        type=Path)
+    parser.add_argument('--max-memory',
+                        dest='max_memory',
+                        metavar='SIZE',
+                        help='drop the least recently used evidence if the events need more than SIZE (default: 4G)',
+                        type=memory_size,
+                        default=memory_size('4G'))
+    parser.add_argument('--preload',
+                        dest='preload',
+                        metavar='LOGS',
+                        help='parse the evidence LOGS (relative to root) before accepting requests',
+                        action='append',
+                        default=[])
+
+def parse_server_arguments():
+    return parse_arguments('server')
+
+def add_evtxqueue_arguments(parser: argparse.ArgumentParser):
+    subparsers = parser.add_subparsers(dest='queue_command', metavar='ROLE', required=True)
+
+    coordinator = subparsers.add_parser('coordinator', help='split evtx files into tasks')
+    coordinator.add_argument('queue_file',
+                             metavar='QUEUE',
+                             help='SQLite database which stores the tasks, on a filesystem which all workers can access',
+                             type=Path)
+    coordinator.add_argument('logsdir',
+                             help='directory where logs are stored, including its subdirectories',
+                             action=readable_dir)
+    coordinator.add_argument('--index',
+                             help='name of the elasticsearch index, which is created if it does not exist',
+                             type=str)
+    coordinator.add_argument('--override',
+                             dest='override_index',
+                             help='overrides an existing index, if it already exists',
+                             action='store_true')
+    coordinator.add_argument('--chunks-per-task',
+                             dest='chunks_per_task',
+                             metavar='N',
+                             help='split files into tasks of at most N chunks of 64 KiB (default: 256)',
+                             type=int,
+                             default=256)
+    coordinator.add_argument('--max-attempts',
+                             dest='max_attempts',
+                             metavar='N',
+                             help='give up a task after N failed attempts (default: 3)',
+                             type=int,
+                             default=3)
+
+    worker = subparsers.add_parser('worker', help='process tasks until the queue is empty')
+    worker.add_argument('queue_file',
+                        metavar='QUEUE',
+                        help='SQLite database which has been created by the coordinator',
+                        action=readable_file)
+    worker.add_argument('--logsdir',
+                        dest='logsdir',
+                        help='directory where the logs are mounted on this host, if it differs from the coordinator',
+                        action=readable_dir)
+    worker.add_argument('--jsonl',
+                        dest='output_dir',
+                        metavar='DIR',
+                        help='write the records of every task to DIR/<task>.jsonl instead of indexing them',
+                        type=Path)
+    worker.add_argument('--processes',
+                        dest='processes',
+                        metavar='N',
+                        help='run N workers on this host (default: 1)',
+                        type=int,
+                        default=1)
+    worker.add_argument('--lease',
+                        dest='lease_time',
+                        metavar='SECONDS',
+                        help='other workers take over a task if it has not been renewed for SECONDS (default: 60)',
+                        type=float,
+                        default=60.0)
+
+    status = subparsers.add_parser('status', help='show the progress of all tasks')
+    status.add_argument('queue_file',
+                        metavar='QUEUE',
+                        help='SQLite database which has been created by the coordinator',
+                        action=readable_file)
+
+def check_evtxqueue_arguments(parser: argparse.ArgumentParser, args):
+    if args.queue_command == 'coordinator':
+        if args.chunks_per_task < 1 or args.max_attempts < 1:
+            parser.error("--chunks-per-task and --max-attempts must be at least 1")
+    elif args.queue_command == 'worker':
+        if args.processes < 1:
+            parser.error("--processes must be at least 1")
+        if args.lease_time <= 0:
+            parser.error("--lease must be positive")
+
+def parse_evtxqueue_arguments():
+    return parse_arguments('queue')
+
+# description, function which adds the arguments, function which validates the arguments
+COMMANDS = {
+    'logins': ('analyse user sessions', add_logins_arguments, check_logins_arguments),
+    'detect': ('run detection rules against event logs', add_detect_arguments, None),
+    'lateral': ('trace lateral movement across hosts', add_lateral_arguments, None),
+    'scriptblocks': ('reassemble PowerShell script blocks (event 4104)', add_scriptblocks_arguments, None),
+    'carve': ('carve evtx chunks from a disk image or memory dump', add_carve_arguments, None),
+    'inventory': ('list channels, event ids, computers and time ranges of evtx files', add_inventory_arguments, None),
+    'sqlite': ('convert evtx files to sqlite database', add_evtx2sqlite_arguments, check_evtx2sqlite_arguments),
+    'search': ('search the event data of a sqlite database', add_search_arguments, check_search_arguments),
+    'server': ('answer session queries from events which are kept in memory', add_server_arguments, None),
+    'es': ('convert evtx files to an elasticsearch index', add_evtx2elasticsearch_arguments,
+           check_evtx2elasticsearch_arguments),
+    'queue': ('distribute the parsing of evtx files to workers on several hosts', add_evtxqueue_arguments,
+              check_evtxqueue_arguments),
+}
+
+
+def parse_arguments(command: str, argv: list = None):
+    description, add_arguments, check_arguments = COMMANDS[command]
+    parser = argparse.ArgumentParser(description=description)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    if check_arguments is not None:
+        check_arguments(parser, args)
+    return args
+
+
+# the tables of well known SIDs are only built when they are needed
+def __getattr__(name: str):
+    if name in ('WellKnownSid', 'WellKnownSidFilter'):
+        return getattr(importlib.import_module('evtxtools.WellKnownSids'), name)
+    raise AttributeError("module {module!r} has no attribute {name!r}".format(module=__name__, name=name))
@@ -0,0 +1,45 @@
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+import evtxtools
+
+# modules which implement the commands. They are imported only after the
+# command line has been parsed, so that '--help' and argument errors do not
+# need to load any parser or database backend
+COMMAND_MODULES = {
+    'logins': 'logins',
+    'detect': 'detect',
+    'lateral': 'lateral',
+    'scriptblocks': 'scriptblocks',
+    'carve': 'carve',
+    'inventory': 'inventory',
+    'sqlite': 'evtx2sqlite',
+    'search': 'search',
+    'server': 'server',
+    'es': 'evtx2elasticsearch',
+    'queue': 'evtxqueue',
+}
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog='evtxtools', description='forensic analysis of Windows event logs')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+    for name, (description, add_arguments, _) in evtxtools.COMMANDS.items():
+        add_arguments(subparsers.add_parser(name, help=description, description=description))
+    args = parser.parse_args(argv)
+
+    check_arguments = evtxtools.COMMANDS[args.command][2]
+    if check_arguments is not None:
+        check_arguments(subparsers.choices[args.command], args)
+
+    # the tools are stored next to the evtxtools package
+    tools_dir = str(Path(__file__).resolve().parent.parent)
+    if tools_dir not in sys.path:
+        sys.path.insert(0, tools_dir)
+    return importlib.import_module(COMMAND_MODULES[args.command]).run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+inventory.py
+
+lists which channels, event ids, computers and time ranges are contained in evtx files.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import orjson
+
+import evtxtools
+from evtxtools.EvtxInventory import EvtxInventory, FileInventory
+
+
+def histogram_str(histogram, top: int) -> str:
+    entries = ["%s (%d)" % ('-' if key is None else key, count) for key, count in histogram.most_common(top)]
+    if len(histogram) > top:
+        entries.append("... %d more" % (len(histogram) - top))
+    return ", ".join(entries)
+
+
+def print_inventory(inventory: FileInventory, top: int):
+    if inventory.records == 0:
+        print("%s: no records" % inventory.filename)
+        return
+    print("%s: %d records in %d chunks, %s - %s%s" % (
+        inventory.filename,
+        inventory.records,
+        inventory.chunks,
+        inventory.first_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        inventory.last_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        " (estimated from %d records)" % inventory.parsed_records if inventory.sampled else ""
+    ))
+    print("    channels:  " + histogram_str(inventory.channels, top))
+    print("    computers: " + histogram_str(inventory.computers, top))
+    print("    event ids: " + histogram_str(inventory.event_ids, top))
+    print("    hours:     " + histogram_str(inventory.hours, top))
+
+
+def inventory_to_dict(inventory: FileInventory) -> dict:
+    return {
+        'file': inventory.filename,
+        'size': inventory.size,
+        'chunks': inventory.chunks,
+        'records': inventory.records,
+        'parsed_records': inventory.parsed_records,
+        'sampled': inventory.sampled,
+        'first_timestamp': inventory.first_timestamp,
+        'last_timestamp': inventory.last_timestamp,
+        'channels': {str(k): v for k, v in inventory.channels.items()},
+        'computers': {str(k): v for k, v in inventory.computers.items()},
+        'event_ids': {str(k): v for k, v in inventory.event_ids.items()},
+        'hours': dict(sorted(inventory.hours.items()))
+    }
+
+
+def main():
+    return run(evtxtools.parse_inventory_arguments())
+
+
+def run(args):
+
+    files = sorted(f for f in args.logsdir.iterdir() if f.is_file() and f.name.endswith(".evtx"))
+    for inventory in EvtxInventory(files, sample=args.sample, seed=args.seed, jobs=args.jobs):
+        if args.json_output:
+            print(orjson.dumps(inventory_to_dict(inventory)).decode("UTF-8"))
+        else:
+            print_inventory(inventory, args.top)
+
+
+if __name__ == '__main__':
+    main()
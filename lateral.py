@@ -0,0 +1,57 @@
+"""
+lateral.py
+
+Joins explicit credential usage (4648) on one host with remote logons (4624) on other hosts to
+display lateral movement.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+from datetime import datetime
+
+import progressbar
+
+import evtxtools
+from evtxtools.EventSource import export_files
+from evtxtools.LateralMovementJoin import LateralMovementJoin
+from evtxtools.RawEventList import RawEventList
+
+
+def main():
+    return run(evtxtools.parse_lateral_arguments())
+
+
+def run(args):
+    files_to_scan = list(filter(
+        lambda f: f.is_file(), map(
+            lambda d: d / 'Security.evtx',
+            args.logsdirs
+        )
+    ))
+    for logsdir in args.logsdirs:
+        files_to_scan.extend(export_files(logsdir))
+
+    join = LateralMovementJoin(args.tolerance, include_machine_accounts=args.include_machine_accounts)
+    for event in progressbar.progressbar(RawEventList(files_to_scan, {4624, 4648}, datetime.min, datetime.max)):
+        join.add_event(event)
+
+    if args.max_gap is None:
+        for hop in join.hops():
+            print(str(hop))
+    else:
+        for chain in join.chains(args.max_gap):
+            hosts = " -> ".join("{%s}" % h for h in [chain[0].source_host] + [hop.target_host for hop in chain])
+            accounts = ", ".join(sorted(set(hop.account for hop in chain)))
+            print("%s: %s as %s (ended %s)" % (chain[0].source_timestamp, hosts, accounts, chain[-1].target_timestamp))
+
+
+if __name__ == '__main__':
+    main()
@@ -16,12 +16,71 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import sys
+from pathlib import Path
+
+from evtxtools.EventSource import export_format
 from evtxtools.EvtxParser import EvtxParser
+from evtxtools.SessionIndex import SessionIndex
 import evtxtools
 
 
 def main():
-    args = evtxtools.parse_logins_arguments()
+    return run(evtxtools.parse_logins_arguments())
+
+
+def run(args):
+
+    if args.logsdir is None and args.database is None:
+        session_index = SessionIndex.load(args.session_index)
+        evtx_parser = None
+    else:
+        evtx_parser = parse_logins(args)
+        session_index = None
+
+    try:
+        if evtx_parser is not None and \
+                (args.session_index is not None or args.at is not None or args.overlapping is not None):
+            session_index = SessionIndex(evtx_parser.sessions())
+            if args.session_index is not None:
+                session_index.save(args.session_index)
+
+        if args.at is not None:
+            sessions = session_index.at(args.at, args.host)
+        elif args.overlapping is not None:
+            sessions = session_index.overlapping(args.overlapping[0], args.overlapping[1], args.host)
+        elif evtx_parser is not None:
+            evtx_parser.print_logins(enable_latex=args.latex_output)
+            return
+        else:
+            sessions = session_index.overlapping(args.from_date, args.to_date, args.host)
+
+        # the sessions of a loaded index have not been restricted to --from and --to while the events were parsed
+        if evtx_parser is None:
+            sessions = [s for s in sessions if s.end >= args.from_date and s.begin <= args.to_date]
+
+        for s in sessions:
+            print(s.latex if args.latex_output else s.text)
+    finally:
+        if evtx_parser is not None:
+            evtx_parser.close()
+
+
+def print_slow_records(slowest: list):
+    print("%12s  %-12s %-8s %10s  %s" % ("seconds", "stage", "event id", "record id", "file"), file=sys.stderr)
+    for duration, stage, filename, record_id, event_id in slowest:
+        print("%12.6f  %-12s %-8s %10s  %s" % (duration, stage, event_id, record_id, filename), file=sys.stderr)
+
+
+# shows how much memory has been saved by sharing the values of repeated event fields
+def print_string_statistics():
+    from evtxtools import StringTable
+    print("%-28s %10s %12s %12s" % ("field", "values", "occurrences", "bytes saved"), file=sys.stderr)
+    for name, s in StringTable.statistics().items():
+        print("%-28s %10d %12d %12d" % (name, s['values'], s['occurrences'], s['saved']), file=sys.stderr)
+
+
+def parse_logins(args):
     sid_filter = evtxtools.WellKnownSidFilter()
 
     if args.include_local_system:
@@ -29,18 +88,87 @@ def main():
     if args.include_anonymous:
         sid_filter.include_anonymous()
 
-    # list all files of the given directory which we can use:
-    # - files must be regular files (no directories, etc.)
-    # - file names must be listed in EvtxParser.KNWON_FILES
-    files_to_scan = list(filter(
-        lambda f: f.is_file(), map(
-            lambda sf: args.logsdir / sf,
-            EvtxParser.KNOWN_FILES
-        )
-    ))
-    evtx_parser = EvtxParser(files_to_scan, sid_filter, args.from_date, args.to_date)
+    if args.database is not None:
+        return parse_database(args, sid_filter)
+
+    archive = None
+    if args.logsdir.is_dir():
+        files_to_scan = EvtxParser.known_files_of(args.logsdir, args.include_archives)
+    else:
+        # archive members are read without extracting them
+        from evtxtools.EvtxArchive import EvtxArchive
+        archive = EvtxArchive(args.logsdir)
+        files_to_scan = [m for m in archive.members if m.name in EvtxParser.KNOWN_FILES or
+                         (args.include_archives and EvtxParser.is_archived_file(m.name))]
+        archive.prefetch(files_to_scan)
+
+    # optional backends are imported only if they are used, most runs do not need them
+    carved_dir = None
+    if args.carve_image is not None:
+        import tempfile
+        from evtxtools.EvtxCarver import EvtxCarver
+        carved_dir = tempfile.TemporaryDirectory()
+        carver = EvtxCarver(args.carve_image)
+        for f in files_to_scan:
+            # exported events have no chunks
+            if export_format(f.name) is None:
+                carver.exclude_chunks_of(f)
+        files_to_scan.extend(carver.carve(Path(carved_dir.name)))
+
+    deduplicator = None
+    if args.dedup:
+        from evtxtools.EventDeduplicator import EventDeduplicator
+        deduplicator = EventDeduplicator()
+    profiler = None
+    if args.profile_dir is not None:
+        from evtxtools.Profiler import Profiler
+        profiler = Profiler(args.profile_dir, args.slow_records)
+    if args.shards is not None:
+        from evtxtools.ShardedSessionizer import ShardedSessionizer
+        evtx_parser = ShardedSessionizer(files_to_scan, sid_filter, args.from_date, args.to_date, args.shards,
+                                         failed_logon_window=args.failed_logon_window,
+                                         process_trees=args.process_trees,
+                                         deduplicator=deduplicator,
+                                         profiler=profiler)
+    else:
+        evtx_parser = EvtxParser(files_to_scan, sid_filter, args.from_date, args.to_date,
+                                 failed_logon_window=args.failed_logon_window,
+                                 process_trees=args.process_trees,
+                                 max_memory=args.max_memory,
+                                 deduplicator=deduplicator,
+                                 profiler=profiler)
     evtx_parser.parse_events(hostname=args.hostname)
-    evtx_parser.print_logins(enable_latex=args.latex_output)
+    if deduplicator is not None:
+        deduplicator.close()
+    if profiler is not None:
+        print_slow_records(profiler.report())
+        print_string_statistics()
+    if carved_dir is not None:
+        carved_dir.cleanup()
+    if archive is not None:
+        archive.close()
+    if args.rdp_tolerance is not None:
+        evtx_parser.stitch_rdp_sessions(args.rdp_tolerance)
+    return evtx_parser
+
+
+def parse_database(args, sid_filter):
+    profiler = None
+    if args.profile_dir is not None:
+        from evtxtools.Profiler import Profiler
+        profiler = Profiler(args.profile_dir, args.slow_records)
+    evtx_parser = EvtxParser([], sid_filter, args.from_date, args.to_date,
+                             failed_logon_window=args.failed_logon_window,
+                             process_trees=args.process_trees,
+                             max_memory=args.max_memory,
+                             profiler=profiler)
+    evtx_parser.parse_database(args.database, hostname=args.hostname)
+    if profiler is not None:
+        print_slow_records(profiler.report())
+        print_string_statistics()
+    if args.rdp_tolerance is not None:
+        evtx_parser.stitch_rdp_sessions(args.rdp_tolerance)
+    return evtx_parser
 
 
 if __name__ == '__main__':
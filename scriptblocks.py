@@ -0,0 +1,43 @@
+"""
+scriptblocks.py
+
+Reassembles PowerShell script blocks (event 4104) and stores every distinct script once.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import progressbar
+
+import evtxtools
+from evtxtools.EventSource import export_files
+from evtxtools.RawEventList import RawEventList
+from evtxtools.ScriptBlockReassembler import ScriptBlockReassembler
+
+POWERSHELL_OPERATIONAL = 'Microsoft-Windows-PowerShell%4Operational.evtx'
+
+
+def main():
+    return run(evtxtools.parse_scriptblocks_arguments())
+
+
+def run(args):
+    args.outputdir.mkdir(parents=True, exist_ok=True)
+
+    files_to_scan = [f for f in [args.logsdir / POWERSHELL_OPERATIONAL] if f.is_file()] + export_files(args.logsdir)
+    reassembler = ScriptBlockReassembler(args.outputdir, args.max_memory)
+    for event in progressbar.progressbar(RawEventList(files_to_scan, {4104}, args.from_date, args.to_date)):
+        reassembler.add_event(event)
+    reassembler.close()
+    print("stored {n} distinct scripts in {dir}".format(n=reassembler.scripts, dir=args.outputdir))
+
+
+if __name__ == '__main__':
+    main()
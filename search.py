@@ -0,0 +1,53 @@
+"""
+search.py
+
+searches the event data of a SQLite database which has been created by
+evtx2sqlite.py, e.g. for an IP address, a user name or a part of a command
+line.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import sqlite3
+import sys
+
+from evtxtools.EventDataIndex import EventDataIndex
+import evtxtools
+
+
+def main():
+    return run(evtxtools.parse_search_arguments())
+
+
+def run(args):
+    connection = sqlite3.connect(str(args.dbfile))
+    try:
+        index = EventDataIndex(connection)
+        if not index.exists:
+            # this happens only once for every database
+            print("building search index of {0}, this may take a while".format(args.dbfile), file=sys.stderr)
+            index.create()
+
+        try:
+            for timecreated, channel, event_id, record_id, computer, key, value in \
+                    index.search(args.text, key=args.key, fragment=args.fragment, query=args.query, limit=args.limit):
+                print("%s  %-12s %-8s %10s  %s  %s: %s" % (timecreated, channel, event_id, record_id, computer,
+                                                           key, value))
+        except sqlite3.OperationalError as e:
+            # e.g. a syntax error in a query
+            print("invalid search: {0}".format(e), file=sys.stderr)
+            return 1
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
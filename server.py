@@ -0,0 +1,56 @@
+"""
+server.py
+
+parses evidence directories once and answers session, timeline and event
+queries of local clients (HTTP/JSON), using the events which are kept in
+memory.
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import logging
+
+from evtxtools.AnalysisServer import AnalysisHTTPServer, AnalysisUnixServer
+from evtxtools.EventStore import EventStore
+import evtxtools
+
+
+def main():
+    return run(evtxtools.parse_server_arguments())
+
+
+def run(args):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    store = EventStore(args.max_memory)
+    for logs in args.preload:
+        store.evidence((args.root / logs).resolve())
+
+    if args.socket is not None:
+        server = AnalysisUnixServer(args.socket, store, args.root)
+        logging.info("listening on {0}".format(args.socket))
+    else:
+        # the server must not be reachable from other hosts
+        server = AnalysisHTTPServer(('127.0.0.1', args.port), store, args.root)
+        logging.info("listening on http://127.0.0.1:{0}/".format(args.port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket is not None and args.socket.is_socket():
+            args.socket.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+from evtxtools.AnalysisServer import AnalysisUnixServer
+from evtxtools.EventStore import EventStore
+
+
+class AnalysisServerTest(unittest.TestCase):
+    def test_unix_socket_permissions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = Path(directory) / 'server.sock'
+            umask = os.umask(0o022)
+            try:
+                server = AnalysisUnixServer(socket_path, EventStore(max_memory=1 << 20), Path(directory))
+                try:
+                    # only the user who started the server may connect
+                    self.assertEqual(stat.S_IMODE(socket_path.stat().st_mode) & 0o077, 0)
+                finally:
+                    server.server_close()
+                self.assertEqual(os.umask(0o022), 0o022)
+            finally:
+                os.umask(umask)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from evtxtools.DirectoryWatcher import DirectoryWatcher, retry_delay, MAX_RETRY_DELAY, RETRY_DELAY
+
+SETTLE_TIME = 0.3
+POLL_INTERVAL = 0.05
+
+
+class DirectoryWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def watcher(self) -> DirectoryWatcher:
+        watcher = DirectoryWatcher(self.root, settle_time=SETTLE_TIME, poll_interval=POLL_INTERVAL)
+        self.addCleanup(watcher.close)
+        self.assertFalse(watcher.uses_inotify)
+        return watcher
+
+    # collects the files which are reported within `seconds`
+    def ready_files(self, watcher: DirectoryWatcher, seconds: float) -> list:
+        ready = list()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            ready.extend(watcher.ready_files(timeout=POLL_INTERVAL))
+        return ready
+
+    def test_existing_files(self):
+        (self.root / 'ws01').mkdir()
+        (self.root / 'ws01' / 'Security.evtx').write_bytes(b'x')
+        (self.root / 'ws01' / 'notes.txt').write_bytes(b'x')
+        watcher = self.watcher()
+        self.assertEqual(self.ready_files(watcher, SETTLE_TIME / 2), [])
+        self.assertEqual(self.ready_files(watcher, SETTLE_TIME), [self.root / 'ws01' / 'Security.evtx'])
+        self.assertEqual(self.ready_files(watcher, 2 * SETTLE_TIME), [])
+
+    def test_settle(self):
+        watcher = self.watcher()
+        path = self.root / 'ws01' / 'System.evtx'
+        path.parent.mkdir()
+        # a file is not reported while it is being written
+        with open(path, 'wb') as f:
+            for _ in range(6):
+                f.write(b'x' * 100)
+                f.flush()
+                self.assertEqual(self.ready_files(watcher, SETTLE_TIME / 3), [])
+        self.assertEqual(self.ready_files(watcher, 2 * SETTLE_TIME), [path])
+
+        # changes are reported once the file has settled again
+        with open(path, 'ab') as f:
+            f.write(b'x')
+        self.assertEqual(self.ready_files(watcher, 2 * SETTLE_TIME), [path])
+
+    def test_deleted_file(self):
+        watcher = self.watcher()
+        path = self.root / 'Security.evtx'
+        path.write_bytes(b'x')
+        self.assertEqual(self.ready_files(watcher, SETTLE_TIME / 2), [])
+        path.unlink()
+        self.assertEqual(self.ready_files(watcher, 2 * SETTLE_TIME), [])
+
+    def test_retry(self):
+        path = self.root / 'Archive-Security-2021-01-31-23-59-59-123.evtx'
+        path.write_bytes(b'x')
+        watcher = self.watcher()
+        self.assertEqual(self.ready_files(watcher, 2 * SETTLE_TIME), [path])
+        # a file which has not changed is reported again after the delay of the retry
+        watcher.retry(path, 0.5)
+        self.assertEqual(self.ready_files(watcher, 0.3), [])
+        self.assertEqual(self.ready_files(watcher, 0.5), [path])
+        watcher.retry(path)
+        self.assertEqual(watcher.ready_files(timeout=0), [path])
+
+    def test_retry_delay(self):
+        self.assertEqual([retry_delay(failures) for failures in (1, 2, 3)],
+                         [RETRY_DELAY, 2 * RETRY_DELAY, 4 * RETRY_DELAY])
+        self.assertEqual(retry_delay(20), MAX_RETRY_DELAY)
+        self.assertEqual(retry_delay(10000), MAX_RETRY_DELAY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import codecs
+import gzip
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+from evtxtools import EventSource
+from evtxtools.EventSource import event_source, is_splittable, record_timestamp, split_export
+from evtxtools.WindowsEvent import WindowsEvent
+
+ACTIVITY_ID = '{B6A2F1C4-1D2E-4F3A-8B9C-0D1E2F3A4B5C}'
+
+EVENT_DATA = {
+    'SubjectUserSid': 'S-1-5-18',
+    'SubjectUserName': 'WS01$',
+    'TargetUserSid': 'S-1-5-21-1004336348-1177238915-682003330-1001',
+    'TargetUserName': 'alice',
+    'TargetDomainName': 'CONTOSO',
+    'TargetLogonId': '0x3e7a1',
+    'IpAddress': '10.0.0.7',
+}
+
+
+# an event as it is returned by PyEvtxParser and written by evtx_dump -o jsonl
+def evtx_event(record_id: int, system_time: str = '2021-01-01T03:00:00.123456Z') -> dict:
+    return {'Event': {
+        '#attributes': {'xmlns': 'http://schemas.microsoft.com/win/2004/08/events/event'},
+        'System': {
+            'Provider': {'#attributes': {'Name': 'Microsoft-Windows-Security-Auditing',
+                                         'Guid': '{54849625-5478-4994-A5BA-3E3B0328C30D}'}},
+            'EventID': 4624,
+            'Version': 2,
+            'TimeCreated': {'#attributes': {'SystemTime': system_time}},
+            'EventRecordID': record_id,
+            'Correlation': {'#attributes': {'ActivityID': ACTIVITY_ID}},
+            'Execution': {'#attributes': {'ProcessID': 4, 'ThreadID': 8}},
+            'Channel': 'Security',
+            'Computer': 'WS01.contoso.local',
+            'Security': None,
+        },
+        'EventData': dict(EVENT_DATA, LogonType=2),
+    }}
+
+
+def evtx_record(record_id: int) -> dict:
+    return {'event_record_id': record_id, 'timestamp': '2021-01-01 03:00:00.123456 UTC',
+            'data': orjson.dumps(evtx_event(record_id)).decode('utf-8')}
+
+
+# an event as it is written by evtx_dump -o xml, which precedes every event with an XML declaration
+def evtx_dump_xml(record_id: int) -> str:
+    data = "".join('    <Data Name="%s">%s</Data>\n' % (k, v) for k, v in dict(EVENT_DATA, LogonType=2).items())
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">\n'
+            '  <System>\n'
+            '    <Provider Name="Microsoft-Windows-Security-Auditing" '
+            'Guid="{54849625-5478-4994-A5BA-3E3B0328C30D}">\n    </Provider>\n'
+            '    <EventID>4624</EventID>\n'
+            '    <Version>2</Version>\n'
+            '    <TimeCreated SystemTime="2021-01-01T03:00:00.123456Z">\n    </TimeCreated>\n'
+            '    <EventRecordID>%d</EventRecordID>\n'
+            '    <Correlation ActivityID="%s">\n    </Correlation>\n'
+            '    <Execution ProcessID="4" ThreadID="8">\n    </Execution>\n'
+            '    <Channel>Security</Channel>\n'
+            '    <Computer>WS01.contoso.local</Computer>\n'
+            '    <Security>\n    </Security>\n'
+            '  </System>\n'
+            '  <EventData>\n%s  </EventData>\n'
+            '</Event>\n') % (record_id, ACTIVITY_ID, data)
+
+
+# an event as it is written by wevtutil qe /f:xml, with timestamps of 100ns resolution
+def wevtutil_xml(record_id: int) -> str:
+    data = "".join("<Data Name='%s'>%s</Data>" % (k, v) for k, v in dict(EVENT_DATA, LogonType=2).items())
+    return ("<Event xmlns='http://schemas.microsoft.com/win/2004/08/events/event'><System>"
+            "<Provider Name='Microsoft-Windows-Security-Auditing' Guid='{54849625-5478-4994-A5BA-3E3B0328C30D}'/>"
+            "<EventID>4624</EventID><Version>2</Version><TimeCreated SystemTime='2021-01-01T03:00:00.1234567Z'/>"
+            "<EventRecordID>%d</EventRecordID><Correlation ActivityID='%s'/>"
+            "<Execution ProcessID='4' ThreadID='8'/><Channel>Security</Channel>"
+            "<Computer>WS01.contoso.local</Computer><Security/></System>"
+            "<EventData>%s</EventData></Event>") % (record_id, ACTIVITY_ID, data)
+
+
+def fields(record: dict) -> tuple:
+    event = WindowsEvent(record, {4624}, datetime.min, datetime.max)
+    return (event.event_id, event.timestamp, event.activity_id, event.computer, event.descriptor.log_source,
+            event.event_data)
+
+
+class EventSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def write(self, name: str, data: bytes) -> Path:
+        path = self.directory / name
+        path.write_bytes(data)
+        return path
+
+    def jsonl(self, count: int) -> bytes:
+        return b"".join(orjson.dumps(evtx_event(i)) + b'\n' for i in range(1, count + 1))
+
+    def record_ids(self, path: Path, start: int = 0, end: int = None) -> list:
+        return [r['event_record_id'] for r in event_source(path, start, end).records()]
+
+    def test_record_timestamp(self):
+        self.assertEqual(record_timestamp('2021-01-01T03:00:00.1234567Z'), '2021-01-01 03:00:00.123456 UTC')
+        self.assertEqual(record_timestamp('2021-01-01T03:00:00.12Z'), '2021-01-01 03:00:00.120000 UTC')
+        self.assertEqual(record_timestamp('2021-01-01 03:00:00'), '2021-01-01 03:00:00.000000 UTC')
+        self.assertIsNone(record_timestamp('yesterday'))
+
+    def test_jsonl_ranges(self):
+        path = self.write('Security.jsonl', self.jsonl(100))
+        self.assertTrue(is_splittable(path))
+        self.assertEqual(self.record_ids(path), list(range(1, 101)))
+        # ranges of every size end within lines, at line ends and at line starts
+        line = len(orjson.dumps(evtx_event(1))) + 1
+        for size in (1, 7, line - 1, line, line + 1, 3 * line + 5, 1000):
+            ranges = split_export(path, size)
+            record_ids = [i for start, end in ranges for i in self.record_ids(path, start, end)]
+            self.assertEqual(record_ids, list(range(1, 101)), size)
+
+    def test_jsonl_gzip(self):
+        path = self.write('Security.jsonl.gz', gzip.compress(self.jsonl(10)))
+        self.assertFalse(is_splittable(path))
+        self.assertEqual(self.record_ids(path), list(range(1, 11)))
+
+    def test_jsonl_fields(self):
+        path = self.write('Security.jsonl', self.jsonl(1))
+        record, = event_source(path).records()
+        self.assertEqual(record['timestamp'], '2021-01-01 03:00:00.123456 UTC')
+        self.assertEqual(fields(record), fields(evtx_record(1)))
+
+    def test_evtx_dump_xml(self):
+        data = "".join(evtx_dump_xml(i) for i in range(1, 51)).encode('utf-8')
+        path = self.write('Security.xml', data)
+        # blocks end within declarations, tags and text
+        for block_size in (1, 7, 13, 64, 1000, len(data)):
+            with mock.patch.object(EventSource, 'BLOCK_SIZE', block_size):
+                self.assertEqual(self.record_ids(path), list(range(1, 51)), block_size)
+
+        record = next(iter(event_source(path).records()))
+        self.assertEqual(fields(record), fields(evtx_record(1)))
+
+    def test_wevtutil_utf16(self):
+        text = "\r\n".join(wevtutil_xml(i) for i in range(1, 21))
+        for encoding, bom in (('utf-16-le', codecs.BOM_UTF16_LE), ('utf-16-be', codecs.BOM_UTF16_BE)):
+            path = self.write('Security.xml', bom + text.encode(encoding))
+            for block_size in (3, 1000, 1 << 20):
+                with mock.patch.object(EventSource, 'BLOCK_SIZE', block_size):
+                    self.assertEqual(self.record_ids(path), list(range(1, 21)), (encoding, block_size))
+
+            record = next(iter(event_source(path).records()))
+            # timestamps of 100ns resolution are truncated to microseconds
+            self.assertEqual(record['timestamp'], '2021-01-01 03:00:00.123456 UTC')
+            self.assertEqual(fields(record), fields(evtx_record(1)))
+
+    def test_xml_gzip(self):
+        path = self.write('Security.xml.gz', gzip.compress("".join(evtx_dump_xml(i) for i in (1, 2)).encode()))
+        self.assertEqual(self.record_ids(path), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from evtxtools.EventStore import EventStore, Evidence
+
+
+class EventStoreTest(unittest.TestCase):
+    def test_failed_load(self):
+        store = EventStore(max_memory=1 << 20)
+        path = Path('/evidence/WS01')
+        with mock.patch.object(EventStore, '_EventStore__load', side_effect=OSError('unreadable')):
+            for _ in range(2):
+                with self.assertRaises(OSError):
+                    store.evidence(path)
+        self.assertEqual(store._EventStore__loading, {})
+
+        # the evidence is loaded again after a failure
+        with mock.patch.object(EventStore, '_EventStore__load', return_value=Evidence(path, [])) as load:
+            self.assertEqual(store.evidence(path).path, path)
+            self.assertEqual(store.evidence(path).path, path)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(store._EventStore__loading, {})
+
+    def test_clients_waiting_for_a_failed_load(self):
+        store = EventStore(max_memory=1 << 20)
+        path = Path('/evidence/WS01')
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail(p: Path):
+            started.set()
+            release.wait()
+            raise OSError('unreadable')
+
+        errors = list()
+
+        def client():
+            try:
+                store.evidence(path)
+            except OSError as e:
+                errors.append(e)
+
+        with mock.patch.object(EventStore, '_EventStore__load', side_effect=fail):
+            clients = [threading.Thread(target=client) for _ in range(3)]
+            clients[0].start()
+            started.wait()
+            for c in clients[1:]:
+                c.start()
+            release.set()
+            for c in clients:
+                c.join()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(store._EventStore__loading, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
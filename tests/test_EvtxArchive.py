@@ -0,0 +1,89 @@
+import io
+import struct
+import tarfile
+import tempfile
+import unittest
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from evtxtools.EvtxArchive import EvtxArchive
+from evtxtools.RawEventList import RawEventList
+
+MEMBERS = ['Security.evtx', 'System.evtx', 'Windows PowerShell.evtx', 'ForwardedEvents.evtx',
+           'Archive-Security-2021-01-31-23-59-59-123.evtx', 'Archive-System-2021-01-31-23-59-59-123.evtx']
+
+
+# an evtx file without chunks
+def empty_evtx() -> bytes:
+    header = struct.pack('<8sQQQIHHHH', b'ElfFile\x00', 0, 0, 1, 128, 1, 3, 4096, 0).ljust(120, b'\x00')
+    header += struct.pack('<II', 0, zlib.crc32(header))
+    return header.ljust(4096, b'\x00')
+
+
+class EvtxArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def zip_archive(self, compression: int) -> Path:
+        path = self.directory / 'logs.zip'
+        with zipfile.ZipFile(path, 'w', compression=compression) as archive:
+            for name in MEMBERS:
+                archive.writestr('C/Windows/System32/winevt/Logs/' + name, empty_evtx())
+        return path
+
+    def tar_archive(self, mode: str) -> Path:
+        path = self.directory / 'logs.tar'
+        with tarfile.open(path, mode) as archive:
+            for name in MEMBERS:
+                data = empty_evtx()
+                info = tarfile.TarInfo('Logs/' + name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return path
+
+    # returns the names of the members in the order in which they have been loaded and opened
+    def read(self, path: Path) -> tuple:
+        archive = EvtxArchive(path)
+        loaded, opened = list(), list()
+        load, open_member = archive._EvtxArchive__load, archive.open_member
+
+        def record_load(member):
+            loaded.append(member.name)
+            return load(member)
+
+        def record_open(member):
+            opened.append(member.name)
+            return open_member(member)
+
+        archive._EvtxArchive__load = record_load
+        archive.open_member = record_open
+        files = archive.members
+        archive.prefetch(files)
+        try:
+            self.assertEqual(list(RawEventList(files, {4624}, datetime.min, datetime.max)), [])
+        finally:
+            archive.close()
+        return loaded, opened
+
+    def test_zip_members_are_read_in_order(self):
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            loaded, opened = self.read(self.zip_archive(compression))
+            self.assertEqual(opened, MEMBERS)
+            self.assertEqual(sorted(loaded), sorted(MEMBERS))
+
+    def test_tar_members_are_decompressed_in_order(self):
+        # compressed tar archives are decompressed by a single thread, which must not seek backwards
+        for mode in ('w', 'w:gz'):
+            loaded, opened = self.read(self.tar_archive(mode))
+            self.assertEqual(opened, MEMBERS)
+            self.assertEqual(loaded, MEMBERS)
+
+
+if __name__ == '__main__':
+    unittest.main()
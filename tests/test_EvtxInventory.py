@@ -0,0 +1,42 @@
+import unittest
+from collections import Counter
+
+import orjson
+
+from evtxtools.EvtxInventory import FileInventory
+
+
+def record(record_id: int, event_id: int) -> dict:
+    event = {'Event': {'System': {'EventID': event_id, 'EventRecordID': record_id, 'Channel': 'Security',
+                                  'Computer': 'WS01'}}}
+    return {'event_record_id': record_id, 'timestamp': '2021-01-01 03:00:00.000000 UTC',
+            'data': orjson.dumps(event, option=orjson.OPT_INDENT_2).decode('utf-8')}
+
+
+class FileInventoryTest(unittest.TestCase):
+    def inventory(self, records: int, parsed_records: int) -> FileInventory:
+        inventory = FileInventory('Security.evtx', 0)
+        inventory.records = records
+        for i in range(parsed_records):
+            inventory.add_record(record(i, 4624 if i % 2 == 0 else 4634))
+        return inventory
+
+    def test_damaged_records_are_not_extrapolated(self):
+        # some records could not be parsed, but all chunks have been read
+        inventory = self.inventory(records=10, parsed_records=4)
+        inventory.extrapolate()
+        self.assertFalse(inventory.sampled)
+        self.assertEqual(inventory.event_ids, Counter({4624: 2, 4634: 2}))
+        self.assertEqual(inventory.computers, Counter({'WS01': 4}))
+
+    def test_sample(self):
+        inventory = self.inventory(records=10, parsed_records=4)
+        inventory.sampled = True
+        inventory.extrapolate()
+        self.assertEqual(inventory.event_ids, Counter({4624: 5, 4634: 5}))
+        self.assertEqual(inventory.channels, Counter({'Security': 10}))
+        self.assertEqual(inventory.hours, Counter({'2021-01-01 03': 10}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import orjson
+
+from evtxtools.EvtxParser import EvtxParser
+from evtxtools.ExternalSorter import ExternalSorter, MAX_FAN_IN
+from evtxtools.WellKnownSids import WellKnownSidFilter
+from evtxtools.WindowsEvent import WindowsEvent
+
+BEGIN = datetime(2021, 1, 1, 3)
+
+
+def windows_event(event_id: int, seconds: int, computer: str, event_data: dict) -> WindowsEvent:
+    timestamp = BEGIN + timedelta(seconds=seconds)
+    system = {
+        'EventID': event_id,
+        'TimeCreated': {'#attributes': {'SystemTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}},
+        'EventRecordID': seconds,
+        'Channel': 'Security',
+        'Computer': computer,
+    }
+    record = {
+        'event_record_id': seconds,
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S.%f UTC'),
+        'data': orjson.dumps({'Event': {'System': system, 'EventData': event_data}}).decode('utf-8'),
+    }
+    return WindowsEvent(record, {4624, 4634}, datetime.min, datetime.max)
+
+
+class ExternalSorterTest(unittest.TestCase):
+    def test_many_runs(self):
+        rng = random.Random(1)
+        items = [(rng.randint(0, 1000), i) for i in range(20000)]
+        # about 30 items fit into a run, so that many more runs are written than can be merged at once
+        sorter = ExternalSorter(key=lambda item: item[0], max_memory=4096)
+        for item in items:
+            sorter.add(item)
+        self.assertLessEqual(sorter.runs, MAX_FAN_IN)
+        # items with equal keys keep the order in which they have been added
+        self.assertEqual(list(sorter), sorted(items, key=lambda item: item[0]))
+        sorter.close()
+
+    def test_small_fan_in(self):
+        rng = random.Random(2)
+        items = [rng.random() for _ in range(5000)]
+        sorter = ExternalSorter(key=lambda item: item, max_memory=1024, fan_in=3)
+        for item in items:
+            sorter.add(item)
+        self.assertEqual(list(sorter), sorted(items))
+        sorter.close()
+
+    def test_sessions_are_identical_to_memory(self):
+        rng = random.Random(3)
+        events = list()
+        for seconds in range(3000):
+            logon_id = hex(rng.randint(0x1000, 0x1200))
+            event_data = {'LogonType': '3', 'TargetUserName': 'user%d' % rng.randint(0, 9),
+                          'TargetUserSid': 'S-1-5-21-1-2-3-%d' % rng.randint(1000, 1009),
+                          'TargetLogonId': logon_id, 'IpAddress': '10.0.0.%d' % rng.randint(1, 9)}
+            events.append(windows_event(rng.choice([4624, 4634]), seconds, 'WS%02d' % rng.randint(0, 5), event_data))
+
+        def sessions(max_memory: int = None) -> list:
+            evtx_parser = EvtxParser([], WellKnownSidFilter(), datetime.min, datetime.max, max_memory=max_memory)
+            evtx_parser.parse_event_stream(events)
+            result = [row.describe() for row in evtx_parser.sorted_activities()]
+            evtx_parser.close()
+            return result
+
+        in_memory = sessions()
+        self.assertGreater(len(in_memory), 100)
+        self.assertEqual(sessions(max_memory=64 * 1024), in_memory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import orjson
+
+from evtxtools.FailedLogonAggregator import FailedLogonAggregator
+from evtxtools.WindowsEvent import WindowsEvent
+
+BEGIN = datetime(2021, 1, 1, 3)
+WINDOW = timedelta(seconds=30)
+
+_record_id = [0]
+
+
+def failed_logon(seconds: int, source: str, account: str = 'alice') -> WindowsEvent:
+    return windows_event(4625, 'Security', seconds, {'IpAddress': source, 'TargetDomainName': 'CONTOSO',
+                                                     'TargetUserName': account})
+
+
+def failed_rdp_connection(seconds: int, source: str) -> WindowsEvent:
+    return windows_event(140, 'Microsoft-Windows-RemoteDesktopServices-RdpCoreTS/Operational', seconds,
+                         {'IPString': source})
+
+
+def windows_event(event_id: int, channel: str, seconds: int, event_data: dict) -> WindowsEvent:
+    _record_id[0] += 1
+    timestamp = BEGIN + timedelta(seconds=seconds)
+    system = {
+        'EventID': event_id,
+        'TimeCreated': {'#attributes': {'SystemTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}},
+        'EventRecordID': _record_id[0],
+        'Channel': channel,
+        'Computer': 'WS01',
+    }
+    record = {
+        'event_record_id': _record_id[0],
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S.%f UTC'),
+        'data': orjson.dumps({'Event': {'System': system, 'EventData': event_data}}).decode('utf-8'),
+    }
+    return WindowsEvent(record, {4625, 140}, datetime.min, datetime.max)
+
+
+def summary(bursts: list) -> list:
+    return sorted((b.source, b.first_timestamp, b.last_timestamp, b.count) for b in bursts)
+
+
+def aggregate(events: list, **kwargs) -> list:
+    aggregator = FailedLogonAggregator(WINDOW, **kwargs)
+    bursts = list()
+    for event in events:
+        bursts.extend(aggregator.add_event(event))
+    return summary(bursts + aggregator.flush())
+
+
+class FailedLogonAggregatorTest(unittest.TestCase):
+    def events(self) -> list:
+        rng = random.Random(1)
+        events = list()
+        for seconds in range(0, 20000, 7):
+            if rng.random() < 0.6:
+                # the log has been rotated after 10000 seconds, and has no events for one hour
+                seconds += 3600 if seconds >= 10000 else 0
+                events.append(failed_logon(seconds, '10.0.0.%d' % rng.randint(1, 4), 'user%d' % rng.randint(0, 3)))
+        return events
+
+    def test_bursts(self):
+        events = [failed_logon(0, '10.0.0.1'), failed_logon(20, '10.0.0.1', 'bob'), failed_logon(40, '10.0.0.1'),
+                  failed_logon(100, '10.0.0.1'), failed_logon(30, '10.0.0.2')]
+        self.assertEqual(aggregate(events), [
+            ('10.0.0.1', BEGIN, BEGIN + timedelta(seconds=40), 3),
+            ('10.0.0.1', BEGIN + timedelta(seconds=100), BEGIN + timedelta(seconds=100), 1),
+            ('10.0.0.2', BEGIN + timedelta(seconds=30), BEGIN + timedelta(seconds=30), 1),
+        ])
+
+    def test_events_out_of_order(self):
+        events = self.events()
+        expected = aggregate(events)
+        # batches are decoded in parallel, and arrive in any order if they are not too far apart
+        rng = random.Random(2)
+        batches = [events[i:i + 50] for i in range(0, len(events), 50)]
+        shuffled = list()
+        for i in range(0, len(batches), 10):
+            group = batches[i:i + 10]
+            rng.shuffle(group)
+            shuffled.extend(e for batch in group for e in batch)
+        self.assertNotEqual(shuffled, events)
+        self.assertEqual(aggregate(shuffled, max_pending=1000), expected)
+
+    def test_older_log_after_newer_log(self):
+        events = self.events()
+        # e.g. Security.evtx is read before Archive-Security-*.evtx
+        middle = next(i for i, e in enumerate(events) if e.timestamp >= BEGIN + timedelta(seconds=13600))
+        self.assertEqual(aggregate(events[middle:] + events[:middle], max_pending=10), aggregate(events))
+
+    def test_log_sources_are_evicted_separately(self):
+        aggregator = FailedLogonAggregator(WINDOW, max_pending=0)
+        # the RDP log ends with an open burst, and must not keep the bursts of the Security log open
+        self.assertEqual(aggregator.add_event(failed_rdp_connection(0, '10.0.0.9')), [])
+        self.assertEqual(aggregator.add_event(failed_logon(10, '10.0.0.1')), [])
+        completed = aggregator.add_event(failed_logon(100, '10.0.0.2'))
+        self.assertEqual(summary(completed), [('10.0.0.1', BEGIN + timedelta(seconds=10),
+                                               BEGIN + timedelta(seconds=10), 1)])
+        self.assertEqual(summary(aggregator.flush()), [
+            ('10.0.0.2', BEGIN + timedelta(seconds=100), BEGIN + timedelta(seconds=100), 1),
+            ('10.0.0.9', BEGIN, BEGIN, 1),
+        ])
+
+    def test_max_keys(self):
+        aggregator = FailedLogonAggregator(WINDOW, max_keys=2, max_pending=0)
+        completed = list()
+        for i in range(5):
+            completed.extend(aggregator.add_event(failed_logon(i, '10.0.0.%d' % i)))
+        # the least recently updated bursts are completed early
+        self.assertEqual([b.source for b in completed], ['10.0.0.0', '10.0.0.1', '10.0.0.2'])
+        self.assertEqual(len(aggregator.flush()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
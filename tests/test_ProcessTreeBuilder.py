@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime, timedelta
+
+import orjson
+
+from evtxtools.Activity import Activity
+from evtxtools.ProcessTreeBuilder import ProcessTreeBuilder
+from evtxtools.WindowsEvent import WindowsEvent
+
+BEGIN = datetime(2021, 1, 1, 3)
+
+
+def windows_event(event_id: int, seconds: int, event_data: dict, activity_id: str = None) -> WindowsEvent:
+    timestamp = BEGIN + timedelta(seconds=seconds)
+    system = {
+        'EventID': event_id,
+        'TimeCreated': {'#attributes': {'SystemTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}},
+        'EventRecordID': seconds,
+        'Correlation': {'#attributes': {'ActivityID': activity_id}} if activity_id is not None else None,
+        'Channel': 'Security',
+        'Computer': 'WS01',
+    }
+    record = {
+        'event_record_id': seconds,
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S.%f UTC'),
+        'data': orjson.dumps({'Event': {'System': system, 'EventData': event_data}}).decode('utf-8'),
+    }
+    return WindowsEvent(record, {4624, 4688}, datetime.min, datetime.max)
+
+
+class ProcessTreeBuilderTest(unittest.TestCase):
+    def trees(self, activity_id: str) -> list:
+        logon = windows_event(4624, 0, {'LogonType': '2', 'TargetUserName': 'alice', 'TargetLogonId': '0x3e7a1'},
+                              activity_id)
+        activity = Activity(None)
+        activity.add_event(logon)
+
+        builder = ProcessTreeBuilder()
+        builder.add_event(windows_event(4688, 1, {'SubjectLogonId': '0x3E7A1', 'NewProcessId': '0x10',
+                                                  'ProcessId': '0x4', 'NewProcessName': 'C:\\explorer.exe'}))
+        builder.add_event(windows_event(4688, 2, {'SubjectLogonId': '0x3e7a1', 'NewProcessId': '0x20',
+                                                  'ProcessId': '0x10', 'NewProcessName': 'C:\\cmd.exe'}))
+        return builder.trees(activity)
+
+    def test_logon_id(self):
+        roots = self.trees(None)
+        self.assertEqual([p.pid for p in roots], [0x10])
+        self.assertEqual([p.pid for p in roots[0].children], [0x20])
+
+    def test_correlation_activity_id(self):
+        # modern Windows sets a correlation ActivityID on 4624, which becomes the activity id
+        roots = self.trees('{B6A2F1C4-1D2E-4F3A-8B9C-0D1E2F3A4B5C}')
+        self.assertEqual([p.pid for p in roots], [0x10])
+        self.assertEqual([p.pid for p in roots[0].children], [0x20])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from evtxtools.ProcessedRecords import ProcessedRecords, RecordRanges, log_name
+
+
+class RecordRangesTest(unittest.TestCase):
+    def test_add(self):
+        ranges = RecordRanges()
+        ranges.add([5, 3, 4, 10])
+        self.assertEqual(ranges.to_list(), [[3, 5], [10, 10]])
+        # adjacent and overlapping ranges are merged
+        ranges.add([6, 9])
+        self.assertEqual(ranges.to_list(), [[3, 6], [9, 10]])
+        ranges.add([7, 8])
+        self.assertEqual(ranges.to_list(), [[3, 10]])
+        ranges.add([1, 20, 4])
+        self.assertEqual(ranges.to_list(), [[1, 1], [3, 10], [20, 20]])
+        ranges.add([])
+        self.assertEqual(ranges.to_list(), [[1, 1], [3, 10], [20, 20]])
+
+    def test_add_ranges_of_a_list(self):
+        ranges = RecordRanges([[10, 20], [30, 40]])
+        ranges.add(range(15, 35))
+        self.assertEqual(ranges.to_list(), [[10, 40]])
+
+    def test_covers(self):
+        ranges = RecordRanges([[3, 10], [20, 20]])
+        self.assertTrue(ranges.covers(3, 10))
+        self.assertTrue(ranges.covers(4, 9))
+        self.assertTrue(ranges.covers(20, 20))
+        self.assertFalse(ranges.covers(2, 10))
+        self.assertFalse(ranges.covers(3, 11))
+        # a chunk whose records are processed only in part is parsed again
+        self.assertFalse(ranges.covers(10, 20))
+        self.assertFalse(RecordRanges().covers(1, 1))
+        self.assertIn(3, ranges)
+        self.assertIn(20, ranges)
+        self.assertNotIn(11, ranges)
+        self.assertNotIn(1, ranges)
+
+
+class ProcessedRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_log_name(self):
+        self.assertEqual(log_name('Security.evtx'), 'Security')
+        self.assertEqual(log_name('Archive-Security-2021-01-31-23-59-59-123.evtx'), 'Security')
+        self.assertEqual(log_name('archive-security-2021-01-31-23-59-59-123.EVTX'), 'security')
+        self.assertEqual(log_name('Archive-Microsoft-Windows-TerminalServices-LocalSessionManager%4Operational-'
+                                  '2021-01-31-23-59-59-123.evtx'),
+                         'Microsoft-Windows-TerminalServices-LocalSessionManager%4Operational')
+        # files which only look like archives belong to a log of their own
+        self.assertEqual(log_name('Archive-Security.evtx'), 'Archive-Security')
+        self.assertEqual(log_name('Archive-Security-2021-01-31.evtx'), 'Archive-Security-2021-01-31')
+
+    def test_archive_after_live_log(self):
+        processed = ProcessedRecords(self.root)
+        live = self.root / 'ws01' / 'Security.evtx'
+        archive = self.root / 'ws01' / 'Archive-Security-2021-01-31-23-59-59-123.evtx'
+        other = self.root / 'ws02' / 'Security.evtx'
+        self.assertEqual(processed.key(archive), processed.key(live))
+        self.assertNotEqual(processed.key(other), processed.key(live))
+
+        processed.add(live, list(range(1, 101)))
+        # the log has been rotated after record 80, and the archive arrives after the live log has been indexed
+        self.assertTrue(processed.of(archive).covers(1, 80))
+        self.assertFalse(processed.of(other).covers(1, 80))
+        # the new live log continues with record 101
+        self.assertFalse(processed.of(live).covers(101, 120))
+        processed.add(live, list(range(101, 121)))
+        self.assertEqual(processed.of(archive).to_list(), [[1, 120]])
+
+    def test_state_file(self):
+        state_file = self.root / 'state.json'
+        live = self.root / 'ws01' / 'Security.evtx'
+        processed = ProcessedRecords(self.root, state_file)
+        processed.add(live, [1, 2, 3, 7])
+        processed.add(live, [])
+        self.assertEqual(ProcessedRecords(self.root, state_file).of(live).to_list(), [[1, 3], [7, 7]])
+        # the ranges which are returned are a copy
+        processed.of(live).add([4, 5, 6])
+        self.assertEqual(processed.of(live).to_list(), [[1, 3], [7, 7]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import cProfile
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from evtxtools.Profiler import Profiler
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.__directory.name) / 'profile'
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    # runs two stages in threads at the same time
+    def run_stages(self) -> Profiler:
+        profiler = Profiler(self.output_dir, sampling_interval=0.001)
+
+        def run(name: str):
+            with profiler.stage(name):
+                busy(0.2)
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in ('reader', 'decoder')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        profiler.report()
+        return profiler
+
+    def assertStacks(self):
+        for stage in ('reader', 'decoder'):
+            lines = (self.output_dir / "{0}.collapsed".format(stage)).read_text().splitlines()
+            self.assertGreater(len(lines), 0)
+            self.assertTrue(any('busy' in line for line in lines))
+            self.assertFalse(any(line.startswith(stage + ';') for line in lines))
+
+    @unittest.skipUnless(Profiler.PER_THREAD_CPROFILE, 'cProfile profiles every thread separately before Python 3.12')
+    def test_cprofile(self):
+        self.run_stages()
+        self.assertTrue((self.output_dir / 'reader.prof').is_file())
+        self.assertTrue((self.output_dir / 'decoder.prof').is_file())
+        self.assertStacks()
+
+    def test_sampling_only(self):
+        with mock.patch.object(Profiler, 'PER_THREAD_CPROFILE', False):
+            self.run_stages()
+        self.assertEqual(list(self.output_dir.glob('*.prof')), [])
+        self.assertStacks()
+
+    def test_other_profiler_is_active(self):
+        with mock.patch.object(cProfile.Profile, 'enable', side_effect=ValueError('another profiler is active')), \
+                self.assertLogs(level='WARNING') as logs:
+            self.run_stages()
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(list(self.output_dir.glob('*.prof')), [])
+        self.assertStacks()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+
+from evtxtools.ScriptBlockReassembler import ScriptBlockReassembler
+from evtxtools.WindowsEvent import WindowsEvent
+
+BEGIN = datetime(2021, 1, 1, 3)
+
+
+def script_block_event(seconds: int, script_block_id: str, number: int, total: int, text: str) -> WindowsEvent:
+    timestamp = BEGIN + timedelta(seconds=seconds)
+    system = {
+        'EventID': 4104,
+        'TimeCreated': {'#attributes': {'SystemTime': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}},
+        'EventRecordID': seconds,
+        'Channel': 'Microsoft-Windows-PowerShell/Operational',
+        'Computer': 'WS01',
+    }
+    event_data = {'MessageNumber': str(number), 'MessageTotal': str(total), 'ScriptBlockText': text,
+                  'ScriptBlockId': script_block_id, 'Path': ''}
+    record = {
+        'event_record_id': seconds,
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S.%f UTC'),
+        'data': orjson.dumps({'Event': {'System': system, 'EventData': event_data}}).decode('utf-8'),
+    }
+    return WindowsEvent(record, {4104}, datetime.min, datetime.max)
+
+
+def open_files() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+class ScriptBlockReassemblerTest(unittest.TestCase):
+    BLOCKS = 2000
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self.__directory.name)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def part(self, block: int, number: int) -> str:
+        return "Write-Output 'block %d part %d'\n" % (block, number)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), 'open files are counted in /proc')
+    def test_interleaved_blocks_share_one_spill_file(self):
+        reassembler = ScriptBlockReassembler(self.directory, max_memory=1000)
+        files = open_files()
+        seconds = 0
+        # the first two parts of all blocks arrive before their last parts, so that all blocks are spilled
+        for number in (1, 2, 3):
+            for block in range(self.BLOCKS):
+                reassembler.add_event(script_block_event(seconds, '{%08d}' % block, number, 3,
+                                                         self.part(block, number)))
+                seconds += 1
+                self.assertLessEqual(open_files(), files + 1)
+        reassembler.close()
+        self.assertEqual(open_files(), files)
+
+        self.assertEqual(reassembler.scripts, self.BLOCKS)
+        for block in range(self.BLOCKS):
+            text = "".join(self.part(block, number) for number in (1, 2, 3))
+            digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            self.assertEqual((self.directory / (digest + '.ps1')).read_text(), text)
+
+    def test_incomplete_block(self):
+        reassembler = ScriptBlockReassembler(self.directory, max_memory=10)
+        reassembler.add_event(script_block_event(0, '{a}', 1, 3, 'first '))
+        reassembler.add_event(script_block_event(1, '{a}', 3, 3, 'third'))
+        with self.assertLogs(level='WARNING'):
+            reassembler.close()
+        digest = hashlib.sha256(b'first third').hexdigest()
+        self.assertEqual((self.directory / (digest + '.partial.ps1')).read_text(), 'first third')
+
+
+if __name__ == '__main__':
+    unittest.main()
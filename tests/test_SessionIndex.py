@@ -0,0 +1,82 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import logins
+from evtxtools import parse_arguments
+from evtxtools.SessionIndex import Session, SessionIndex
+
+BEGIN = datetime(2021, 1, 1, 3)
+
+
+def session(hostname: str, begin: int, end: int = None) -> Session:
+    text = "%s %d-%s" % (hostname, begin, end)
+    return Session(begin=BEGIN + timedelta(hours=begin),
+                   end=datetime.max if end is None else BEGIN + timedelta(hours=end),
+                   hostname=hostname, activity_id=None, text=text, latex=text)
+
+
+def hours(h: int) -> str:
+    return (BEGIN + timedelta(hours=h)).isoformat()
+
+
+class SessionIndexTest(unittest.TestCase):
+    SESSIONS = [session('WS01', 0, 2), session('WS01', 1, 5), session('WS01', 6), session('WS02', 0, 10),
+                session('WS02', 3, 4)]
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.index_file = Path(self.__directory.name) / 'sessions.idx'
+        SessionIndex(self.SESSIONS).save(self.index_file)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def texts(self, sessions: list) -> list:
+        return sorted(s.text for s in sessions)
+
+    def logins(self, *argv) -> list:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            logins.run(parse_arguments('logins', ['--session-index', str(self.index_file)] + list(argv)))
+        return sorted(output.getvalue().splitlines())
+
+    def test_queries(self):
+        index = SessionIndex.load(self.index_file)
+        self.assertEqual(index.hostnames, {'WS01', 'WS02'})
+        self.assertEqual(self.texts(index.at(BEGIN + timedelta(hours=1))),
+                         ['WS01 0-2', 'WS01 1-5', 'WS02 0-10'])
+        self.assertEqual(self.texts(index.at(BEGIN + timedelta(hours=1), 'WS01')), ['WS01 0-2', 'WS01 1-5'])
+        self.assertEqual(index.at(BEGIN + timedelta(hours=1), 'WS03'), [])
+        self.assertEqual(self.texts(index.overlapping(BEGIN + timedelta(hours=5), BEGIN + timedelta(hours=7), 'WS01')),
+                         ['WS01 1-5', 'WS01 6-None'])
+
+    def test_host(self):
+        self.assertEqual(self.logins('--at', hours(1), '--host', 'WS01'), ['WS01 0-2', 'WS01 1-5'])
+        self.assertEqual(self.logins('--overlapping', hours(3), hours(4), '--host', 'WS02'),
+                         ['WS02 0-10', 'WS02 3-4'])
+        self.assertEqual(self.logins('--host', 'WS01'), ['WS01 0-2', 'WS01 1-5', 'WS01 6-None'])
+
+    def test_from_to(self):
+        self.assertEqual(self.logins('--from', hours(5), '--to', hours(7)), ['WS01 1-5', 'WS01 6-None', 'WS02 0-10'])
+        self.assertEqual(self.logins('--from', hours(11)), ['WS01 6-None'])
+        self.assertEqual(self.logins('--to', hours(0), '--host', 'WS02'), ['WS02 0-10'])
+        # queries are restricted to --from and --to as well
+        self.assertEqual(self.logins('--at', hours(3), '--to', hours(2)), ['WS01 1-5', 'WS02 0-10'])
+        self.assertEqual(self.logins('--at', hours(3), '--from', hours(20)), [])
+        self.assertEqual(self.logins('--overlapping', hours(3), hours(7), '--from', hours(5)),
+                         ['WS01 1-5', 'WS01 6-None', 'WS02 0-10'])
+
+    def test_host_requires_query(self):
+        with tempfile.TemporaryDirectory() as logsdir:
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parse_arguments('logins', [logsdir, '--host', 'WS01'])
+            args = parse_arguments('logins', [logsdir, '--host', 'WS01', '--at', hours(1)])
+            self.assertEqual(args.host, 'WS01')
+
+
+if __name__ == '__main__':
+    unittest.main()
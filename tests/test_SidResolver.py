@@ -0,0 +1,90 @@
+import sys
+import threading
+import unittest
+
+from evtxtools.SidResolver import SidResolver
+from evtxtools.WellKnownSids import Sid, WellKnownSid, classify_sid, parse_sid
+
+DOMAIN_SID = 'S-1-5-21-1004336348-1177238915-682003330'
+
+
+def logon(rid: int) -> dict:
+    return {'TargetUserSid': '%s-%d' % (DOMAIN_SID, rid), 'TargetDomainName': 'CONTOSO',
+            'TargetUserName': 'user%d' % rid}
+
+
+class WellKnownSidsTest(unittest.TestCase):
+    def test_parse_sid(self):
+        sid = parse_sid(DOMAIN_SID + '-512')
+        self.assertEqual(sid, Sid(1, 5, (21, 1004336348, 1177238915, 682003330, 512)))
+        self.assertEqual(sid.rid, 512)
+        self.assertEqual(str(sid), DOMAIN_SID + '-512')
+        # the identifier authority may be hexadecimal, and the prefix may be lower case
+        self.assertEqual(parse_sid('s-1-0x5-18'), parse_sid('S-1-5-18'))
+
+    def test_parse_invalid_sid(self):
+        for s in (None, '', '-', 'S-1', 'X-1-5-18', 'S-1-5-abc', 'S-1-0x-18', 'S-1-5-١٢', 17):
+            self.assertIsNone(parse_sid(s), s)
+
+    def test_classify_sid(self):
+        self.assertEqual(classify_sid('S-1-5-18'), WellKnownSid.SECURITY_LOCAL_SYSTEM_RID)
+        self.assertEqual(classify_sid('s-1-5-7'), WellKnownSid.SECURITY_ANONYMOUS_LOGON_RID)
+        self.assertIsNone(classify_sid(DOMAIN_SID + '-500'))
+        self.assertIsNone(classify_sid('not a sid'))
+
+
+class SidResolverTest(unittest.TestCase):
+    def test_accounts(self):
+        resolver = SidResolver()
+        resolver.add_event(4624, logon(1001))
+        # other events do not name accounts
+        resolver.add_event(4634, logon(1002))
+
+        event_data = {'TargetUserSid': '%s-%d' % (DOMAIN_SID, 1001), 'TargetUserName': '-',
+                      'SubjectUserSid': '%s-%d' % (DOMAIN_SID, 1002)}
+        self.assertEqual(resolver.accounts(event_data), {'TargetDomainName': 'CONTOSO', 'TargetUserName': 'user1001'})
+        # the event data itself is not changed
+        self.assertEqual(event_data['TargetUserName'], '-')
+
+    def test_least_recently_used_sids_are_forgotten(self):
+        resolver = SidResolver(max_sids=3)
+        for rid in (1, 2, 3):
+            resolver.learn(logon(rid))
+        # resolving a SID makes it the most recently used one
+        self.assertEqual(resolver.resolve('%s-1' % DOMAIN_SID), ('CONTOSO', 'user1'))
+        resolver.learn(logon(4))
+        self.assertEqual(len(resolver), 3)
+        self.assertIsNone(resolver.resolve('%s-2' % DOMAIN_SID))
+        for rid in (1, 3, 4):
+            self.assertEqual(resolver.resolve('%s-%d' % (DOMAIN_SID, rid)), ('CONTOSO', 'user%d' % rid))
+
+    def test_shared_by_threads(self):
+        resolver = SidResolver(max_sids=10)
+        failures = list()
+
+        def work(offset: int):
+            try:
+                for rid in range(offset, offset + 20000):
+                    resolver.learn(logon(rid % 50))
+                    # the least recently learned SID, which is the next one to be forgotten
+                    resolver.resolve('%s-%d' % (DOMAIN_SID, (rid - 9) % 50))
+            except Exception as e:
+                failures.append(e)
+
+        # threads are switched as often as possible, so that evictions interleave with lookups
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=work, args=(i * 13,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(resolver), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import orjson
+
+import evtxqueue
+from evtxtools import parse_arguments
+from evtxtools.EventSource import split_export
+from evtxtools.EvtxChunk import CHUNK_SIZE
+from evtxtools.TaskQueue import TaskQueue
+
+
+def event(record_id: int) -> dict:
+    return {'Event': {
+        'System': {
+            'EventID': 4624,
+            'TimeCreated': {'#attributes': {'SystemTime': '2021-01-01T03:00:00.123456Z'}},
+            'EventRecordID': record_id,
+            'Channel': 'Security',
+            'Computer': 'WS01.contoso.local',
+        },
+        'EventData': {'TargetUserName': 'user%d' % (record_id % 10), 'LogonType': 3},
+    }}
+
+
+class TaskQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self.__directory.name)
+        self.queue_file = self.directory / 'queue.db'
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def queue(self, **kwargs) -> TaskQueue:
+        queue = TaskQueue(self.queue_file, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_claim(self):
+        queue = self.queue()
+        self.assertEqual(queue.add_tasks([('a.evtx', 0, 4), ('a.evtx', 4, 6), ('b.evtx', 0, 1)]), 3)
+        first = queue.claim('w1', 60)
+        second = queue.claim('w2', 60)
+        self.assertEqual((first.path, first.first_chunk, first.last_chunk, first.attempts), ('a.evtx', 0, 4, 1))
+        self.assertEqual((second.path, second.first_chunk, second.last_chunk), ('a.evtx', 4, 6))
+        # only the worker which holds the lease can complete a task
+        self.assertFalse(queue.complete(first, 'w2', 10))
+        self.assertTrue(queue.complete(first, 'w1', 10))
+        self.assertTrue(queue.renew(second, 'w2', 60, 5))
+        self.assertFalse(queue.finished)
+        self.assertEqual(queue.claim('w1', 60).path, 'b.evtx')
+        self.assertIsNone(queue.claim('w1', 60))
+        self.assertEqual(queue.status()['states'], {'done': (1, 10), 'leased': (2, 5)})
+
+    def test_add_tasks_again(self):
+        queue = self.queue()
+        self.assertEqual(queue.add_tasks([('a.evtx', 0, 4), ('a.evtx', 4, 6)]), 2)
+        # a second run of the coordinator adds only the new tasks
+        self.assertEqual(queue.add_tasks([('a.evtx', 0, 4), ('a.evtx', 4, 6), ('b.evtx', 0, 1)]), 1)
+        self.assertEqual(queue.status()['states'], {'pending': (3, 0)})
+
+    def test_expired_lease(self):
+        queue = self.queue()
+        queue.add_tasks([('a.evtx', 0, 4)])
+        # the lease of the first worker has expired when the second worker claims a task
+        task = queue.claim('w1', -1)
+        taken = queue.claim('w2', 60)
+        self.assertEqual(taken.id, task.id)
+        self.assertEqual(taken.attempts, 2)
+        self.assertFalse(queue.renew(task, 'w1', 60, 1))
+        self.assertFalse(queue.complete(task, 'w1', 1))
+        self.assertFalse(queue.fail(task, 'w1', 'error'))
+        self.assertTrue(queue.complete(taken, 'w2', 1))
+        self.assertTrue(queue.finished)
+
+    def test_max_attempts(self):
+        queue = self.queue(max_attempts=2)
+        queue.add_tasks([('a.evtx', 0, 4), ('b.evtx', 0, 4)])
+        # failed tasks are retried
+        task = queue.claim('w1', 60)
+        self.assertTrue(queue.fail(task, 'w1', 'first error'))
+        task = queue.claim('w1', 60)
+        self.assertEqual((task.path, task.attempts), ('a.evtx', 2))
+        self.assertTrue(queue.fail(task, 'w1', 'second error'))
+
+        # expired leases count as attempts
+        task = queue.claim('w1', -1)
+        self.assertEqual(task.path, 'b.evtx')
+        self.assertEqual(queue.claim('w2', -1).id, task.id)
+        self.assertIsNone(queue.claim('w3', 60))
+        self.assertTrue(queue.finished)
+        self.assertEqual(queue.status()['failed'], [('a.evtx', 0, 4, 2, 'second error'),
+                                                    ('b.evtx', 0, 4, 2, 'lease expired')])
+
+        # workers read the number of attempts which has been stored by the coordinator
+        self.assertEqual(self.queue().get('max_attempts'), '2')
+
+    def test_workers(self):
+        logsdir = self.directory / 'logs'
+        (logsdir / 'ws01').mkdir(parents=True)
+        events = [orjson.dumps(event(i)) for i in range(1, 3001)]
+        (logsdir / 'ws01' / 'Security.jsonl').write_bytes(b"".join(e + b'\n' for e in events))
+        self.assertGreater(len(split_export(logsdir / 'ws01' / 'Security.jsonl', CHUNK_SIZE)), 4)
+
+        coordinator = ['coordinator', str(self.queue_file), str(logsdir), '--chunks-per-task', '1']
+        self.assertEqual(evtxqueue.run(parse_arguments('queue', coordinator)), 0)
+        queue = self.queue()
+        tasks = queue.status()['states']['pending'][0]
+        # the coordinator does not add the same tasks again
+        with self.assertLogs(level='INFO') as logs:
+            self.assertEqual(evtxqueue.run(parse_arguments('queue', coordinator)), 0)
+        self.assertIn('added 0 tasks', logs.output[-1])
+        self.assertEqual(queue.status()['states'], {'pending': (tasks, 0)})
+        # nor does it accept a different logs directory
+        other = ['coordinator', str(self.queue_file), str(self.directory)]
+        with self.assertLogs(level='CRITICAL'):
+            self.assertEqual(evtxqueue.run(parse_arguments('queue', other)), 1)
+
+        output_dir = self.directory / 'output'
+        worker = ['worker', str(self.queue_file), '--jsonl', str(output_dir), '--processes', '2',
+                  '--lease', '3']
+        self.assertEqual(evtxqueue.run(parse_arguments('queue', worker)), 0)
+
+        self.assertEqual(queue.status()['states'], {'done': (tasks, len(events))})
+        outputs = sorted(output_dir.iterdir(), key=lambda p: int(p.name.split('.')[0]))
+        self.assertEqual([p.name for p in outputs], ['%d.jsonl' % i for i in range(1, tasks + 1)])
+        lines = [line for p in outputs for line in p.read_bytes().splitlines()]
+        self.assertEqual(lines, events)
+
+
+if __name__ == '__main__':
+    unittest.main()